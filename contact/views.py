@@ -1,6 +1,6 @@
-from django.core.mail import EmailMessage
 from django.shortcuts import render, redirect
 from django.conf import settings
+from main.utils.email_utils import queue_email
 from .forms import ContactForm
 
 def contact_view(request):
@@ -16,15 +16,14 @@ def contact_view(request):
             sender_email = settings.DEFAULT_FROM_EMAIL
             recipient_list = ['datamininglabfreiberg@gmail.com']  # Your receiving email address
 
-            # Create EmailMessage object which allows more customization
-            mail = EmailMessage(
+            # Queue the email for the sendemails worker instead of calling the mail API here
+            queue_email(
                 subject,
                 message,
                 sender_email,  # From email (your verified domain email)
                 recipient_list,
                 reply_to=[email],  # Add user's email in reply-to for direct replies
             )
-            mail.send()
 
             return redirect('success')
     else:
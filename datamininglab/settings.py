@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "drf_spectacular",
@@ -52,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so that the measurements include the other middleware
+    "main.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -91,15 +94,45 @@ WSGI_APPLICATION = "datamininglab.wsgi.application"
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
 # database variables are stored in .env file in root directory
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": config("DB_NAME", default="!!SET_DATABASE_NAME!!"),
-        "HOST": config("DB_HOST", default="!!SET_DATABASE_HOST!!"),
-        "USER": "postgres",
-        "PASSWORD": config("DB_PASSWORD", default="!!SET_DATABASE_PWD!!"),
-        "PORT": config("DB_PORT", default="!!SET_DATABASE_PORT!!")
+# DB_ENGINE=django.db.backends.sqlite3 runs the project (e.g. the tests) against a local SQLite file
+DB_ENGINE = config("DB_ENGINE", default="django.db.backends.postgresql")
+
+if DB_ENGINE == "django.db.backends.sqlite3":
+    DATABASES = {
+        "default": {
+            "ENGINE": DB_ENGINE,
+            "NAME": config("DB_NAME", default=str(BASE_DIR / "db.sqlite3")),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": DB_ENGINE,
+            "NAME": config("DB_NAME", default="!!SET_DATABASE_NAME!!"),
+            "HOST": config("DB_HOST", default="!!SET_DATABASE_HOST!!"),
+            "USER": config("DB_USER", default="postgres"),
+            "PASSWORD": config("DB_PASSWORD", default="!!SET_DATABASE_PWD!!"),
+            "PORT": config("DB_PORT", default="!!SET_DATABASE_PORT!!"),
+            # keep connections open across requests instead of connecting for every request;
+            # seconds, 0 closes them after each request, None keeps them open indefinitely
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60,
+                                   cast=lambda value: None if value == "None" else int(value)),
+            # test a persistent connection before reusing it in a new request
+            "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+        }
     }
+
+
+# Caches
+# The default cache is process-local (LocMemCache): every worker process has its own copy,
+# so it only holds values that may be stale or are versioned through the database (see
+# main/utils/cache_utils.py). State shared by all workers, e.g. the request counters of the
+# API throttles (see main/throttles.py), is kept in the database.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
 }
 
 
@@ -137,6 +170,13 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = config("MEDIA_FOLDER", default="!!SET_MEDIA_FOLDER!!")
 
+# Delivery of protected media files after the permission check in main.utils.file_utils:
+# 'python' streams them through Django (development), 'nginx' hands the transfer to
+# nginx via X-Accel-Redirect and 'apache' via X-Sendfile (mod_xsendfile).
+FILE_DOWNLOAD_BACKEND = config("FILE_DOWNLOAD_BACKEND", default="python")
+# nginx only: internal location aliasing MEDIA_ROOT
+FILE_DOWNLOAD_INTERNAL_URL = config("FILE_DOWNLOAD_INTERNAL_URL", default="/protected-media/")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -168,9 +208,13 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.JSONParser',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # keyset pagination, see main/pagination.py; clients may request smaller or
+    # larger pages with ?page_size=, capped by API_MAX_PAGE_SIZE
+    'DEFAULT_PAGINATION_CLASS': 'main.pagination.DateRegisteredCursorPagination',
+    'PAGE_SIZE': config("API_PAGE_SIZE", default=100, cast=int),
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'main.throttles.AnonRequestThrottle',
+        'main.throttles.UserRequestThrottle',
         'main.throttles.GetRequestThrottle',
         'main.throttles.PostRequestThrottle',
         'main.throttles.PutDeleteRequestThrottle'
@@ -184,6 +228,48 @@ REST_FRAMEWORK = {
     }
 }
 
+API_MAX_PAGE_SIZE = config("API_MAX_PAGE_SIZE", default=1000, cast=int)
+# entries per page of the HTML list views, and the number of rows up to which their
+# counts are exact (see main.pagination.EstimatedCountPaginator)
+LIST_PAGE_SIZE = config("LIST_PAGE_SIZE", default=50, cast=int)
+LIST_EXACT_COUNT_LIMIT = config("LIST_EXACT_COUNT_LIMIT", default=10000, cast=int)
+# rows fetched per database round trip by the streaming exports
+EXPORT_CHUNK_SIZE = config("EXPORT_CHUNK_SIZE", default=2000, cast=int)
+# upper limit of samples in one bulk upload (POST /samples/bulk/)
+BULK_SAMPLE_MAX_ROWS = config("BULK_SAMPLE_MAX_ROWS", default=5000, cast=int)
+# uploads are inspected while they are received: SHA-256, zip directory and zip bomb checks
+# (see main/upload_handlers.py); archives with more members, or members compressed by a
+# larger factor, are rejected
+FILE_UPLOAD_HANDLERS = [
+    "main.upload_handlers.InspectingMemoryFileUploadHandler",
+    "main.upload_handlers.InspectingTemporaryFileUploadHandler",
+]
+UPLOAD_ZIP_MAX_MEMBERS = config("UPLOAD_ZIP_MAX_MEMBERS", default=100000, cast=int)
+UPLOAD_ZIP_MAX_RATIO = config("UPLOAD_ZIP_MAX_RATIO", default=100, cast=int)
+# chunked uploads (POST /uploads/): largest file, largest chunk per request, and the age
+# after which unfinished uploads are removed by "manage.py clearuploads"
+UPLOAD_MAX_SIZE = config("UPLOAD_MAX_SIZE", default=20 * 1024 ** 3, cast=int)
+UPLOAD_CHUNK_MAX_SIZE = config("UPLOAD_CHUNK_MAX_SIZE", default=64 * 1024 ** 2, cast=int)
+# seconds after which a chunk request that stopped (e.g. a killed worker) no longer blocks the
+# upload; requests that are still receiving renew their claim four times as often
+UPLOAD_CLAIM_TIMEOUT = config("UPLOAD_CLAIM_TIMEOUT", default=60, cast=int)
+UPLOAD_SESSION_MAX_AGE = config("UPLOAD_SESSION_MAX_AGE", default=7 * 86400, cast=int)
+# per-view request metrics (see main/middleware.py, served by /api/metrics/ to staff users);
+# requests slower than SLOW_REQUEST_MS or with more than SLOW_REQUEST_QUERIES queries are logged
+REQUEST_METRICS_ENABLED = config("REQUEST_METRICS_ENABLED", default=True, cast=bool)
+SLOW_REQUEST_MS = config("SLOW_REQUEST_MS", default=1000, cast=int)
+SLOW_REQUEST_QUERIES = config("SLOW_REQUEST_QUERIES", default=50, cast=int)
+# seconds between the saves of the request metrics of a worker process to the database
+REQUEST_METRICS_FLUSH_INTERVAL = config("REQUEST_METRICS_FLUSH_INTERVAL", default=10, cast=float)
+# seconds clients may reuse the sample type info (see main.api.SampleTypeInfoView)
+# before revalidating it with its ETag
+SAMPLE_TYPE_INFO_MAX_AGE = config("SAMPLE_TYPE_INFO_MAX_AGE", default=86400, cast=int)
+# seconds a worker uses its cached lookup data (sample ID bounds, reference data, see
+# main/utils/cache_utils.py) before checking the version in the database again
+VERSIONED_CACHE_TIMEOUT = config("VERSIONED_CACHE_TIMEOUT", default=5, cast=float)
+# maximum number of generations walked by the sample lineage endpoint
+LINEAGE_MAX_DEPTH = config("LINEAGE_MAX_DEPTH", default=100, cast=int)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -201,22 +287,62 @@ SPECTACULAR_SETTINGS = {
     'DEFAULT_RESPONSE_CONTENT_TYPE': 'application/json', # Default content type for responses
 }
 
+# Logging goes through a queue: requests only enqueue records, a background thread writes
+# them to the console and to LOG_FILE (see main/utils/log_utils.py). LOG_ROTATION is "size"
+# (LOG_MAX_BYTES per file), "time" (rotated at LOG_ROTATION_WHEN, e.g. "midnight") or "none";
+# LOG_BACKUP_COUNT rotated files are kept. Unauthorized-access warnings are collapsed to one
+# per IP and LOG_RATE_LIMIT_PERIOD seconds (0: log all of them).
+LOG_FILE = config("LOG_FILE", default="general.log")
+LOG_ROTATION = config("LOG_ROTATION", default="size")
+LOG_MAX_BYTES = config("LOG_MAX_BYTES", default=10 * 1024 * 1024, cast=int)
+LOG_ROTATION_WHEN = config("LOG_ROTATION_WHEN", default="midnight")
+LOG_BACKUP_COUNT = config("LOG_BACKUP_COUNT", default=10, cast=int)
+LOG_RATE_LIMIT_PERIOD = config("LOG_RATE_LIMIT_PERIOD", default=60, cast=int)
+
+LOG_FILE_HANDLERS = {
+    'size': {
+        'class': 'logging.handlers.RotatingFileHandler',
+        'maxBytes': LOG_MAX_BYTES,
+        'backupCount': LOG_BACKUP_COUNT,
+    },
+    'time': {
+        'class': 'logging.handlers.TimedRotatingFileHandler',
+        'when': LOG_ROTATION_WHEN,
+        'backupCount': LOG_BACKUP_COUNT,
+    },
+    'none': {
+        'class': 'logging.FileHandler',
+    },
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'rate_limit': {
+            '()': 'main.utils.log_utils.RateLimitFilter',
+            'period': LOG_RATE_LIMIT_PERIOD,
+        },
+    },
     'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
+        'queue': {
+            '()': 'main.utils.log_utils.QueueListenerHandler',
+            'handlers': [
+                {
+                    'class': 'logging.StreamHandler',
+                },
+                {
+                    **LOG_FILE_HANDLERS[LOG_ROTATION],
+                    'filename': LOG_FILE,
+                    'formatter': 'verbose',
+                },
+            ],
+            'filters': ['rate_limit'],
         },
-        'file': {
-            'class': 'logging.FileHandler',
-            'filename': 'general.log',
-            'formatter': 'verbose',
-        },        
     },
     'loggers': {
         '': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             # DEBUG -> INFO -> WARNING -> ERROR -> CRITICAL
             'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
         }
@@ -237,6 +363,16 @@ ANYMAIL = {
 }
 
 DEFAULT_FROM_EMAIL = "info@dmlf.de"
+# emails are queued in the OutgoingEmail outbox and sent by "python manage.py sendemails";
+# failed emails are retried after EMAIL_RETRY_DELAY seconds, doubled after every further
+# failure up to EMAIL_MAX_RETRY_DELAY, until EMAIL_MAX_ATTEMPTS is reached
+EMAIL_BATCH_SIZE = config("EMAIL_BATCH_SIZE", default=50, cast=int)
+EMAIL_MAX_ATTEMPTS = config("EMAIL_MAX_ATTEMPTS", default=8, cast=int)
+EMAIL_RETRY_DELAY = config("EMAIL_RETRY_DELAY", default=60, cast=int)
+EMAIL_MAX_RETRY_DELAY = config("EMAIL_MAX_RETRY_DELAY", default=6 * 60 * 60, cast=int)
+# seconds a worker has to send a claimed batch; emails of a worker that stopped while sending
+# are sent again after that
+EMAIL_SEND_TIMEOUT = config("EMAIL_SEND_TIMEOUT", default=600, cast=int)
 #EMAIL_HOST = config("EMAIL_HOST")
 #EMAIL_PORT = config("EMAIL_PORT")
 #EMAIL_HOST_USER = config("EMAIL_HOST_USER")
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from main.models import Institute, Staff, Method, FundingBody, Project, SampleType, Sample, Experiment
+from main.models import Institute, Staff, Method, FundingBody, Project, SampleType, Sample, Experiment, OutgoingEmail
 from main.utils.email_utils import send_initial_reset_email
 
 User = get_user_model()
@@ -57,3 +57,10 @@ admin.site.register(Project)
 admin.site.register(SampleType)
 admin.site.register(Sample)
 admin.site.register(Experiment)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt', 'date_registered', 'date_sent')
+    list_filter = ('status',)
+    readonly_fields = ('template', 'user', 'site_url', 'attempts', 'last_error', 'date_registered', 'date_sent')
@@ -1,19 +1,43 @@
 import logging
-from rest_framework import viewsets, mixins, permissions, views, serializers, status
-from rest_framework.decorators import api_view
+import os
+import zipfile
+from datetime import datetime
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import exceptions, viewsets, mixins, permissions, views, serializers, status
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from drf_spectacular.utils import extend_schema, extend_schema_view, inline_serializer, \
                                   OpenApiParameter, OpenApiResponse, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
-from .models import Sample, Experiment, FundingBody, Institute, Method, Project, Staff, SampleType
+from .models import Sample, Experiment, FundingBody, Institute, Method, Project, Staff, SampleType, StoredFile, UploadSession
+from .filters import SampleInfoFilterBackend
+from .forms import ListFilterForm
+from .pagination import IdCursorPagination, SearchPagination
+from .renderers import CSVRenderer, NDJSONRenderer
 from .serializers.main_serializers import (
-    SampleSerializer, ExperimentSerializer, FundingBodySerializer, InstituteSerializer,
-    MethodSerializer, ProjectSerializer, StaffSerializer, SampleTypeSerializer,
+    ArchiveMemberSerializer, SampleSerializer, SampleBulkCreateSerializer, SampleLineageSerializer, ExperimentSerializer, FundingBodySerializer, InstituteSerializer,
+    MethodSerializer, ProjectSerializer, StaffSerializer, SampleTypeSerializer, UploadSessionSerializer,
 )
-from .serializers.sample_type_serializers import (
-    SampleTypeBatterySerializer, SampleTypeSolidsSerializer, SampleTypeLiquidSerializer, SampleTypeSuspensionSerializer,
+from .utils.analytics_utils import (
+    DEFAULT_BINS, DEFAULT_PERCENTILES, GROUP_FIELDS, MAX_BINS, get_numeric_fields, get_sample_info_statistics,
 )
+from .utils.archive_utils import archive_member_response
+from .utils.auth_utils import has_group
+from .utils.bundle_utils import stream_bundle
+from .utils.export_utils import stream_export
+from .utils.lineage_utils import get_lineage
+from .utils.metrics_utils import metrics_registry
+from .utils.sample_type_utils import get_sample_type_schema
+from .utils.search_utils import search_samples
+from .utils.upload_utils import UploadOffsetError, append_chunk, discard_upload, finalize_upload, start_upload
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +55,11 @@ class LogUnauthorizedAccess(permissions.BasePermission):
         # If the request does not have permission, log it
         if not has_permission:
             username = request.user.username if request.user.is_authenticated else 'Anonymous'
+            ip = request.META.get('REMOTE_ADDR')
+            # collapsed per IP by the rate_limit filter of the logging config
             logger.warning(
-                f"Unauthorized access attempt to {request.path} by an unauthenticated user (IP: {request.META.get('REMOTE_ADDR')})."
+                f"Unauthorized access attempt to {request.path} by an unauthenticated user (IP: {ip}).",
+                extra={'rate_limit_key': f"unauthorized:{ip}"},
             )
 
         return has_permission
@@ -47,6 +74,130 @@ class ReadOnlyViewSet(viewsets.GenericViewSet, mixins.RetrieveModelMixin,
     permission_classes = [LogUnauthorizedAccess, permissions.IsAuthenticated]
 
 
+def parse_since(value):
+    """
+    Parses the 'since' query parameter, which may be an ISO date or datetime.
+    """
+    try:
+        since = parse_datetime(value) or parse_date(value)
+    except ValueError:  # well formed, but not a valid date, e.g. 2024-13-45
+        since = None
+    if since is None:
+        raise serializers.ValidationError({'since': "Use an ISO 8601 date or datetime."})
+    if not hasattr(since, 'hour'):  # plain date: start of day
+        since = datetime.combine(since, datetime.min.time())
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def parse_depth(value):
+    """
+    Parses the 'depth' query parameter of the lineage queries, None if it is missing.
+    """
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise serializers.ValidationError({'depth': "Use a non-negative integer."})
+    return int(value)
+
+
+class ExportMixin:
+    """
+    Adds a streaming bulk export (NDJSON or CSV) of the whole table to a viewset.
+    """
+
+    @extend_schema(
+        summary="Export all entries as NDJSON or CSV",
+        parameters=[
+            OpenApiParameter(name='format', description='ndjson (default) or csv', required=False, type=str),
+            OpenApiParameter(name='since', description='only entries registered at or after this ISO date/datetime',
+                             required=False, type=str),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer], pagination_class=None)
+    def export(self, request):
+        # the plain manager is used: the export reads column values only, so the
+        # select_related of the list view would just widen the query
+        queryset = self.filter_queryset(self.get_queryset().model.objects.order_by('date_registered', 'pk'))
+
+        since = request.query_params.get('since')
+        if since:
+            queryset = queryset.filter(date_registered__gte=parse_since(since))
+
+        # entries are ordered oldest first, so the date_registered of the last
+        # row can be passed as 'since' to the next incremental export
+        return stream_export(queryset, request.accepted_renderer.format,
+                             filename=queryset.model._meta.model_name + "s")
+
+
+class ArchiveMixin:
+    """
+    Adds browsing of the zip file in archive_field to a viewset: the members of the archive
+    are listed from the manifest (see ArchiveMember), and a single member can be downloaded
+    without transferring the whole archive.
+    """
+    archive_field = None
+
+    def get_archive(self):
+        # without filter_queryset: the query parameters of these actions are no list filters
+        instance = get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
+        self.check_object_permissions(self.request, instance)
+        name = getattr(instance, self.archive_field).name
+        if not name or not default_storage.exists(name):
+            raise Http404("There is no archive.")
+        # files are registered with their manifest when they are saved, or by deduplicatefiles
+        stored_file = StoredFile.objects.get_current(name)
+        if stored_file is None:
+            raise Http404("The archive is not indexed yet.")
+        return stored_file
+
+    @extend_schema(
+        summary="List the members of the zip archive",
+        parameters=[
+            OpenApiParameter(name='prefix', description='only members whose path starts with this, e.g. a folder',
+                             required=False, type=str),
+        ],
+        responses={200: ArchiveMemberSerializer(many=True)},
+    )
+    @action(detail=True, methods=['get'], url_path='archive', serializer_class=ArchiveMemberSerializer,
+            pagination_class=IdCursorPagination)
+    def archive(self, request, pk=None):
+        members = self.get_archive().members.all()
+        prefix = request.query_params.get('prefix')
+        if prefix:
+            members = members.filter(name__startswith=prefix)
+        page = self.paginate_queryset(members)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        summary="Download a single member of the zip archive",
+        parameters=[
+            OpenApiParameter(name='path', description='path of the member inside the archive', required=True, type=str),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(detail=True, methods=['get'], url_path='archive/member', pagination_class=None)
+    def archive_member(self, request, pk=None):
+        # the same permission as downloading the whole file (see download_file)
+        if not has_group(request.user, 'UseGroup'):
+            raise exceptions.PermissionDenied("You do not have permission to access this file")
+        path = request.query_params.get('path')
+        if not path:
+            raise serializers.ValidationError({'path': "This parameter is required."})
+
+        member = self.get_archive().members.select_related('stored_file').filter(name=path).first()
+        if member is None:
+            raise Http404("The archive has no such member.")
+        try:
+            return archive_member_response(member)
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            logger.error(f"Member {path} of {member.stored_file.name} could not be read: {e}")
+            raise Http404("The member could not be read.")
+
+
 @extend_schema_view(
     list=extend_schema(summary="List all samples"),
     create=extend_schema(summary="Create a new sample"),
@@ -55,15 +206,199 @@ class ReadOnlyViewSet(viewsets.GenericViewSet, mixins.RetrieveModelMixin,
     partial_update=extend_schema(summary="Partially update a sample (only provided fields)"),
     destroy=extend_schema(summary="Delete a sample")
 )
-class SampleViewSet(ReadWriteViewSet):
+class SampleViewSet(ArchiveMixin, ExportMixin, ReadWriteViewSet):
     queryset = Sample.objects.select_related('user').all()
     serializer_class = SampleSerializer
+    archive_field = 'supplementary_file'
     parser_classes = (MultiPartParser, FormParser)
+    filter_backends = [SampleInfoFilterBackend]
 
     def perform_create(self, serializer):
         # Assign the authenticated user (the owner of the token) to the 'user' field of the sample
         serializer.save(user=self.request.user)
 
+    @extend_schema(
+        summary="Create a batch of samples from a zip archive",
+        request=SampleBulkCreateSerializer,
+        responses={
+            201: inline_serializer(name='SampleBulkCreateResponse',
+                                   fields={'created': serializers.ListField(child=serializers.CharField())}),
+            400: OpenApiResponse(description="Errors per manifest row, empty for valid rows", response=OpenApiTypes.OBJECT),
+        },
+    )
+    @action(detail=False, methods=['post'], serializer_class=SampleBulkCreateSerializer)
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        samples = serializer.save(user=request.user)
+        return Response({'created': [sample.sample_id for sample in samples]}, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        summary="Search samples by name, sample ID, experiment or project name",
+        parameters=[
+            OpenApiParameter(name='q', description='search text; words match as prefixes, sample IDs also as fragments',
+                             required=True, type=str),
+        ],
+        responses={200: SampleSerializer(many=True)},
+    )
+    @action(detail=False, methods=['get'], pagination_class=SearchPagination)
+    def search(self, request):
+        text = request.query_params.get('q', '')
+        if not text.strip():
+            raise serializers.ValidationError({'q': "This parameter is required."})
+
+        # results are ordered by relevance
+        queryset = search_samples(self.filter_queryset(self.get_queryset()), text)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    # query parameters of the bundle besides the sample type and sample info filters,
+    # mapped to their lookups like in the HTML list views
+    bundle_filters = {'institute_id': 'institute', 'project': 'project',
+                      'date_from': 'date_registered__gte', 'date_to': 'date_registered__lt'}
+
+    @extend_schema(
+        summary="Download the files and metadata of a set of samples as one zip archive",
+        description="The archive contains samples.csv and experiments.csv with the metadata of the matching "
+                    "samples and all their experiments, and their sample info, supplementary and experiment "
+                    "files under their media paths. It is streamed while it is written. At least one "
+                    "criterion is required; the sample info filters of the sample list apply as well.",
+        parameters=[
+            OpenApiParameter(name='project', description='project ID', required=False, type=int),
+            OpenApiParameter(name='institute_id', description='institute ID', required=False, type=int),
+            OpenApiParameter(name='sample', description='sample ID; the sample and its derived samples',
+                             required=False, type=str),
+            OpenApiParameter(name='depth', description='number of generations below sample', required=False, type=int),
+            OpenApiParameter(name='date_from', description='registered on or after this date (YYYY-MM-DD)',
+                             required=False, type=str),
+            OpenApiParameter(name='date_to', description='registered on or before this date (YYYY-MM-DD)',
+                             required=False, type=str),
+        ],
+        responses={(200, 'application/zip'): OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def bundle(self, request):
+        # the same permission as downloading the files one by one (see download_file)
+        if not has_group(request.user, 'UseGroup'):
+            raise exceptions.PermissionDenied("You do not have permission to access these files")
+
+        samples, criteria = self.filter_samples(request)
+        if not criteria:
+            raise serializers.ValidationError("Select the samples by at least one criterion.")
+        return stream_bundle(samples, filename="bundle")
+
+    def filter_samples(self, request):
+        """
+        Selects samples by the query parameters of the bundle and analytics endpoints: the
+        sample type and sample info filters, bundle_filters and a subtree of derived samples.
+
+        Returns:
+        - the filtered queryset and whether any criterion was given.
+        """
+        # sample type and sample info values
+        samples = self.filter_queryset(Sample.objects.all())
+        criteria = samples.query.has_filters()
+
+        form = ListFilterForm(request.query_params, fields=self.bundle_filters)
+        if not form.is_valid():
+            raise serializers.ValidationError(form.errors)
+        for field_name, lookup in self.bundle_filters.items():
+            value = form.cleaned_data.get(field_name)
+            if value is not None:
+                samples = samples.filter(**{lookup: value})
+                criteria = True
+
+        sample_id = request.query_params.get('sample')
+        if sample_id:
+            depths = get_lineage(sample_id, 'down', parse_depth(request.query_params.get('depth')))
+            if not depths:
+                raise Http404("Sample does not exist")
+            samples = samples.filter(pk__in=depths)
+            criteria = True
+        return samples, criteria
+
+    @extend_schema(
+        summary="Summarize the numeric sample info fields of a set of samples",
+        description="Returns count, minimum, maximum, mean, percentiles and histogram of numeric sample info "
+                    "fields (e.g. weight_in_g, volume_in_ccm, density_in_gccm), optionally per project, "
+                    "institute or sample type. The samples are selected like for the bundle, by default all "
+                    "samples are included. The histograms of a field share the bin edges listed in 'bins'.",
+        parameters=[
+            OpenApiParameter(name='group_by', required=False, type=str, enum=list(GROUP_FIELDS)),
+            OpenApiParameter(name='fields', description='comma-separated numeric sample info fields, all by default',
+                             required=False, type=str),
+            OpenApiParameter(name='percentiles', description='comma-separated percentiles between 0 and 100',
+                             required=False, type=str),
+            OpenApiParameter(name='bins', description=f'number of histogram bins, up to {MAX_BINS}',
+                             required=False, type=int),
+            OpenApiParameter(name='project', description='project ID', required=False, type=int),
+            OpenApiParameter(name='institute_id', description='institute ID', required=False, type=int),
+            OpenApiParameter(name='sample', description='sample ID; the sample and its derived samples',
+                             required=False, type=str),
+            OpenApiParameter(name='depth', description='number of generations below sample', required=False, type=int),
+            OpenApiParameter(name='date_from', description='registered on or after this date (YYYY-MM-DD)',
+                             required=False, type=str),
+            OpenApiParameter(name='date_to', description='registered on or before this date (YYYY-MM-DD)',
+                             required=False, type=str),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def analytics(self, request):
+        params = request.query_params
+        group_by = params.get('group_by') or None
+        if group_by is not None and group_by not in GROUP_FIELDS:
+            raise serializers.ValidationError({'group_by': f"Use one of {', '.join(GROUP_FIELDS)}."})
+
+        numeric_fields = get_numeric_fields()
+        fields = [field_name for field_name in params.get('fields', '').split(',') if field_name]
+        unknown = [field_name for field_name in fields if field_name not in numeric_fields]
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': f"Use numeric sample info fields ({', '.join(numeric_fields)}), not {', '.join(unknown)}."})
+
+        try:
+            percentiles = ([float(value) for value in params['percentiles'].split(',')]
+                           if params.get('percentiles') else DEFAULT_PERCENTILES)
+            bins = int(params.get('bins', DEFAULT_BINS))
+        except ValueError:
+            raise serializers.ValidationError("percentiles and bins have to be numbers.")
+        if not all(0 <= percentile <= 100 for percentile in percentiles):
+            raise serializers.ValidationError({'percentiles': "Use percentiles between 0 and 100."})
+        if not 1 <= bins <= MAX_BINS:
+            raise serializers.ValidationError({'bins': f"Use 1 to {MAX_BINS} bins."})
+
+        samples, _ = self.filter_samples(request)
+        return Response(get_sample_info_statistics(samples, fields, group_by, percentiles, bins))
+
+    @extend_schema(
+        summary="Retrieve the ancestors or descendants of a sample with their experiments",
+        parameters=[
+            OpenApiParameter(name='direction', description="'down' for derived samples (default), 'up' for parents",
+                             required=False, type=str, enum=['up', 'down']),
+            OpenApiParameter(name='depth', description='number of generations to walk', required=False, type=int),
+        ],
+        responses={200: SampleLineageSerializer(many=True)},
+    )
+    @action(detail=True, methods=['get'], pagination_class=None)
+    def lineage(self, request, pk=None):
+        direction = request.query_params.get('direction', 'down')
+        if direction not in ('up', 'down'):
+            raise serializers.ValidationError({'direction': "Use 'up' or 'down'."})
+        depth = parse_depth(request.query_params.get('depth'))
+
+        depths = get_lineage(pk, direction, depth)
+        if not depths:
+            raise Http404("Sample does not exist")
+
+        # one query for the samples and one for all their experiments
+        samples = sorted(Sample.objects.filter(pk__in=depths).prefetch_related('experiments'),
+                         key=lambda sample: (depths[sample.sample_id], sample.sample_id))
+        serializer = SampleLineageSerializer(samples, many=True, context={**self.get_serializer_context(),
+                                                                          'depths': depths})
+        return Response(serializer.data)
+
 
 @extend_schema_view(
     list=extend_schema(summary="List all experiments"),
@@ -73,9 +408,10 @@ class SampleViewSet(ReadWriteViewSet):
     partial_update=extend_schema(summary="Partially update an experiment (only provided fields)"),
     destroy=extend_schema(summary="Delete an experiment")
 )
-class ExperimentViewSet(ReadWriteViewSet):
+class ExperimentViewSet(ArchiveMixin, ExportMixin, ReadWriteViewSet):
     queryset = Experiment.objects.select_related('user').all()
     serializer_class = ExperimentSerializer
+    archive_field = 'experiment_file'
     parser_classes = (MultiPartParser, FormParser)
 
     def perform_create(self, serializer):
@@ -90,6 +426,7 @@ class ExperimentViewSet(ReadWriteViewSet):
 class FundingBodyViewSet(ReadOnlyViewSet):
     queryset = FundingBody.objects.all()
     serializer_class = FundingBodySerializer
+    pagination_class = IdCursorPagination
 
 
 @extend_schema_view(
@@ -126,6 +463,99 @@ class ProjectViewSet(ReadOnlyViewSet):
 class SampleTypeViewSet(ReadOnlyViewSet):
     queryset = SampleType.objects.all()
     serializer_class = SampleTypeSerializer
+    pagination_class = IdCursorPagination
+
+
+@extend_schema_view(
+    create=extend_schema(summary="Start a chunked upload of an experiment or supplementary file"),
+    retrieve=extend_schema(summary="Retrieve an upload, e.g. the offset to resume from"),
+    destroy=extend_schema(summary="Cancel an upload"),
+)
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Resumable uploads of large zip files in chunks: start an upload for an experiment or a
+    sample, PUT the chunks in order to chunk/ with their position in the Upload-Offset
+    header, and finalize/ with the SHA-256 of the file. After an interruption, the upload
+    resumes from the offset of the upload.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [LogUnauthorizedAccess, permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        start_upload(serializer.save(user=self.request.user))
+
+    def perform_destroy(self, instance):
+        discard_upload(instance)
+
+    def offset_conflict(self, error):
+        return Response({'detail': str(error), 'offset': error.offset}, status=status.HTTP_409_CONFLICT,
+                        headers={'Upload-Offset': str(error.offset)})
+
+    @extend_schema(
+        summary="Append a chunk to an upload",
+        description="The request body is the raw chunk. A chunk that does not start at the offset of the "
+                    "upload is rejected with 409 and the offset to continue from.",
+        parameters=[
+            OpenApiParameter(name='Upload-Offset', location=OpenApiParameter.HEADER, required=True, type=int,
+                             description='position of the chunk in the file'),
+        ],
+        request={'application/offset+octet-stream': OpenApiTypes.BINARY},
+        responses={
+            200: inline_serializer(name='UploadChunkResponse', fields={'offset': serializers.IntegerField()}),
+            409: OpenApiResponse(description="The chunk does not continue the upload", response=OpenApiTypes.OBJECT),
+        },
+    )
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        offset = request.headers.get('Upload-Offset', '')
+        if not offset.isdigit():
+            raise serializers.ValidationError({'Upload-Offset': "Use a non-negative integer."})
+        length = request.headers.get('Content-Length', '')
+        if not length.isdigit():
+            return Response({'detail': "The chunk size (Content-Length) is required."},
+                            status=status.HTTP_411_LENGTH_REQUIRED)
+        if int(length) > settings.UPLOAD_CHUNK_MAX_SIZE:
+            return Response({'detail': f"Chunks may have at most {settings.UPLOAD_CHUNK_MAX_SIZE} bytes."},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        # no transaction: the upload is claimed while the body is received (see append_chunk)
+        session = get_object_or_404(self.get_queryset(), pk=pk)
+        try:
+            offset = append_chunk(session, int(offset), request.stream, int(length))
+        except UploadOffsetError as e:
+            return self.offset_conflict(e)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'detail': e.messages})
+        return Response({'offset': offset}, headers={'Upload-Offset': str(offset)})
+
+    @extend_schema(
+        summary="Finalize an upload and bind the file to its experiment or sample",
+        request=inline_serializer(name='UploadFinalizeRequest',
+                                  fields={'sha256': serializers.RegexField(r'^[0-9a-fA-F]{64}$')}),
+        responses={
+            200: inline_serializer(name='UploadFinalizeResponse', fields={'file': serializers.CharField()}),
+            409: OpenApiResponse(description="The upload is not complete", response=OpenApiTypes.OBJECT),
+        },
+    )
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        sha256 = str(request.data.get('sha256', ''))
+        if len(sha256) != 64:
+            raise serializers.ValidationError({'sha256': "Use the hex SHA-256 of the whole file."})
+
+        session = get_object_or_404(self.get_queryset(), pk=pk)
+        try:
+            name = finalize_upload(session, sha256)
+        except UploadOffsetError as e:
+            return self.offset_conflict(e)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'detail': e.messages})
+        return Response({'file': name})
 
 
 # staff personal data may not be read via API
@@ -161,27 +591,39 @@ class SampleTypeInfoView(views.APIView):
         description="Returns dynamic schema information based on the sample type name."
     )
     def get(self, request, *args, **kwargs):
-        sample_type_name = request.query_params.get('sample_type_name')
-        serializer_class = {
-            'Battery': SampleTypeBatterySerializer,
-            'Solids': SampleTypeSolidsSerializer,
-            'Liquid': SampleTypeLiquidSerializer,
-            'Suspension': SampleTypeSuspensionSerializer,
-        }.get(sample_type_name.capitalize())
-
-        if serializer_class:
-            # Create an instance of the serializer
-            serializer = serializer_class()
-            # Manually building response dictionary for fields description
-            fields_info = {
-                field_name: {
-                    'type': field.__class__.__name__,
-                    'help_text': field.help_text if field.help_text else '',
-                    'required': field.required,
-                    'allow_null': field.allow_null,
-                }
-                for field_name, field in serializer.get_fields().items()
-            }
-            return Response(fields_info)
-        
-        return Response({'error': 'Sample type not found'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        schema = get_sample_type_schema(request.query_params.get('sample_type_name'))
+
+        if schema:
+            # the field metadata only changes with a deployment, so clients may keep it
+            # and revalidate with If-None-Match
+            not_modified = get_conditional_response(request, etag=schema.etag)
+            if not_modified is not None:
+                response = not_modified
+            else:
+                response = Response(schema.field_info)
+            response['ETag'] = schema.etag
+            patch_cache_control(response, private=True, max_age=settings.SAMPLE_TYPE_INFO_MAX_AGE)
+            return response
+
+        return Response({'error': 'Sample type not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+class RequestMetricsView(views.APIView):
+    """
+    Request metrics per view (see main/middleware.py) of all worker processes. Workers save
+    their measurements every REQUEST_METRICS_FLUSH_INTERVAL seconds, so the latest requests of
+    other workers may be missing.
+    """
+    permission_classes = [LogUnauthorizedAccess, permissions.IsAdminUser]
+
+    @extend_schema(
+        summary="Request metrics per view of all worker processes",
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request, *args, **kwargs):
+        return Response({'views': metrics_registry.snapshot()})
+
+    @extend_schema(summary="Reset the request metrics", responses={204: None})
+    def delete(self, request, *args, **kwargs):
+        metrics_registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,89 @@
+from django.db import connection
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+from .utils.sample_type_utils import sample_type_schemas
+
+
+def get_sample_info_fields():
+    """
+    Collects the typed fields of all sample type serializers (first definition wins).
+    """
+    fields = {}
+    for schema in sample_type_schemas.values():
+        for field_name, field in schema.fields.items():
+            fields.setdefault(field_name, field)
+    return fields
+
+
+class SampleInfoFilterBackend(BaseFilterBackend):
+    """
+    Filters samples by the content of their sample info (Sample.sample_info_data), e.g.
+    ?sample_type=Solids&info__density_in_gccm__gt=2 or ?info__manufacturer=ACME. The
+    parameters are prefixed with info__, so sample info fields do not shadow fields of the
+    sample itself (?info__name= is the name in the sample info, not Sample.name).
+
+    Exact matches are translated to JSON containment, which is served by the GIN index
+    on Postgres; range lookups compare the JSON values of a single key.
+    """
+    param_prefix = 'info__'
+    numeric_lookups = ('exact', 'gt', 'gte', 'lt', 'lte')
+    text_lookups = ('exact', 'icontains')
+
+    def get_lookups(self, field):
+        if isinstance(field, (serializers.FloatField, serializers.IntegerField, serializers.DateField)):
+            return self.numeric_lookups
+        return self.text_lookups
+
+    def get_filters(self):
+        # maps query parameter to (sample info field name, lookup, serializer field)
+        filters = {}
+        for field_name, field in get_sample_info_fields().items():
+            for lookup in self.get_lookups(field):
+                param = self.param_prefix + (field_name if lookup == 'exact' else f"{field_name}__{lookup}")
+                filters[param] = (field_name, lookup, field)
+        return filters
+
+    def filter_queryset(self, request, queryset, view):
+        sample_type = request.query_params.get('sample_type')
+        if sample_type:
+            if sample_type.isdigit():
+                queryset = queryset.filter(sample_type_id=sample_type)
+            else:
+                queryset = queryset.filter(sample_type__name__iexact=sample_type)
+
+        contains = {}
+        for param, (field_name, lookup, field) in self.get_filters().items():
+            if param not in request.query_params:
+                continue
+            try:
+                # parse the value like the sample info itself and compare with its stored JSON form
+                value = field.to_representation(field.to_internal_value(request.query_params[param]))
+            except serializers.ValidationError as e:
+                raise serializers.ValidationError({param: e.detail})
+
+            if lookup == 'exact' and connection.features.supports_json_field_contains:
+                contains[field_name] = value
+            else:
+                queryset = queryset.filter(**{f"sample_info_data__{field_name}__{lookup}": value})
+
+        if contains:
+            queryset = queryset.filter(sample_info_data__contains=contains)
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [{
+            'name': 'sample_type',
+            'required': False,
+            'in': 'query',
+            'description': "sample type ID or name",
+            'schema': {'type': 'string'},
+        }]
+        for param, (field_name, lookup, field) in self.get_filters().items():
+            parameters.append({
+                'name': param,
+                'required': False,
+                'in': 'query',
+                'description': f"sample info field {field_name} ({lookup})",
+                'schema': {'type': 'number' if isinstance(field, serializers.FloatField) else 'string'},
+            })
+        return parameters
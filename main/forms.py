@@ -1,23 +1,77 @@
 import json
 import os
-import zipfile
+from datetime import datetime, time, timedelta
 from django import forms
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import Group
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import get_user_model
-from django.forms.widgets import TextInput, NumberInput, DateInput
-from rest_framework import serializers
-from .models import Experiment, FundingBody, Method, Institute, Project, Sample, Staff
-from .serializers.sample_type_serializers import (SampleTypeBatterySerializer, 
-                SampleTypeLiquidSerializer, SampleTypeSolidsSerializer, SampleTypeSuspensionSerializer,
-                )
+from django.utils import timezone
+from django.forms.models import ModelChoiceIterator
+from django.forms.widgets import DateInput
+from .models import Experiment, FundingBody, Method, Institute, Project, Sample, SampleType, Staff
 from .utils.email_utils import send_initial_reset_email
-from .utils.validation_utils import validate_sample_id, validate_json_structure
+from .utils.inspection_utils import validate_zip_upload
+from .utils.reference_utils import reference_data
+from .utils.validation_utils import validate_sample_id, clean_sample_info_data
 
 
+class ReferenceChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.get_objects():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.get_objects()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.get_objects())
+
+
+class ReferenceChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField for the lookup tables in main.utils.reference_utils: the choices are
+    rendered and the submitted value is resolved from the reference-data cache instead of
+    the database. Views narrow the choices with restrict() instead of a queryset.
+
+    Args:
+    - model: Model class with a ReferenceData cache (FundingBody, Institute, Method, SampleType).
+    """
+    iterator = ReferenceChoiceIterator
+
+    def __init__(self, model, **kwargs):
+        self.reference = reference_data[model]
+        self.predicate = None
+        super().__init__(model.objects.all(), **kwargs)
+
+    def restrict(self, predicate):
+        # predicate: callable that receives an instance and returns whether it is a valid choice
+        self.predicate = predicate
+
+    def get_objects(self):
+        objects = self.reference.all()
+        if self.predicate is not None:
+            objects = [obj for obj in objects if self.predicate(obj)]
+        return objects
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            obj = self.reference.get_object(value)
+        except self.queryset.model.DoesNotExist:
+            obj = None
+        if obj is None or (self.predicate is not None and not self.predicate(obj)):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice',
+                                  params={'value': value})
+        return obj
+
 
 class ExperimentForm(forms.ModelForm):
+    method = ReferenceChoiceField(Method)
+
     class Meta:
         model = Experiment
         fields = ["name", "method", "date_created", "sample",
@@ -31,6 +85,7 @@ class ExperimentForm(forms.ModelForm):
             file_extension = os.path.splitext(file.name)[1].lower()
             if file_extension != '.zip':
                 raise ValidationError("Only zip files are allowed.")
+            validate_zip_upload(file)
         return file
 
 
@@ -41,6 +96,8 @@ class FundingBodyForm(forms.ModelForm):
 
 
 class MethodForm(forms.ModelForm):
+    institute = ReferenceChoiceField(Institute)
+
     class Meta:
         model = Method
         fields = ["institute", "name", "method_file"]
@@ -49,12 +106,51 @@ class MethodForm(forms.ModelForm):
         file = self.cleaned_data.get('method_file')
         if file:
             file_extension = os.path.splitext(file.name)[1].lower()
-            if file_extension != '.zip' or not zipfile.is_zipfile(file):
+            if file_extension != '.zip':
                 raise ValidationError("Only zip files are allowed.")
+            validate_zip_upload(file)
         return file
 
 
+class ListFilterForm(forms.Form):
+    """
+    GET filters of the HTML list views. A view only keeps the fields it filters by (see
+    FilteredListMixin in views.py). The dates are cleaned to the bounds of a date_registered
+    range, so the filters can use the indexes on date_registered.
+    """
+    q = forms.CharField(required=False, max_length=100, label="Search",
+                        widget=forms.TextInput(attrs={'class': 'form-group__input', 'type': 'search'}))
+    institute_id = ReferenceChoiceField(Institute, required=False, label="Institute",
+                                        widget=forms.Select(attrs={'class': 'form-group__input'}))
+    project = forms.ModelChoiceField(Project.objects.all(), required=False,
+                                     widget=forms.Select(attrs={'class': 'form-group__input'}))
+    sample_type = ReferenceChoiceField(SampleType, required=False,
+                                       widget=forms.Select(attrs={'class': 'form-group__input'}))
+    date_from = forms.DateField(required=False, label="Registered from",
+                                widget=DateInput(attrs={'class': 'form-group__input', 'type': 'date'}))
+    date_to = forms.DateField(required=False, label="Registered until",
+                              widget=DateInput(attrs={'class': 'form-group__input', 'type': 'date'}))
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in list(self.fields):
+                if field_name not in fields:
+                    del self.fields[field_name]
+
+    def clean_date_from(self):
+        date = self.cleaned_data.get('date_from')
+        return timezone.make_aware(datetime.combine(date, time.min)) if date else None
+
+    def clean_date_to(self):
+        # the end of the range is exclusive: the start of the following day
+        date = self.cleaned_data.get('date_to')
+        return timezone.make_aware(datetime.combine(date + timedelta(days=1), time.min)) if date else None
+
+
 class ProjectForm(forms.ModelForm):
+    funding_body = ReferenceChoiceField(FundingBody)
+
     class Meta:
         model = Project
         fields = ["name", "abbreviation", "funding_number", "funding_body",
@@ -64,12 +160,17 @@ class ProjectForm(forms.ModelForm):
         file = self.cleaned_data.get('project_file')
         if file:
             file_extension = os.path.splitext(file.name)[1].lower()
-            if file_extension != '.zip' or not zipfile.is_zipfile(file):
+            if file_extension != '.zip':
                 raise ValidationError("Only zip files are allowed.")
+            validate_zip_upload(file)
         return file
 
 
 class SampleForm(forms.ModelForm):
+    institute = ReferenceChoiceField(Institute)
+    method = ReferenceChoiceField(Method, required=False)
+    sample_type = ReferenceChoiceField(SampleType)
+
     class Meta:
         model = Sample
         fields = ["sample_id", "name", "parent", "method", "date_created",
@@ -89,8 +190,9 @@ class SampleForm(forms.ModelForm):
         file = self.cleaned_data.get('supplementary_file')
         if file:
             file_extension = os.path.splitext(file.name)[1].lower()
-            if file_extension != '.zip' or not zipfile.is_zipfile(file):
+            if file_extension != '.zip':
                 raise ValidationError("Only zip files are allowed.")
+            validate_zip_upload(file)
         return file
 
     def clean_sample_info(self):
@@ -109,53 +211,30 @@ class SampleForm(forms.ModelForm):
         except Exception as e:
             raise forms.ValidationError(f"An error occurred while processing the file: {e}")
 
-        if not validate_json_structure(sample_info_json, sample_type_name):
+        try:
+            # stored alongside the file to make the sample info queryable
+            self.instance.sample_info_data = clean_sample_info_data(sample_info_json, sample_type_name)
+        except ValidationError:
             raise forms.ValidationError("Invalid JSON structure for the selected sample type.")
 
         return sample_info
 
 
-def serializer_field_to_form_field(serializer_field):
-    """
-    Return the Django form field that corresponds to the provided serializer field.
-    """
-    if isinstance(serializer_field, serializers.CharField):
-        return forms.CharField(max_length=serializer_field.max_length,
-                               required=serializer_field.required)
-    elif isinstance(serializer_field, serializers.FloatField):
-        return forms.FloatField(min_value=serializer_field.min_value,
-                                  max_value=serializer_field.max_value,
-                                  required=serializer_field.required)
-    elif isinstance(serializer_field, serializers.DateField):
-        return forms.DateField(required=serializer_field.required)
-    else: # fall back to CharField
-        return forms.CharField(required=serializer_field.required)
-    
-
 # this class is dynamically changing depending on the chosen sample type
 class SampleInfoForm(forms.Form):
     def __init__(self, *args, **kwargs):
-        # Retrieve the serializer class passed to the form
-        serializer_class = kwargs.pop('serializer_class', None)
+        # the SampleTypeSchema of the chosen sample type (see utils/sample_type_utils.py),
+        # whose form field specs are computed once at startup
+        sample_type = kwargs.pop('sample_type', None)
         super(SampleInfoForm, self).__init__(*args, **kwargs)
 
-        # If a serializer class was provided, create form fields based on the serializer fields
-        if serializer_class:
-            serializer = serializer_class()
-            for field_name, serializer_field in serializer.get_fields().items():
-                form_field = serializer_field_to_form_field(serializer_field)
-                # Let's specify the widget directly in the form field definition
-                if isinstance(serializer_field, serializers.CharField):
-                    form_field.widget = TextInput(attrs={'class': 'form-group__input'})
-                elif isinstance(serializer_field, serializers.IntegerField):
-                    form_field.widget = NumberInput(attrs={'class': 'form-group__input'})
-                elif isinstance(serializer_field, serializers.DateField):
-                    form_field.widget = DateInput(attrs={'class': 'form-group__input', 'type': 'date'})
-                # Add similar cases for other field types as needed.
-                self.fields[field_name] = form_field
+        if sample_type:
+            self.fields.update(sample_type.get_form_fields())
 
 
 class StaffForm(forms.ModelForm):
+    institute = ReferenceChoiceField(Institute)
+
     class Meta:
         model = Staff
         fields = [
@@ -0,0 +1,11 @@
+import time
+from django.core.management.base import BaseCommand
+from main.models import ThrottleCounter
+
+
+class Command(BaseCommand):
+    help = "Removes the request counters of API throttles whose window has ended"
+
+    def handle(self, *args, **options):
+        removed, _ = ThrottleCounter.objects.filter(window_end__lte=time.time()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} throttle counters"))
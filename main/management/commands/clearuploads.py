@@ -0,0 +1,18 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from main.models import UploadSession
+from main.utils.upload_utils import discard_upload
+
+
+class Command(BaseCommand):
+    help = "Removes chunked uploads that have not been continued for UPLOAD_SESSION_MAX_AGE seconds"
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_MAX_AGE)
+        removed = 0
+        for session in UploadSession.objects.filter(date_updated__lt=cutoff).iterator():
+            discard_upload(session)
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} unfinished uploads"))
@@ -7,11 +7,13 @@ env_vars = {
     "DB_USER": "postgres",
     "DB_PASSWORD": "password",
     "DB_PORT": "1234",
+    "DB_CONN_MAX_AGE": "60",
     "EMAIL_HOST": "smtp.xxxxxx.com",
     "EMAIL_HOST_USER": "xxxxxx@xxxxxx.com",
     "EMAIL_HOST_PASSWORD": "password",
     "EMAIL_PORT": "123",
     "MEDIA_FOLDER": "/media",
+    "FILE_DOWNLOAD_BACKEND": "python, nginx, or apache",
     "SECRET": "use django.core.management.utils.get_random_secret_key()",
 }
 
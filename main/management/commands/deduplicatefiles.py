@@ -0,0 +1,34 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from main.models import Experiment, Method, Project, Sample, StoredFile
+
+# file fields whose uploads are registered and deduplicated
+file_fields = [
+    (Method, 'method_file'),
+    (Project, 'project_file'),
+    (Sample, 'sample_info'),
+    (Sample, 'supplementary_file'),
+    (Experiment, 'experiment_file'),
+]
+
+
+class Command(BaseCommand):
+    help = "Hashes uploaded files that are not registered or changed since and replaces duplicates with links to the content-addressed blob store"
+
+    def handle(self, *args, **options):
+        registered = 0
+        for model, field_name in file_fields:
+            names = (model.objects.exclude(**{field_name: ''}).exclude(**{f"{field_name}__isnull": True})
+                     .values_list(field_name, flat=True).iterator())
+            for name in names:
+                if not default_storage.exists(name):
+                    self.stdout.write(self.style.WARNING(f"File not found: {name}"))
+                    continue
+                if StoredFile.objects.get_current(name) is not None:
+                    continue
+                StoredFile.objects.register(name)
+                registered += 1
+
+        distinct = StoredFile.objects.values('sha256').distinct().count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Registered {registered} files with {distinct} distinct contents"))
@@ -0,0 +1,25 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from main.models import ArchiveMember, StoredFile
+
+
+class Command(BaseCommand):
+    help = "Indexes the members of registered zip files that have no manifest yet, e.g. files registered before"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="re-index all zip files, not only unindexed ones")
+
+    def handle(self, *args, **options):
+        stored_files = StoredFile.objects.filter(name__iendswith='.zip')
+        if not options['all']:
+            stored_files = stored_files.filter(members__isnull=True)
+
+        indexed = members = 0
+        for stored_file in stored_files.iterator():
+            if not default_storage.exists(stored_file.name):
+                self.stdout.write(self.style.WARNING(f"File not found: {stored_file.name}"))
+                continue
+            members += len(ArchiveMember.objects.index(stored_file))
+            indexed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {members} members of {indexed} archives"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from main.utils.metrics_utils import metrics_registry
+
+
+class Command(BaseCommand):
+    help = "Shows the request metrics per view of all worker processes, slowest views first"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sort", choices=["mean_ms", "max_ms", "count", "mean_queries"], default="mean_ms",
+                            help="column the views are sorted by, descending (default: mean_ms)")
+        parser.add_argument("--reset", action="store_true", help="delete the metrics after showing them")
+
+    def handle(self, *args, **options):
+        views = metrics_registry.snapshot()
+        self.stdout.write(f"{'view':<40} {'count':>8} {'mean ms':>9} {'max ms':>9} {'queries':>8} {'sql ms':>8}")
+        for view_name, metrics in sorted(views.items(), key=lambda item: item[1][options["sort"]], reverse=True):
+            self.stdout.write(
+                f"{view_name:<40} {metrics['count']:>8} {metrics['mean_ms']:>9} {metrics['max_ms']:>9} "
+                f"{metrics['mean_queries']:>8} {metrics['mean_sql_ms']:>8}"
+            )
+        if options["reset"]:
+            metrics_registry.reset()
+            self.stdout.write(self.style.SUCCESS(f"Reset the metrics of {len(views)} views"))
@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from main.utils.email_utils import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Sends the queued emails of the outbox, in batches and with retries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="send all due emails and exit (e.g. from cron) instead of polling")
+        parser.add_argument("--interval", type=float, default=10,
+                            help="seconds to wait when the outbox has no due emails (default: 10)")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="emails per batch (default: EMAIL_BATCH_SIZE)")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                sent, failed = send_queued_emails(options["batch_size"])
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent} emails, {failed} failed")
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Outbox worker stopped"))
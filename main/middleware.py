@@ -0,0 +1,86 @@
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from .utils.metrics_utils import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """
+    Database execute wrapper that counts the queries of a request and sums up their duration.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.duration += time.perf_counter() - start
+
+
+def get_view_name(request):
+    """
+    Returns the name requests are grouped by: "ViewSet.action" for API viewsets (e.g.
+    SampleViewSet.list), otherwise the URL name (e.g. sample_list) or the view's path.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    actions = getattr(match.func, 'actions', None)
+    if actions:
+        return f"{match.func.cls.__name__}.{actions.get(request.method.lower(), request.method.lower())}"
+    return match.url_name or match._func_path
+
+
+def get_response_size(response):
+    if response.streaming:
+        # only known if the response sets it, e.g. FileResponse
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures wall time, number and duration of SQL queries and response size of every
+    request, aggregates them per view (see utils/metrics_utils.py, served by the staff-only
+    metrics API) and logs requests above SLOW_REQUEST_MS or SLOW_REQUEST_QUERIES.
+
+    The overhead is a timer per request and a function call per query. Streaming responses
+    are measured until their first byte.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_METRICS_ENABLED:
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        duration = (time.perf_counter() - start) * 1000
+        sql_duration = counter.duration * 1000
+
+        view_name = get_view_name(request)
+        response_bytes = get_response_size(response)
+        metrics_registry.record(view_name, duration, counter.queries, sql_duration, response_bytes)
+
+        if duration > settings.SLOW_REQUEST_MS or counter.queries > settings.SLOW_REQUEST_QUERIES:
+            logger.warning(
+                f"Slow request {request.method} {request.path} ({view_name}): {duration:.0f} ms, "
+                f"{counter.queries} queries in {sql_duration:.0f} ms, {response_bytes} bytes, "
+                f"status {response.status_code}."
+            )
+        return response
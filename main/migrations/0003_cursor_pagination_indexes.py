@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_populate_sampletypes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='experiment',
+            index=models.Index(fields=['-date_registered', 'id'], name='experiment_date_registered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sample',
+            index=models.Index(fields=['-date_registered', 'sample_id'], name='sample_date_registered_idx'),
+        ),
+    ]
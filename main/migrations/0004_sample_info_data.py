@@ -0,0 +1,119 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:20
+
+import django.contrib.postgres.indexes
+import django.core.serializers.json
+import json
+import logging
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from rest_framework import serializers
+from main.utils.migration_utils import RunSQLOnPostgres
+
+logger = logging.getLogger(__name__)
+
+
+# frozen copy of the sample type serializers (main/serializers/sample_type_serializers.py) as
+# they were when this migration was written, so later changes to them do not alter the backfill
+class SolidsInfo(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    weight_in_g = serializers.FloatField(min_value=0.0)
+    volume_in_ccm = serializers.FloatField(min_value=0.0, allow_null=True, required=False)
+    density_in_gccm = serializers.FloatField(min_value=0.0, allow_null=True, required=False)
+    comment = serializers.CharField(max_length=255, allow_null=True, required=False)
+
+
+class LiquidInfo(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    volume_in_ccm = serializers.FloatField(min_value=0.0)
+    weight_in_g = serializers.FloatField(min_value=0.0, allow_null=True, required=False)
+    density_in_gccm = serializers.FloatField(min_value=0.0, allow_null=True, required=False)
+    comment = serializers.CharField(max_length=255, allow_null=True, required=False)
+
+
+class SuspensionInfo(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    liquid = serializers.CharField(max_length=255)
+    solid = serializers.CharField(max_length=255)
+    volume_in_ccm = serializers.FloatField(min_value=0.0)
+    weight_in_g = serializers.FloatField(min_value=0.0, allow_null=True, required=False)
+    density_in_gccm = serializers.FloatField(min_value=0.0, allow_null=True, required=False)
+
+
+class BatteryInfo(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    composition = serializers.CharField(max_length=255, allow_blank=True, required=False)
+    manufacturer = serializers.CharField(max_length=255)
+    produced = serializers.DateField(allow_null=True, required=False)
+    comment = serializers.CharField(max_length=255, allow_null=True, required=False)
+
+
+SAMPLE_INFO_SERIALIZERS = {
+    'battery': BatteryInfo,
+    'solids': SolidsInfo,
+    'liquid': LiquidInfo,
+    'suspension': SuspensionInfo,
+}
+
+
+def clean_sample_info_data(json_data, sample_type):
+    serializer_class = SAMPLE_INFO_SERIALIZERS.get(sample_type.lower())
+    if serializer_class is None:
+        raise ValidationError("Invalid sample type name.")
+    serializer = serializer_class(data=json_data)
+    if not serializer.is_valid():
+        raise ValidationError(serializer.errors)
+    return serializer.validated_data
+
+
+def backfill_sample_info_data(apps, schema_editor):
+    Sample = apps.get_model('main', 'Sample')
+    batch = []
+    skipped = 0
+    for sample in Sample.objects.select_related('sample_type').exclude(sample_info='').iterator(chunk_size=500):
+        try:
+            with default_storage.open(sample.sample_info.name) as file:
+                sample.sample_info_data = clean_sample_info_data(json.load(file), sample.sample_type.name)
+        except (OSError, ValueError, ValidationError):
+            # missing files and files that do not match their sample type stay unindexed
+            skipped += 1
+            continue
+        batch.append(sample)
+        if len(batch) >= 500:
+            Sample.objects.bulk_update(batch, ['sample_info_data'])
+            batch = []
+    if batch:
+        Sample.objects.bulk_update(batch, ['sample_info_data'])
+    if skipped:
+        logger.warning(f"sample_info_data could not be filled in for {skipped} samples.")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sample',
+            name='sample_info_data',
+            field=models.JSONField(blank=True, editable=False, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='sample information'),
+        ),
+        # GIN indexes only exist on Postgres, other backends (SQLite for tests) only track the state
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='sample',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['sample_info_data'], name='sample_info_data_gin_idx', opclasses=['jsonb_path_ops']),
+                ),
+            ],
+            database_operations=[
+                RunSQLOnPostgres(
+                    sql='CREATE INDEX "sample_info_data_gin_idx" ON "main_sample" USING gin ("sample_info_data" jsonb_path_ops);',
+                    reverse_sql='DROP INDEX IF EXISTS "sample_info_data_gin_idx";',
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_sample_info_data, migrations.RunPython.noop),
+    ]
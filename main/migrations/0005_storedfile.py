@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_sample_info_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='file name in the media storage, e.g. experiment_files/1.zip', max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.BigIntegerField(help_text='file size in bytes')),
+                ('date_registered', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
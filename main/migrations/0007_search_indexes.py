@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations
+from main.utils.migration_utils import RunSQLOnPostgres
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_outgoingemail'),
+    ]
+
+    operations = [
+        # creating the extension is skipped on other backends
+        django.contrib.postgres.operations.TrigramExtension(),
+        # GIN indexes only exist on Postgres, other backends (SQLite for tests) only track the state
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='experiment',
+                    index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', config='simple'), name='experiment_name_search_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='sample',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['sample_id'], name='sample_id_trgm_idx', opclasses=['gin_trgm_ops']),
+                ),
+                migrations.AddIndex(
+                    model_name='sample',
+                    index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', config='simple'), name='sample_name_search_idx'),
+                ),
+            ],
+            database_operations=[
+                RunSQLOnPostgres(
+                    sql='CREATE INDEX "experiment_name_search_idx" ON "main_experiment" USING gin ((to_tsvector(\'simple\'::regconfig, COALESCE("name", \'\'))));',
+                    reverse_sql='DROP INDEX IF EXISTS "experiment_name_search_idx";',
+                ),
+                RunSQLOnPostgres(
+                    sql='CREATE INDEX "sample_id_trgm_idx" ON "main_sample" USING gin ("sample_id" gin_trgm_ops);',
+                    reverse_sql='DROP INDEX IF EXISTS "sample_id_trgm_idx";',
+                ),
+                RunSQLOnPostgres(
+                    sql='CREATE INDEX "sample_name_search_idx" ON "main_sample" USING gin ((to_tsvector(\'simple\'::regconfig, COALESCE("name", \'\'))));',
+                    reverse_sql='DROP INDEX IF EXISTS "sample_name_search_idx";',
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='path of the member inside the archive', max_length=1024)),
+                ('size', models.BigIntegerField(help_text='uncompressed size in bytes')),
+                ('compressed_size', models.BigIntegerField(help_text='compressed size in bytes')),
+                ('crc', models.BigIntegerField(help_text='CRC-32 of the uncompressed member', verbose_name='CRC-32')),
+                ('stored_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='main.storedfile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['stored_file', 'name'], name='archivemember_name_idx')],
+            },
+        ),
+    ]
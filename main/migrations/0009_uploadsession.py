@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_archivemember'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(help_text='name of the file on the client, e.g. data.zip', max_length=255)),
+                ('size', models.BigIntegerField(help_text='total file size in bytes')),
+                ('offset', models.BigIntegerField(default=0, help_text='number of bytes received')),
+                ('date_registered', models.DateTimeField(auto_now_add=True)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('experiment', models.ForeignKey(blank=True, help_text='experiment whose experiment file is uploaded', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='main.experiment')),
+                ('sample', models.ForeignKey(blank=True, help_text='sample whose supplementary file is uploaded', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='main.sample')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='uploadsession',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('experiment__isnull', False), ('sample__isnull', True)), models.Q(('experiment__isnull', True), ('sample__isnull', False)), _connector='OR'), name='uploadsession_single_target'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_cacheversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='method',
+            name='method_file',
+            field=models.FileField(blank=True, null=True, upload_to='method_files', verbose_name='path to method files'),
+        ),
+    ]
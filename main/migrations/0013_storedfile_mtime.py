@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_alter_method_method_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedfile',
+            name='mtime',
+            field=models.FloatField(blank=True, help_text='modification time of the file when it was hashed (UNIX time)', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_storedfile_mtime'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='date_claimed',
+            field=models.DateTimeField(blank=True, help_text='start of the request that is writing to the upload', null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_uploadsession_date_claimed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='site_url',
+            field=models.CharField(blank=True, help_text='root URL of the rendered link', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='template',
+            field=models.CharField(blank=True, choices=[('password_reset', 'password reset link')], help_text='link rendered into the body when the email is sent', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='user',
+            field=models.ForeignKey(blank=True, help_text='user the link is rendered for', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_emails', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_outgoingemail_template'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(max_length=255, unique=True)),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('duration', models.FloatField(default=0)),
+                ('max_duration', models.FloatField(default=0)),
+                ('queries', models.PositiveBigIntegerField(default=0)),
+                ('max_queries', models.PositiveIntegerField(default=0)),
+                ('sql_duration', models.FloatField(default=0)),
+                ('response_bytes', models.PositiveBigIntegerField(default=0)),
+                ('histogram', models.JSONField(default=list, help_text='requests per duration bucket')),
+            ],
+        ),
+    ]
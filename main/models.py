@@ -1,11 +1,122 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinLengthValidator
-from django.db import models
-from django.db.models.signals import post_delete
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
+from .utils.cache_utils import invalidate_cached
+import hashlib
+import logging
 import os
+import uuid
+import zipfile
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+
+def has_upload(field_file):
+    # a file that was assigned to the field but not yet written to the storage
+    return bool(field_file) and not field_file._committed
+
+
+def get_inspection(upload):
+    # the inspection of an upload by the upload handlers or the validation (see
+    # utils/inspection_utils.py), which spares register reading the written file again
+    return getattr(upload, 'inspection', None)
+
+
+def stage_upload(field_file, name, content=None):
+    """
+    Writes a new upload (or the given content) once to the storage, under a temporary name next
+    to its final name, which the field takes. The file replaces the one stored under the final
+    name only when the row is saved (see save_staged), so a failed save keeps the previous file.
+    The field file is marked as committed, so FileField.pre_save does not write it a second time.
+
+    Returns:
+    - tuple (field file, temporary name, inspection of the upload) for save_staged
+    """
+    storage = field_file.storage
+    content = field_file.file if content is None else content
+    temporary = storage.save(f"{name}.{uuid.uuid4().hex}.part", content)
+    field_file.name = name
+    field_file._committed = True
+    return field_file, temporary, get_inspection(content)
+
+
+def save_staged(save, staged):
+    """
+    Saves a row and then moves its staged uploads to their final names (see promote_staged),
+    replacing the files stored there before. If the save fails, the staged uploads are
+    deleted and the previous files stay untouched.
+
+    Args:
+    - save: callable that saves the row.
+    - staged: list of the results of stage_upload.
+    """
+    try:
+        save()
+    except Exception:
+        for field_file, temporary, _ in staged:
+            field_file.storage.delete(temporary)
+        raise
+    for field_file, temporary, inspection in staged:
+        promote_staged(field_file, temporary)
+        StoredFile.objects.register(field_file.name, inspection)
+
+
+def promote_staged(field_file, temporary):
+    """
+    Moves a staged upload to the name of its field. On storages with local paths this is a
+    single rename that replaces the previous file atomically; other storages (e.g. object
+    storages) replace it through the storage API. If the storage picks another name because
+    the final name was taken meanwhile, the field and the row get that name.
+    """
+    storage = field_file.storage
+    try:
+        temporary_path, path = storage.path(temporary), storage.path(field_file.name)
+    except NotImplementedError:
+        if storage.exists(field_file.name):
+            storage.delete(field_file.name)
+        with storage.open(temporary, 'rb') as content:
+            name = storage.save(field_file.name, content)
+        storage.delete(temporary)
+        if name != field_file.name:
+            field_file.name = name
+            instance = field_file.instance
+            type(instance)._default_manager.filter(pk=instance.pk).update(**{field_file.field.attname: name})
+        return
+    os.replace(temporary_path, path)
+
+
+def detach_upload(field_file):
+    """
+    Removes a new upload from its field, e.g. because its final name depends on the primary key,
+    which is only known after the INSERT. Returns the detached file or None.
+    """
+    if not has_upload(field_file):
+        return None
+    upload = field_file.file
+    field_file.name = None
+    field_file._committed = True
+    return upload
+
+
+def attach_upload(instance, field_name, upload, name):
+    """
+    Writes a detached upload to its final name and stores the name with a single UPDATE, which
+    (unlike save) does not send the save signals a second time.
+    """
+    field_file = getattr(instance, field_name)
+    staged = stage_upload(field_file, name, upload)
+    save_staged(lambda: type(instance)._default_manager.filter(pk=instance.pk).update(**{field_name: name}),
+                [staged])
 
 
 class Institute(models.Model):
@@ -25,6 +136,14 @@ class Institute(models.Model):
         return self.name
 
 
+@receiver(post_save, sender=Institute)
+@receiver(post_delete, sender=Institute)
+def invalidate_institute_bounds(sender, instance, created=True, **kwargs):
+    # the highest institute ID bounds the institute code of sample IDs (see validation_utils)
+    if created:
+        invalidate_cached('sample_id_bounds')
+
+
 class User(AbstractUser):
     institute = models.ManyToManyField(Institute)
     email = models.EmailField(unique=True)
@@ -71,19 +190,23 @@ class Method(models.Model):
         return os.path.join('method_files', new_filename)
 
     def save(self, *args, **kwargs):
-        # Save the instance to generate the primary key (if it's a new instance)
-        is_new = self._state.adding
-        super().save(*args, **kwargs)
-
-        # Save the file into the new path and name created with the primary key
-        if is_new and self.method_file:
-            old_file_path = self.method_file.path
-            new_file_name = self.get_method_file_upload_path(
-                self.method_file.name)
-            new_file_path = default_storage.path(new_file_name)
-            os.rename(old_file_path, new_file_path)
-            self.method_file.name = new_file_name
-            super().save(update_fields=['method_file'])
+        # uploads are stored under the primary key, so a new instance is inserted first and the
+        # file is written once the key is known
+        upload = detach_upload(self.method_file) if self.pk is None else None
+        staged = []
+        if has_upload(self.method_file):
+            staged.append(stage_upload(self.method_file, self.get_method_file_upload_path(self.method_file.name)))
+        save_staged(partial(super().save, *args, **kwargs), staged)
+        if upload is not None:
+            attach_upload(self, 'method_file', upload, self.get_method_file_upload_path(upload.name))
+
+
+@receiver(post_save, sender=Method)
+@receiver(post_delete, sender=Method)
+def invalidate_method_bounds(sender, instance, created=True, **kwargs):
+    # the highest method ID bounds the method code of sample IDs (see validation_utils)
+    if created:
+        invalidate_cached('sample_id_bounds')
 
 
 @receiver(post_delete, sender=Method)
@@ -93,6 +216,7 @@ def delete_method_file(sender, instance, **kwargs):
         # If the file exists in the storage, delete it
         if default_storage.exists(instance.method_file.name):
             default_storage.delete(instance.method_file.name)
+        StoredFile.objects.release(instance.method_file.name)
 
 
 class FundingBody(models.Model):
@@ -124,19 +248,15 @@ class Project(models.Model):
         return os.path.join('project_files', new_filename)
 
     def save(self, *args, **kwargs):
-        # Save the instance to generate the primary key (if it's a new instance)
-        is_new = self._state.adding
-        super().save(*args, **kwargs)
-
-        # Save the file into the new path and name created with the primary key
-        if is_new and self.project_file:
-            old_file_path = self.project_file.path
-            new_file_name = self.get_project_file_upload_path(
-                self.project_file.name)
-            new_file_path = default_storage.path(new_file_name)
-            os.rename(old_file_path, new_file_path)
-            self.project_file.name = new_file_name
-            super().save(update_fields=['project_file'])
+        # uploads are stored under the primary key, so a new instance is inserted first and the
+        # file is written once the key is known
+        upload = detach_upload(self.project_file) if self.pk is None else None
+        staged = []
+        if has_upload(self.project_file):
+            staged.append(stage_upload(self.project_file, self.get_project_file_upload_path(self.project_file.name)))
+        save_staged(partial(super().save, *args, **kwargs), staged)
+        if upload is not None:
+            attach_upload(self, 'project_file', upload, self.get_project_file_upload_path(upload.name))
 
 
 @receiver(post_delete, sender=Project)
@@ -144,6 +264,7 @@ def delete_project_file(sender, instance, **kwargs):
     if instance.project_file:
         if default_storage.exists(instance.project_file.name):
             default_storage.delete(instance.project_file.name)
+        StoredFile.objects.release(instance.project_file.name)
 
 
 class SampleType(models.Model):
@@ -179,11 +300,32 @@ class Sample(models.Model):
     supplementary_file = models.FileField(upload_to='supplementary_files', null=True, blank=True,
                                           verbose_name="supplementary file path",
                                           help_text="if applicable: datasheet, etc.")
+    # validated content of sample_info, stored alongside the file to make it queryable;
+    # it is filled in by the forms and serializers that validate the uploaded file
+    sample_info_data = models.JSONField(null=True, blank=True, editable=False, encoder=DjangoJSONEncoder,
+                                        verbose_name="sample information")
     date_registered = models.DateTimeField(auto_now_add=True)
 
     def __str__(self) -> str:
         return self.sample_id
 
+    class Meta:
+        indexes = [
+            # supports the keyset pagination of the API (see main/pagination.py) in the
+            # direction of its ordering, newest first with ascending primary keys
+            models.Index(fields=['-date_registered', 'sample_id'],
+                         name='sample_date_registered_idx'),
+            # supports containment (exact match) filters on sample info fields; the index
+            # is only created on Postgres, see migration 0004
+            GinIndex(fields=['sample_info_data'], opclasses=['jsonb_path_ops'],
+                     name='sample_info_data_gin_idx'),
+            # support the sample search (see main/utils/search_utils.py): trigrams for ID
+            # fragments and mistyped IDs, a text search vector for names; Postgres only,
+            # see migration 0007
+            GinIndex(fields=['sample_id'], opclasses=['gin_trgm_ops'], name='sample_id_trgm_idx'),
+            GinIndex(SearchVector('name', config='simple'), name='sample_name_search_idx'),
+        ]
+
     def get_sample_info_upload_path(self):
         new_filename = f"{self.sample_id}.json"
         return os.path.join('sample_info', new_filename)
@@ -196,29 +338,19 @@ class Sample(models.Model):
         return None
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-
-        # Rename and save the sample_info file if the file name has changed
-        new_sample_info_name = self.get_sample_info_upload_path()
-        if self.sample_info and self.sample_info.name != new_sample_info_name:
-            old_sample_info_path = self.sample_info.path
-            new_sample_info_path = default_storage.path(new_sample_info_name)
-            os.rename(old_sample_info_path, new_sample_info_path)
-            self.sample_info.name = new_sample_info_name
-            super().save(update_fields=['sample_info'])
-
-        # Rename and save the supplementary_file if the file name has changed
-        new_supplementary_file_name = self.get_supplementary_file_upload_path(
-            self.supplementary_file.name if self.supplementary_file else None)
-        if (self.supplementary_file and new_supplementary_file_name and
-                self.supplementary_file.name != new_supplementary_file_name):
-
-            old_supplementary_file_path = self.supplementary_file.path
-            new_supplementary_file_path = default_storage.path(
-                new_supplementary_file_name)
-            os.rename(old_supplementary_file_path, new_supplementary_file_path)
-            self.supplementary_file.name = new_supplementary_file_name
-            super().save(update_fields=['supplementary_file'])
+        # the sample ID is known before the INSERT, so new uploads are written next to their
+        # final names; saves without new uploads do not touch the storage
+        if not args and self._state.adding and not (kwargs.get('force_update') or kwargs.get('update_fields')):
+            # the primary key is set by the caller, so Django would try an UPDATE before the
+            # INSERT (e.g. when SampleForm saves a new sample)
+            kwargs.setdefault('force_insert', True)
+        staged = []
+        if has_upload(self.sample_info):
+            staged.append(stage_upload(self.sample_info, self.get_sample_info_upload_path()))
+        if has_upload(self.supplementary_file):
+            staged.append(stage_upload(self.supplementary_file,
+                                       self.get_supplementary_file_upload_path(self.supplementary_file.name)))
+        save_staged(partial(super().save, *args, **kwargs), staged)
 
 
 @receiver(post_delete, sender=Sample)
@@ -226,6 +358,7 @@ def delete_sample_info(sender, instance, **kwargs):
     if instance.sample_info:
         if default_storage.exists(instance.sample_info.name):
             default_storage.delete(instance.sample_info.name)
+        StoredFile.objects.release(instance.sample_info.name)
 
 
 @receiver(post_delete, sender=Sample)
@@ -233,6 +366,7 @@ def delete_supplementary_file(sender, instance, **kwargs):
     if instance.supplementary_file:
         if default_storage.exists(instance.supplementary_file.name):
             default_storage.delete(instance.supplementary_file.name)
+        StoredFile.objects.release(instance.supplementary_file.name)
 
 
 class Experiment(models.Model):
@@ -249,8 +383,8 @@ class Experiment(models.Model):
     name = models.CharField(max_length=255, help_text="free text field")
     date_created = models.DateField(help_text="when was the data created")
     # file name is defined by function get_experiment_file_upload_path below
-    # the actual file path information is updated on the model instance after
-    # creation, because the PK can only be used after creation
+    # the file of a new experiment is written after the INSERT, because the PK
+    # can only be used after creation (see save)
     experiment_file = models.FileField(upload_to="experiment_files",
                                        verbose_name="experimental data file path")
     date_registered = models.DateTimeField(auto_now_add=True)
@@ -258,27 +392,32 @@ class Experiment(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    class Meta:
+        # supports the keyset pagination of the API (see main/pagination.py) in the
+        # direction of its ordering, newest first with ascending primary keys
+        indexes = [
+            models.Index(fields=['-date_registered', 'id'],
+                         name='experiment_date_registered_idx'),
+            # supports the sample search by experiment name, Postgres only (see migration 0007)
+            GinIndex(SearchVector('name', config='simple'), name='experiment_name_search_idx'),
+        ]
+
     def get_experiment_file_upload_path(self, filename):
         # Use the instance's primary key as the new file name
         file_extension = os.path.splitext(filename)[1]
         new_filename = f"{self.pk}{file_extension}"
-        print(new_filename)
         return os.path.join('experiment_files', new_filename)
 
     def save(self, *args, **kwargs):
-        # Save the instance to generate the primary key (if it's a new instance)
-        is_new = self._state.adding
-        super().save(*args, **kwargs)
-
-        # Save the file into the new path and name created with the primary key
-        if is_new and self.experiment_file:
-            old_file_path = self.experiment_file.path
-            new_file_name = self.get_experiment_file_upload_path(
-                self.experiment_file.name)
-            new_file_path = default_storage.path(new_file_name)
-            os.rename(old_file_path, new_file_path)
-            self.experiment_file.name = new_file_name
-            super().save(update_fields=['experiment_file'])
+        # uploads are stored under the primary key, so a new instance is inserted first and the
+        # file is written once the key is known
+        upload = detach_upload(self.experiment_file) if self.pk is None else None
+        staged = []
+        if has_upload(self.experiment_file):
+            staged.append(stage_upload(self.experiment_file, self.get_experiment_file_upload_path(self.experiment_file.name)))
+        save_staged(partial(super().save, *args, **kwargs), staged)
+        if upload is not None:
+            attach_upload(self, 'experiment_file', upload, self.get_experiment_file_upload_path(upload.name))
 
 
 @receiver(post_delete, sender=Experiment)
@@ -286,3 +425,375 @@ def delete_experiment_file(sender, instance, **kwargs):
     if instance.experiment_file:
         if default_storage.exists(instance.experiment_file.name):
             default_storage.delete(instance.experiment_file.name)
+        StoredFile.objects.release(instance.experiment_file.name)
+
+
+@receiver(post_save, sender=FundingBody)
+@receiver(post_delete, sender=FundingBody)
+@receiver(post_save, sender=Institute)
+@receiver(post_delete, sender=Institute)
+@receiver(post_save, sender=Method)
+@receiver(post_delete, sender=Method)
+@receiver(post_save, sender=SampleType)
+@receiver(post_delete, sender=SampleType)
+def invalidate_reference_data(sender, **kwargs):
+    # lookup tables cached by main.utils.reference_utils
+    invalidate_cached(f"reference_data:{sender._meta.label_lower}")
+
+
+class StoredFileManager(models.Manager):
+    def register(self, name, inspection=None):
+        """
+        Computes the SHA-256 of a file in the media storage, records it under the file's name,
+        and deduplicates the file against the blob store (see deduplicate). With the
+        inspection of the upload the file was written from (see utils/inspection_utils.py),
+        neither the hash nor the manifest of an archive reads the file again.
+        """
+        if inspection is not None:
+            sha256 = inspection.sha256
+        else:
+            sha256 = hashlib.sha256()
+            with default_storage.open(name, 'rb') as file:
+                for chunk in file.chunks():
+                    sha256.update(chunk)
+            sha256 = sha256.hexdigest()
+
+        previous_sha256 = self.filter(name=name).values_list('sha256', flat=True).first()
+        self.deduplicate(name, sha256)
+        # recorded after deduplicating, which may replace the file by a link to its blob
+        size, mtime = self.get_file_state(name)
+        stored_file, _ = self.update_or_create(name=name, defaults={'sha256': sha256, 'size': size, 'mtime': mtime})
+        if previous_sha256 and previous_sha256 != sha256:
+            self.release_blob(previous_sha256)
+        if previous_sha256 != sha256:
+            ArchiveMember.objects.index(stored_file, inspection.members if inspection is not None else None)
+        return stored_file
+
+    @staticmethod
+    def get_file_state(name):
+        # size and modification time (UNIX time) of a file in the media storage
+        return default_storage.size(name), default_storage.get_modified_time(name).timestamp()
+
+    def get_current(self, name):
+        """
+        Returns the record of a file if it still describes the file, i.e. size and modification
+        time are unchanged, otherwise None. Files are only hashed when they are saved (see
+        register) or by the deduplicatefiles command, never while they are read.
+        """
+        stored_file = self.filter(name=name).first()
+        if stored_file is None or (stored_file.size, stored_file.mtime) != self.get_file_state(name):
+            return None
+        return stored_file
+
+    def release(self, name):
+        """
+        Drops the record of a deleted file and deletes its blob if no other file references it.
+        """
+        stored_file = self.filter(name=name).first()
+        if stored_file is not None:
+            stored_file.delete()
+            self.release_blob(stored_file.sha256)
+
+    @staticmethod
+    def get_blob_name(sha256):
+        return os.path.join('blobs', sha256[:2], sha256)
+
+    def deduplicate(self, name, sha256):
+        """
+        Content-addressed storage: every distinct content is stored once as blobs/<sha256>, and
+        the files under the names the models use (e.g. experiment_files/1.zip) are hardlinks to
+        it. The first file with a content becomes the blob; later files with the same content
+        are replaced by a link. Storages without local paths and file systems without hardlinks
+        keep their own copy.
+        """
+        try:
+            file_path = default_storage.path(name)
+            blob_path = default_storage.path(self.get_blob_name(sha256))
+        except NotImplementedError:
+            return
+        try:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            try:
+                os.link(file_path, blob_path)
+            except FileExistsError:
+                if not os.path.samefile(file_path, blob_path):
+                    # link next to the file first, so the file is replaced atomically
+                    temporary_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+                    os.link(blob_path, temporary_path)
+                    os.replace(temporary_path, file_path)
+        except OSError as e:
+            logger.warning(f"{name} could not be deduplicated: {e}")
+
+    def release_blob(self, sha256):
+        # the blob is only a further link to the content, so deleting it never removes data
+        # that a referencing file still needs
+        if not self.filter(sha256=sha256).exists():
+            blob_name = self.get_blob_name(sha256)
+            if default_storage.exists(blob_name):
+                default_storage.delete(blob_name)
+
+
+class StoredFile(models.Model):
+    # content hashes of the files in the media storage, used for the ETags of downloads and
+    # as reference count of the deduplicated blobs; records are written when a model saves
+    # its file under the final name
+    name = models.CharField(max_length=255, unique=True,
+                            help_text="file name in the media storage, e.g. experiment_files/1.zip")
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField(help_text="file size in bytes")
+    mtime = models.FloatField(null=True, blank=True,
+                              help_text="modification time of the file when it was hashed (UNIX time)")
+    date_registered = models.DateTimeField(auto_now=True)
+
+    objects = StoredFileManager()
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class ArchiveMemberManager(models.Manager):
+    def index(self, stored_file, infos=None):
+        """
+        Replaces the manifest of a stored file with the members listed in the central directory
+        of the zip archive. Only the directory at the end of the archive is read, not the
+        members themselves, and not even that if the members are passed as infos (a list of
+        ZipInfo, e.g. from the inspection of the upload). Files that are not zip archives have
+        no members.
+
+        Returns:
+        - list of the created ArchiveMember objects.
+        """
+        self.filter(stored_file=stored_file).delete()
+        if not stored_file.name.lower().endswith('.zip'):
+            return []
+        if infos is None:
+            try:
+                with default_storage.open(stored_file.name, 'rb') as file, zipfile.ZipFile(file) as archive:
+                    infos = [info for info in archive.infolist() if not info.is_dir()]
+            except (OSError, zipfile.BadZipFile) as e:
+                logger.warning(f"The members of {stored_file.name} could not be indexed: {e}")
+                return []
+        return self.bulk_create([
+            self.model(stored_file=stored_file, name=info.filename, size=info.file_size,
+                       compressed_size=info.compress_size, crc=info.CRC)
+            for info in infos
+        ], batch_size=1000)
+
+
+class ArchiveMember(models.Model):
+    # manifest of the zip files in the media storage, written when a file is registered
+    # (see StoredFileManager.register), so archives can be browsed and single members
+    # streamed without reading the whole archive
+    stored_file = models.ForeignKey(StoredFile, on_delete=models.CASCADE, related_name="members")
+    name = models.CharField(max_length=1024, help_text="path of the member inside the archive")
+    size = models.BigIntegerField(help_text="uncompressed size in bytes")
+    compressed_size = models.BigIntegerField(help_text="compressed size in bytes")
+    crc = models.BigIntegerField(verbose_name="CRC-32", help_text="CRC-32 of the uncompressed member")
+
+    objects = ArchiveMemberManager()
+
+    def __str__(self) -> str:
+        return f"{self.stored_file.name}:{self.name}"
+
+    class Meta:
+        indexes = [
+            # looks up a member of an archive by its path
+            models.Index(fields=['stored_file', 'name'], name='archivemember_name_idx'),
+        ]
+
+
+class UploadSession(models.Model):
+    # a chunked upload of a large file for the experiment or sample it is bound to when it is
+    # complete; the chunks are appended to uploads/<id>.part (see utils/upload_utils.py)
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    experiment = models.ForeignKey(Experiment, on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name="upload_sessions",
+                                   help_text="experiment whose experiment file is uploaded")
+    sample = models.ForeignKey(Sample, on_delete=models.CASCADE, null=True, blank=True,
+                               related_name="upload_sessions",
+                               help_text="sample whose supplementary file is uploaded")
+    filename = models.CharField(max_length=255, help_text="name of the file on the client, e.g. data.zip")
+    size = models.BigIntegerField(help_text="total file size in bytes")
+    offset = models.BigIntegerField(default=0, help_text="number of bytes received")
+    date_claimed = models.DateTimeField(null=True, blank=True,
+                                        help_text="start of the request that is writing to the upload")
+    date_registered = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.offset}/{self.size} bytes)"
+
+    @property
+    def part_name(self):
+        return os.path.join('uploads', f"{self.id}.part")
+
+    def get_target(self):
+        """
+        Returns the instance the upload is bound to and the name of its file field.
+        """
+        if self.experiment_id is not None:
+            return self.experiment, 'experiment_file'
+        return self.sample, 'supplementary_file'
+
+    class Meta:
+        constraints = [
+            # an upload belongs to either an experiment or a sample
+            models.CheckConstraint(
+                check=(models.Q(experiment__isnull=False, sample__isnull=True)
+                       | models.Q(experiment__isnull=True, sample__isnull=False)),
+                name='uploadsession_single_target'),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    # outbox of emails sent from requests (e.g. account setup, contact form); requests only
+    # insert a row, the sendemails management command delivers them (see utils/email_utils.py)
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "pending"),
+        (SENT, "sent"),
+        (FAILED, "failed"),
+    ]
+    # links that grant access to an account are not stored, they are rendered into the body
+    # when the email is sent
+    PASSWORD_RESET = "password_reset"
+    TEMPLATE_CHOICES = [
+        (PASSWORD_RESET, "password reset link"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    template = models.CharField(max_length=20, choices=TEMPLATE_CHOICES, blank=True,
+                                help_text="link rendered into the body when the email is sent")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True,
+                             related_name="outgoing_emails", help_text="user the link is rendered for")
+    site_url = models.CharField(max_length=255, blank=True, help_text="root URL of the rendered link")
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(help_text="list of recipient addresses")
+    reply_to = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now,
+                                        help_text="earliest time of the next delivery attempt")
+    last_error = models.TextField(blank=True)
+    date_registered = models.DateTimeField(auto_now_add=True)
+    date_sent = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.subject} to {', '.join(self.to)} ({self.status})"
+
+    class Meta:
+        indexes = [
+            # the worker picks due emails by status and next attempt
+            models.Index(fields=['status', 'next_attempt'], name='outgoingemail_due_idx'),
+        ]
+
+
+class ThrottleCounterManager(models.Manager):
+    def hit(self, key, window_end):
+        """
+        Counts a request in the current window of a throttle. The counter is incremented by
+        the database (UPDATE ... SET count = count + 1), so concurrent requests of all worker
+        processes are counted exactly; the counter of an earlier window is restarted.
+
+        Args:
+        - key: String, throttle scope and client, e.g. throttle_anon_10.0.0.1.
+        - window_end: Integer, UNIX time at which the current window ends.
+
+        Returns:
+        - Integer, number of requests in the current window including this one.
+        """
+        counters = self.filter(key=key)
+        if not counters.filter(window_end=window_end).update(count=F('count') + 1):
+            # first request of the window: restart the counter of the client, or create it
+            if not counters.filter(window_end__lt=window_end).update(window_end=window_end, count=1):
+                try:
+                    with transaction.atomic():
+                        self.create(key=key, window_end=window_end, count=1)
+                except IntegrityError:
+                    # created or restarted by a concurrent request
+                    return self.hit(key, window_end)
+        return counters.values_list('count', flat=True).get()
+
+
+class ThrottleCounter(models.Model):
+    # request counter of an API throttle (see main/throttles.py), one row per scope and client
+    # that is reused from window to window; counters of ended windows are removed by the
+    # clearthrottles management command
+    key = models.CharField(max_length=255, unique=True)
+    window_end = models.BigIntegerField(help_text="UNIX time at which the counted window ends")
+    count = models.PositiveIntegerField(default=0)
+
+    objects = ThrottleCounterManager()
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.count}"
+
+    class Meta:
+        indexes = [
+            # clearthrottles deletes the counters of ended windows
+            models.Index(fields=['window_end'], name='throttlecounter_end_idx'),
+        ]
+
+
+class CacheVersion(models.Model):
+    # version of a value cached in every worker process (see utils/cache_utils.py); incremented
+    # when the value changes, so all processes notice it
+    name = models.CharField(max_length=255, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.name} (version {self.version})"
+
+
+class RequestMetricManager(models.Manager):
+    def add(self, view_name, metrics):
+        """
+        Adds the measurements a worker process collected since its last flush (see
+        utils/metrics_utils.py) to the totals of a view. The row is locked while it is
+        updated, so the flushes of concurrent workers are all counted.
+
+        Args:
+        - view_name: String, e.g. SampleViewSet.list.
+        - metrics: ViewMetrics with the measurements since the last flush.
+        """
+        with transaction.atomic():
+            row = self.select_for_update().filter(view_name=view_name).first()
+            if row is None:
+                try:
+                    with transaction.atomic():
+                        row = self.create(view_name=view_name, histogram=[0] * len(metrics.histogram))
+                except IntegrityError:
+                    # created by a concurrent flush
+                    return self.add(view_name, metrics)
+            row.count += metrics.count
+            row.duration += metrics.duration
+            row.max_duration = max(row.max_duration, metrics.max_duration)
+            row.queries += metrics.queries
+            row.max_queries = max(row.max_queries, metrics.max_queries)
+            row.sql_duration += metrics.sql_duration
+            row.response_bytes += metrics.response_bytes
+            row.histogram = [total + n for total, n in zip(row.histogram, metrics.histogram)]
+            row.save()
+
+
+class RequestMetric(models.Model):
+    # request measurements of all worker processes per view, added up by the flushes of the
+    # workers (see main/middleware.py and utils/metrics_utils.py); durations in milliseconds
+    view_name = models.CharField(max_length=255, unique=True)
+    count = models.PositiveBigIntegerField(default=0)
+    duration = models.FloatField(default=0)
+    max_duration = models.FloatField(default=0)
+    queries = models.PositiveBigIntegerField(default=0)
+    max_queries = models.PositiveIntegerField(default=0)
+    sql_duration = models.FloatField(default=0)
+    response_bytes = models.PositiveBigIntegerField(default=0)
+    histogram = models.JSONField(default=list, help_text="requests per duration bucket")
+
+    objects = RequestMetricManager()
+
+    def __str__(self) -> str:
+        return f"{self.view_name}: {self.count} requests"
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+# Keyset pagination for the API viewsets: the cursor encodes the position of the
+# last entry of a page, so every page is a single indexed range query instead of
+# an OFFSET scan that gets slower the further a client pages.
+class DateRegisteredCursorPagination(CursorPagination):
+    """
+    Cursor pagination ordered by registration date (newest first), with the
+    primary key as tie-breaker for entries registered in the same instant.
+    """
+    ordering = ('-date_registered', 'pk')
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class IdCursorPagination(DateRegisteredCursorPagination):
+    """
+    Cursor pagination for lookup tables without a registration date.
+    """
+    ordering = ('id',)
+
+
+def get_estimated_count(model, using='default'):
+    """
+    Returns the row count of a model's table from the Postgres statistics, which are kept
+    up to date by autovacuum, or None on other databases and for tables never analyzed.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                       [connection.ops.quote_name(model._meta.db_table)])
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+# Page-number pagination for the HTML list views. Counting all rows of a large table
+# is a full scan on Postgres, so counts are only exact up to LIST_EXACT_COUNT_LIMIT.
+class ProbedPage(Page):
+    """
+    Page that knows whether a next page exists from the rows read, not from the count of
+    its paginator, which may be an estimate.
+    """
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose count stays cheap on large tables: an unfiltered list larger than
+    LIST_EXACT_COUNT_LIMIT is counted from the table statistics, a filtered list is
+    counted up to that limit only. count_is_estimate tells the templates to show the
+    count as approximate.
+
+    The count is for display only. A page reads one row more than it shows to find out
+    whether there is a next page, so every row stays reachable even if the count is
+    capped or the statistics are out of date.
+    """
+    @cached_property
+    def counted(self):
+        # (count, whether it is an estimate)
+        limit = settings.LIST_EXACT_COUNT_LIMIT
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = get_estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate, True
+            return queryset.count(), False
+
+        # COUNT(*) over a LIMIT subquery stops reading after limit + 1 rows
+        count = queryset[:limit + 1].count()
+        if count > limit:
+            return limit, True
+        return count, False
+
+    @property
+    def count(self):
+        return self.counted[0]
+
+    @property
+    def count_is_estimate(self):
+        return self.counted[1]
+
+    def validate_number(self, number):
+        # like Paginator.validate_number, but without the upper bound from the count
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("That page contains no results")
+        return ProbedPage(rows[:self.per_page], number, self, has_next=len(rows) > self.per_page)
+
+
+class SearchPagination(PageNumberPagination):
+    """
+    Page-number pagination for ranked search results, which have no stable keyset to
+    page by. The count is exact up to LIST_EXACT_COUNT_LIMIT (see EstimatedCountPaginator).
+    """
+    django_paginator_class = EstimatedCountPaginator
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
@@ -1,12 +1,54 @@
+from collections import Counter
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
 from rest_framework import serializers
 import json
+import os
 import zipfile
-from main.models import Sample, Experiment, FundingBody, Institute, Method, Project, SampleType, Staff
-from main.utils.validation_utils import validate_sample_id, validate_json_structure
+from main.models import (
+    ArchiveMember, Sample, Experiment, FundingBody, Institute, Method, Project, SampleType, Staff, StoredFile,
+    UploadSession,
+)
+from main.utils.inspection_utils import validate_zip_upload
+from main.utils.reference_utils import reference_data, institutes, methods, sample_types
+from main.utils.validation_utils import (
+    validate_sample_id, validate_sample_ids, clean_sample_info_data,
+)
 
 
+class ReferenceRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField for the lookup tables in main.utils.reference_utils: submitted IDs
+    are resolved from the reference-data cache instead of the database.
+
+    Args:
+    - model: Model class with a ReferenceData cache (FundingBody, Institute, Method, SampleType).
+    """
+
+    def __init__(self, model, **kwargs):
+        self.reference = reference_data[model]
+        # the queryset is only used for the choices of the browsable API
+        kwargs.setdefault('queryset', model.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.reference.get_object(data)
+        except self.reference.model.DoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+
 
 class SampleSerializer(serializers.ModelSerializer):
+    institute = ReferenceRelatedField(Institute)
+    method = ReferenceRelatedField(Method, allow_null=True, required=False)
+    sample_type = ReferenceRelatedField(SampleType)
+
     class Meta:
         model = Sample
         fields = '__all__'
@@ -23,8 +65,7 @@ class SampleSerializer(serializers.ModelSerializer):
 
     def validate_supplementary_file(self, file):
         if file:
-            if not zipfile.is_zipfile(file):
-                raise serializers.ValidationError("Only zip files are allowed.")
+            validate_zip_upload(file)
         return file
 
     def validate_sample_info(self, sample_info):
@@ -34,8 +75,7 @@ class SampleSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("This field is required.")
 
         try:
-            sample_type = SampleType.objects.get(pk=sample_type_id)
-            sample_type_name = sample_type.name
+            sample_type_name = sample_types.get_object(sample_type_id).name
         except SampleType.DoesNotExist:
             raise serializers.ValidationError("Invalid sample type.")
 
@@ -47,13 +87,207 @@ class SampleSerializer(serializers.ModelSerializer):
         except Exception as e:
             raise serializers.ValidationError(f"An error occurred while processing the file: {e}")
 
-        if not validate_json_structure(sample_info_json, sample_type_name):
+        try:
+            # kept for validate(), which stores it in Sample.sample_info_data
+            self.sample_info_data = clean_sample_info_data(sample_info_json, sample_type_name)
+        except DjangoValidationError:
             raise serializers.ValidationError("Invalid JSON structure for the selected sample type.")
 
         return sample_info
+
+    def validate(self, attrs):
+        if 'sample_info' in attrs:
+            attrs['sample_info_data'] = self.sample_info_data
+        return attrs
     
 
+class SampleManifestEntrySerializer(serializers.Serializer):
+    """
+    One row of the manifest of a bulk sample upload. Foreign keys are given by ID,
+    files by their name inside the uploaded archive.
+    """
+    sample_id = serializers.CharField(min_length=20, max_length=20)
+    name = serializers.CharField(max_length=255)
+    date_created = serializers.DateField()
+    institute = serializers.IntegerField()
+    project = serializers.IntegerField()
+    sample_type = serializers.IntegerField()
+    method = serializers.IntegerField(allow_null=True, required=False)
+    parent = serializers.CharField(max_length=20, allow_null=True, allow_blank=True, required=False)
+    sample_info = serializers.CharField(help_text="name of the sample info JSON file inside the archive")
+    supplementary_file = serializers.CharField(allow_null=True, allow_blank=True, required=False,
+                                               help_text="name of the supplementary zip file inside the archive")
+
+
+class SampleBulkCreateSerializer(serializers.Serializer):
+    """
+    Creates a batch of samples from a zip archive that contains a manifest.json (a list of
+    SampleManifestEntrySerializer rows) and the files the manifest refers to.
+
+    All rows are validated with a fixed number of queries per batch and either all samples
+    are created or none; errors are reported per row.
+    """
+    archive = serializers.FileField(help_text="zip file with manifest.json, sample info and supplementary files")
+
+    manifest_name = 'manifest.json'
+
+    def validate_archive(self, archive):
+        validate_zip_upload(archive)
+        return archive
+
+    def read_manifest(self, archive):
+        try:
+            manifest = json.loads(archive.read(self.manifest_name).decode('utf-8'))
+        except KeyError:
+            raise serializers.ValidationError({'archive': f"The archive does not contain a {self.manifest_name}."})
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise serializers.ValidationError({'archive': f"{self.manifest_name} is not a valid JSON file."})
+
+        if not isinstance(manifest, list) or not manifest:
+            raise serializers.ValidationError({'archive': f"{self.manifest_name} must contain a non-empty list of samples."})
+        if len(manifest) > settings.BULK_SAMPLE_MAX_ROWS:
+            raise serializers.ValidationError(
+                {'archive': f"A batch may contain at most {settings.BULK_SAMPLE_MAX_ROWS} samples."})
+        return manifest
+
+    def validate(self, attrs):
+        archive = zipfile.ZipFile(attrs['archive'])
+        manifest = self.read_manifest(archive)
+        members = set(archive.namelist())
+        errors = {}
+
+        def add_error(index, field, message):
+            errors.setdefault(index, {}).setdefault(field, []).append(message)
+
+        # field-level validation of every row, no database access
+        rows = {}
+        for index, entry in enumerate(manifest):
+            row_serializer = SampleManifestEntrySerializer(data=entry)
+            if row_serializer.is_valid():
+                rows[index] = row_serializer.validated_data
+            else:
+                errors[index] = row_serializer.errors
+
+        # set-based checks: at most one query per referenced table for the whole batch
+        sample_ids = [row['sample_id'] for row in rows.values()]
+        invalid_ids = validate_sample_ids(sample_ids)
+        existing_ids = set(Sample.objects.filter(sample_id__in=sample_ids).values_list('sample_id', flat=True))
+        duplicate_ids = {sample_id for sample_id, count in Counter(sample_ids).items() if count > 1}
+        # lookup tables come from the reference-data cache
+        institute_ids = set(institutes.get())
+        project_ids = set(Project.objects.filter(
+            pk__in={row['project'] for row in rows.values()}).values_list('pk', flat=True))
+        method_ids = set(methods.get())
+        sample_type_names = {pk: sample_type.name for pk, sample_type in sample_types.get().items()}
+        parent_ids = {row.get('parent') for row in rows.values()} - {None, ''}
+        known_parents = set(sample_ids) | set(Sample.objects.filter(
+            sample_id__in=parent_ids).values_list('sample_id', flat=True))
+
+        for index, row in rows.items():
+            sample_id = row['sample_id']
+            for message in invalid_ids.get(sample_id, []):
+                add_error(index, 'sample_id', message)
+            if sample_id in existing_ids:
+                add_error(index, 'sample_id', "Sample ID already exists. Please provide a unique Sample ID.")
+            if sample_id in duplicate_ids:
+                add_error(index, 'sample_id', "Sample ID occurs more than once in this batch.")
+            if row['institute'] not in institute_ids:
+                add_error(index, 'institute', "Invalid institute.")
+            if row['project'] not in project_ids:
+                add_error(index, 'project', "Invalid project.")
+            if row.get('method') is not None and row['method'] not in method_ids:
+                add_error(index, 'method', "Invalid method.")
+            if row.get('parent') and row['parent'] not in known_parents:
+                add_error(index, 'parent', "Invalid parent sample.")
+
+            sample_type_name = sample_type_names.get(row['sample_type'])
+            if sample_type_name is None:
+                add_error(index, 'sample_type', "Invalid sample type.")
+            elif row['sample_info'] not in members:
+                add_error(index, 'sample_info', f"{row['sample_info']} is missing in the archive.")
+            else:
+                try:
+                    row['sample_info_data'] = clean_sample_info_data(
+                        json.loads(archive.read(row['sample_info']).decode('utf-8')), sample_type_name)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    add_error(index, 'sample_info', "Invalid JSON file. Please upload a valid JSON file.")
+                except DjangoValidationError:
+                    add_error(index, 'sample_info', "Invalid JSON structure for the selected sample type.")
+
+            supplementary_file = row.get('supplementary_file')
+            if supplementary_file:
+                if supplementary_file not in members:
+                    add_error(index, 'supplementary_file', f"{supplementary_file} is missing in the archive.")
+                else:
+                    # the same checks as a single upload; the inspection is reused by register
+                    with archive.open(supplementary_file) as file:
+                        member = File(file, name=supplementary_file)
+                        try:
+                            validate_zip_upload(member)
+                        except DjangoValidationError as e:
+                            for message in e.messages:
+                                add_error(index, 'supplementary_file', message)
+                        else:
+                            row['supplementary_inspection'] = member.inspection
+
+        if errors:
+            # one entry per manifest row, empty for valid rows (like DRF's ListSerializer)
+            raise serializers.ValidationError({'manifest': [errors.get(index, {}) for index in range(len(manifest))]})
+
+        attrs['zip_archive'] = archive
+        attrs['rows'] = [rows[index] for index in sorted(rows)]
+        return attrs
+
+    def create(self, validated_data):
+        archive = validated_data['zip_archive']
+        user = validated_data['user']
+        samples = []
+        # storage name of each written file with its inspection, if any
+        written_files = {}
+
+        try:
+            with transaction.atomic():
+                for row in validated_data['rows']:
+                    sample = Sample(
+                        sample_id=row['sample_id'], name=row['name'], date_created=row['date_created'],
+                        institute_id=row['institute'], project_id=row['project'],
+                        sample_type_id=row['sample_type'], method_id=row.get('method'),
+                        parent_id=row.get('parent') or None, sample_info_data=row['sample_info_data'], user=user,
+                    )
+                    # files are written directly under their final names, so the rename in
+                    # Sample.save (which bulk_create bypasses) is not needed; the storage picks
+                    # another name if a file is left there, and the sample gets that name
+                    name = default_storage.save(
+                        sample.get_sample_info_upload_path(), ContentFile(archive.read(row['sample_info'])))
+                    written_files[name] = None
+                    sample.sample_info = name
+                    if row.get('supplementary_file'):
+                        with archive.open(row['supplementary_file']) as file:
+                            name = default_storage.save(
+                                sample.get_supplementary_file_upload_path(row['supplementary_file']), File(file))
+                        written_files[name] = row.get('supplementary_inspection')
+                        sample.supplementary_file = name
+                    samples.append(sample)
+                Sample.objects.bulk_create(samples)
+        except Exception:
+            for name in written_files:
+                default_storage.delete(name)
+            raise
+
+        # registering links the files into the blob store, which a rollback would not undo,
+        # so it waits until the samples are committed
+        def register_files():
+            for name, inspection in written_files.items():
+                StoredFile.objects.register(name, inspection)
+
+        transaction.on_commit(register_files)
+
+        return samples
+
+
 class ExperimentSerializer(serializers.ModelSerializer):
+    method = ReferenceRelatedField(Method)
+
     class Meta:
         model = Experiment
         fields = '__all__'
@@ -61,11 +295,50 @@ class ExperimentSerializer(serializers.ModelSerializer):
 
     def validate_experiment_file(self, file):
         if file:
-            if not zipfile.is_zipfile(file):
-                raise serializers.ValidationError("Only zip files are allowed.")
+            validate_zip_upload(file)
         return file
     
 
+class SampleLineageSerializer(SampleSerializer):
+    """
+    A sample within a lineage, together with its experiments and its distance
+    (number of generations) from the sample the lineage was requested for.
+    """
+    depth = serializers.SerializerMethodField()
+    experiments = ExperimentSerializer(many=True, read_only=True)
+
+    def get_depth(self, sample) -> int:
+        return self.context['depths'][sample.sample_id]
+
+
+class ArchiveMemberSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchiveMember
+        fields = ('name', 'size', 'compressed_size', 'crc')
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ('id', 'experiment', 'sample', 'filename', 'size', 'offset', 'date_registered')
+        read_only_fields = ('offset', 'date_registered')
+
+    def validate_filename(self, filename):
+        if os.path.splitext(filename)[1].lower() != '.zip':
+            raise serializers.ValidationError("Only zip files are allowed.")
+        return filename
+
+    def validate_size(self, size):
+        if not 0 < size <= settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"The file size must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes.")
+        return size
+
+    def validate(self, attrs):
+        if (attrs.get('experiment') is None) == (attrs.get('sample') is None):
+            raise serializers.ValidationError("Bind the upload to either an experiment or a sample.")
+        return attrs
+
+
 class FundingBodySerializer(serializers.ModelSerializer):
     class Meta:
         model = FundingBody
@@ -80,6 +353,8 @@ class InstituteSerializer(serializers.ModelSerializer):
 
 # needs no file check since it cannot be created via API
 class MethodSerializer(serializers.ModelSerializer):
+    institute = ReferenceRelatedField(Institute)
+
     class Meta:
         model = Method
         fields = '__all__'
@@ -87,6 +362,8 @@ class MethodSerializer(serializers.ModelSerializer):
 
 # needs no file check since it cannot be created via API
 class ProjectSerializer(serializers.ModelSerializer):
+    funding_body = ReferenceRelatedField(FundingBody)
+
     class Meta:
         model = Project
         fields = '__all__'
@@ -99,6 +376,8 @@ class SampleTypeSerializer(serializers.ModelSerializer):
 
 
 class StaffSerializer(serializers.ModelSerializer):
+    institute = ReferenceRelatedField(Institute)
+
     class Meta:
         model = Staff
         fields = '__all__'
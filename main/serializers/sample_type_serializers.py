@@ -56,4 +56,15 @@ class SampleTypeSuspensionSerializer(serializers.Serializer):
         for field in data.keys():
             if field == '':
                 field = None
-        return super(SampleTypeSuspensionSerializer, self).to_internal_value(data)
\ No newline at end of file
+        return super(SampleTypeSuspensionSerializer, self).to_internal_value(data)
+
+
+# sample type names (as in the SampleType table) and the serializers validating their sample info;
+# new sample types are registered here, everything else is derived from this mapping at startup
+# (see main/utils/sample_type_utils.py)
+SAMPLE_TYPE_SERIALIZERS = {
+    'Battery': SampleTypeBatterySerializer,
+    'Solids': SampleTypeSolidsSerializer,
+    'Liquid': SampleTypeLiquidSerializer,
+    'Suspension': SampleTypeSuspensionSerializer,
+}
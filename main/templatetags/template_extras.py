@@ -1,5 +1,5 @@
 from django import template
-from django.contrib.auth.models import Group
+from ..utils import auth_utils
 import os
 
 register = template.Library()
@@ -7,8 +7,7 @@ register = template.Library()
 
 @register.filter
 def has_group(user, group_name):
-    group = Group.objects.get(name=group_name)
-    return True if group in user.groups.all() else False
+    return auth_utils.has_group(user, group_name)
 
 
 @register.filter
@@ -1,6 +1,50 @@
-from rest_framework.throttling import SimpleRateThrottle
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+from .models import ThrottleCounter
 
-class GetRequestThrottle(SimpleRateThrottle):
+
+class FixedWindowRateThrottle(SimpleRateThrottle):
+    """
+    Rate throttle that counts the requests of a client per fixed window (e.g. per calendar
+    day for "10000/day") instead of keeping the timestamp of every request like
+    SimpleRateThrottle. The state per client is one ThrottleCounter row, incremented
+    atomically by the database, so all worker processes share the count.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_end = (window + 1) * self.duration
+        count = ThrottleCounter.objects.hit(self.key, self.window_end)
+
+        if count > self.num_requests:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        return max(self.window_end - self.now, 0)
+
+
+class AnonRequestThrottle(FixedWindowRateThrottle, AnonRateThrottle):
+    # scope 'anon', counted per IP for unauthenticated requests
+    pass
+
+
+class UserRequestThrottle(FixedWindowRateThrottle, UserRateThrottle):
+    # scope 'user', counted per user (per IP for unauthenticated requests)
+    pass
+
+
+class GetRequestThrottle(FixedWindowRateThrottle):
     scope = 'get_requests'
 
     def get_cache_key(self, request, view):
@@ -10,7 +54,7 @@ class GetRequestThrottle(SimpleRateThrottle):
         ident = self.get_ident(request)  # Get the unique identifier for the request
         return self.cache_format % {'scope': self.scope, 'ident': ident}
 
-class PostRequestThrottle(SimpleRateThrottle):
+class PostRequestThrottle(FixedWindowRateThrottle):
     scope = 'post_requests'
 
     def get_cache_key(self, request, view):
@@ -20,7 +64,7 @@ class PostRequestThrottle(SimpleRateThrottle):
         ident = self.get_ident(request)
         return self.cache_format % {'scope': self.scope, 'ident': ident}
 
-class PutDeleteRequestThrottle(SimpleRateThrottle):
+class PutDeleteRequestThrottle(FixedWindowRateThrottle):
     scope = 'write_requests'
 
     def get_cache_key(self, request, view):
@@ -28,4 +72,4 @@ class PutDeleteRequestThrottle(SimpleRateThrottle):
         if request.method not in ['PUT', 'DELETE']:
             return None  # Do not throttle if not PUT or DELETE
         ident = self.get_ident(request)
-        return self.cache_format % {'scope': self.scope, 'ident': ident}
\ No newline at end of file
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
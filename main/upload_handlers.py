@@ -0,0 +1,36 @@
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from .utils.inspection_utils import UploadInspection
+
+
+# Django's upload handlers, extended to inspect the data they store (see
+# main/utils/inspection_utils.py) in the same pass; configured in FILE_UPLOAD_HANDLERS.
+class InspectionMixin:
+    """
+    Inspects the chunks of an upload that this handler stores and attaches the result to
+    the uploaded file as .inspection.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # before super(): the memory handler stops the other handlers by raising
+        self.inspection = UploadInspection()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        data = super().receive_data_chunk(raw_data, start)
+        if data is None:  # the chunk was stored here, not passed on to the next handler
+            self.inspection.update(raw_data)
+        return data
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.inspection = self.inspection.finish(file)
+        return file
+
+
+class InspectingMemoryFileUploadHandler(InspectionMixin, MemoryFileUploadHandler):
+    pass
+
+
+class InspectingTemporaryFileUploadHandler(InspectionMixin, TemporaryFileUploadHandler):
+    pass
@@ -17,7 +17,7 @@ from .views import (
 )
 from .api import (
     SampleViewSet, ExperimentViewSet, FundingBodyViewSet, InstituteViewSet, MethodViewSet, ProjectViewSet, 
-    SampleTypeViewSet, SampleTypeInfoView, 
+    SampleTypeViewSet, SampleTypeInfoView, RequestMetricsView, UploadSessionViewSet,
     # staff personal data may not be read via API
     #StaffViewSet,
 )
@@ -37,6 +37,7 @@ router.register(r'institutes', InstituteViewSet)
 router.register(r'methods', MethodViewSet)
 router.register(r'projects', ProjectViewSet)
 router.register(r'sampletypes', SampleTypeViewSet)
+router.register(r'uploads', UploadSessionViewSet)
 # staff personal data may not be read via API
 #router.register(r'staff', StaffViewSet)
 
@@ -133,6 +134,7 @@ urlpatterns += [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/sample-type-info/', SampleTypeInfoView.as_view(), name='sample-type-info'),
+    path('api/metrics/', RequestMetricsView.as_view(), name='request-metrics'),
 ]
 
 urlpatterns += router.urls
@@ -0,0 +1,168 @@
+import numpy as np
+from django.db.models import F, FloatField, IntegerField, Value
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+from rest_framework import serializers
+from ..models import Sample
+from .sample_type_utils import sample_type_schemas
+
+# sample foreign keys the statistics can be grouped by
+GROUP_FIELDS = ('project', 'institute', 'sample_type')
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_BINS = 10
+MAX_BINS = 100
+
+
+def get_numeric_fields():
+    """
+    Returns the names of the numeric sample info fields of all sample types, e.g.
+    weight_in_g, volume_in_ccm and density_in_gccm.
+    """
+    fields = []
+    for schema in sample_type_schemas.values():
+        for field_name, field in schema.fields.items():
+            if isinstance(field, (serializers.FloatField, serializers.IntegerField)) and field_name not in fields:
+                fields.append(field_name)
+    return fields
+
+
+def load_columns(queryset, fields, group_by=None):
+    """
+    Loads numeric sample info fields of a sample queryset into one float array. The values
+    are extracted from Sample.sample_info_data by the database, so only numbers are
+    transferred; missing values become NaN.
+
+    Returns:
+    - numpy array with one row per sample: the group key (the foreign key, 0 without
+      grouping) followed by one column per field.
+    """
+    annotations = {'_group': F(f"{group_by}_id") if group_by else Value(0, output_field=IntegerField())}
+    for field_name in fields:
+        annotations[f"_{field_name}"] = Cast(KeyTextTransform(field_name, 'sample_info_data'), FloatField())
+    rows = queryset.order_by().annotate(**annotations).values_list(*annotations)
+    return np.array(list(rows), dtype=float).reshape(-1, len(fields) + 1)
+
+
+def get_group_labels(group_by, keys):
+    if not group_by:
+        return {0: 'all'}
+    model = Sample._meta.get_field(group_by).related_model
+    return dict(model.objects.filter(pk__in=keys).values_list('pk', 'name'))
+
+
+def summarize_column(values, codes, group_count, percentiles, bins):
+    """
+    Computes the statistics of one field for all groups at once: the values are sorted by
+    group and value, so minimum, maximum and percentiles are read off at the group
+    boundaries, and sums and histograms are counted with bincount.
+
+    Args:
+    - values: float array of the field, NaN for samples without a value.
+    - codes: int array, group index (0 to group_count - 1) of each sample.
+    - group_count: Integer, number of groups.
+    - percentiles: sequence of percentiles between 0 and 100.
+    - bins: Integer, number of histogram bins; all groups share the bins of a field.
+
+    Returns:
+    - dictionary of arrays indexed by group (count, min, max, mean, percentiles, histogram)
+      and the bin edges.
+    """
+    valid = ~np.isnan(values)
+    values, codes = values[valid], codes[valid]
+    counts = np.bincount(codes, minlength=group_count)
+    present = counts > 0
+
+    order = np.lexsort((values, codes))
+    ordered = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    last = starts + np.maximum(counts - 1, 0)
+    # groups without values point behind the values, at NaN
+    padded = np.append(ordered, np.nan)
+
+    def pick(positions):
+        return padded[np.where(present, positions, len(ordered))]
+
+    stats = {
+        'count': counts,
+        'min': pick(starts),
+        'max': pick(last),
+        'mean': np.divide(np.bincount(codes, weights=values, minlength=group_count), counts,
+                          out=np.full(group_count, np.nan), where=present),
+        'percentiles': {},
+    }
+    for percentile in percentiles:
+        # linear interpolation between the closest ranks, like numpy.percentile
+        rank = starts + (percentile / 100) * np.maximum(counts - 1, 0)
+        lower = np.floor(rank).astype(int)
+        fraction = rank - lower
+        upper = np.minimum(lower + 1, last)
+        stats['percentiles'][percentile] = pick(lower) + fraction * (pick(upper) - pick(lower))
+
+    if len(values):
+        edges = np.histogram_bin_edges(values, bins=bins)
+        # the last bin includes its right edge, like numpy.histogram
+        bin_index = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+        histogram = np.bincount(codes * bins + bin_index, minlength=group_count * bins).reshape(group_count, bins)
+    else:
+        edges = np.array([])
+        histogram = np.zeros((group_count, 0), dtype=int)
+    stats['histogram'] = histogram
+    stats['edges'] = edges
+    return stats
+
+
+def to_number(value):
+    return None if np.isnan(value) else float(value)
+
+
+def get_sample_info_statistics(queryset, fields=None, group_by=None, percentiles=DEFAULT_PERCENTILES,
+                               bins=DEFAULT_BINS):
+    """
+    Summarizes numeric sample info fields of a set of samples, optionally per project,
+    institute or sample type. The samples are loaded once into column arrays, all
+    statistics are computed vectorized over the columns.
+
+    Args:
+    - queryset: queryset of samples, may be filtered.
+    - fields: names of numeric sample info fields, all of them by default.
+    - group_by: one of GROUP_FIELDS or None for a single group 'all'.
+    - percentiles: sequence of percentiles between 0 and 100.
+    - bins: Integer, number of histogram bins per field.
+
+    Returns:
+    - dictionary with the number of samples, the bin edges per field and per group the
+      number of samples and the statistics of each field (count, min, max, mean,
+      percentiles, histogram counts). Statistics of fields without values are None.
+    """
+    fields = fields or get_numeric_fields()
+    columns = load_columns(queryset, fields, group_by)
+    keys, codes = np.unique(columns[:, 0].astype(np.int64), return_inverse=True)
+    codes = codes.reshape(-1)
+    labels = get_group_labels(group_by, keys.tolist())
+    sample_counts = np.bincount(codes, minlength=len(keys))
+
+    field_stats = {field_name: summarize_column(columns[:, index + 1], codes, len(keys), percentiles, bins)
+                   for index, field_name in enumerate(fields)}
+
+    groups = []
+    for index, key in enumerate(keys.tolist()):
+        group = {'key': key if group_by else None, 'label': labels.get(key), 'count': int(sample_counts[index]),
+                 'fields': {}}
+        for field_name, stats in field_stats.items():
+            group['fields'][field_name] = {
+                'count': int(stats['count'][index]),
+                'min': to_number(stats['min'][index]),
+                'max': to_number(stats['max'][index]),
+                'mean': to_number(stats['mean'][index]),
+                'percentiles': {f"{percentile:g}": to_number(values[index])
+                                for percentile, values in stats['percentiles'].items()},
+                'histogram': stats['histogram'][index].tolist(),
+            }
+        groups.append(group)
+
+    return {
+        'count': len(columns),
+        'group_by': group_by,
+        'bins': {field_name: stats['edges'].tolist() for field_name, stats in field_stats.items()},
+        'groups': groups,
+    }
@@ -0,0 +1,50 @@
+import mimetypes
+import os
+import zipfile
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from .file_utils import CHUNK_SIZE
+
+
+def iter_archive_member(file, archive, member):
+    # closes the member, the archive and the stored file when the response is done,
+    # also if the client disconnects
+    try:
+        while chunk := member.read(CHUNK_SIZE):
+            yield chunk
+    finally:
+        member.close()
+        archive.close()
+        file.close()
+
+
+def archive_member_response(archive_member):
+    """
+    Streams a single member of a zip archive in the media storage. Only the member is read
+    and decompressed: zipfile seeks to its local header using the central directory.
+
+    Args:
+    - archive_member: ArchiveMember, the indexed member to send.
+
+    Returns:
+    - StreamingHttpResponse with the uncompressed member as attachment.
+
+    Raises:
+    - OSError or zipfile.BadZipFile if the archive cannot be read.
+    - KeyError if the archive no longer contains the member.
+    """
+    file = default_storage.open(archive_member.stored_file.name, 'rb')
+    try:
+        archive = zipfile.ZipFile(file)
+        member = archive.open(archive_member.name)
+    except BaseException:
+        file.close()
+        raise
+
+    filename = os.path.basename(archive_member.name)
+    response = StreamingHttpResponse(iter_archive_member(file, archive, member),
+                                     content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response['Content-Length'] = str(archive_member.size)
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
@@ -0,0 +1,35 @@
+def get_group_names(user):
+    """
+    Returns the names of the groups a user belongs to.
+
+    The names are loaded with one query and cached on the user object, which (like the
+    permission cache of Django's ModelBackend) lives as long as the request. The templates
+    check group memberships many times per page, so this keeps their query count constant.
+
+    Args:
+    - user: User or AnonymousUser, usually request.user.
+
+    Returns:
+    - frozenset of group names.
+    """
+    if user.is_anonymous:
+        return frozenset()
+    if not hasattr(user, '_group_name_cache'):
+        user._group_name_cache = frozenset(user.groups.values_list('name', flat=True))
+    return user._group_name_cache
+
+
+def has_group(user, group_name):
+    return group_name in get_group_names(user)
+
+
+def get_institute_ids(user):
+    """
+    Returns the IDs of the institutes a user belongs to, cached on the user object like
+    get_group_names.
+    """
+    if user.is_anonymous:
+        return frozenset()
+    if not hasattr(user, '_institute_id_cache'):
+        user._institute_id_cache = frozenset(user.institute.values_list('pk', flat=True))
+    return user._institute_id_cache
@@ -0,0 +1,124 @@
+import io
+import logging
+import time
+import zipfile
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from ..models import Experiment
+from .export_utils import get_export_fields, iter_csv
+from .file_utils import CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# text files are compressed, uploads (mostly zip archives already) are stored as they are
+COMPRESSED_EXTENSIONS = ('.csv', '.json', '.txt')
+
+
+class ZipStream(io.RawIOBase):
+    """
+    Write-only, non-seekable buffer for zipfile. zipfile then writes the sizes and CRCs
+    after each member (data descriptors) instead of seeking back, so the archive can be
+    sent while it is written; pop() hands out what was written since the last call.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(members):
+    """
+    Writes a zip archive piece by piece, holding at most one chunk of a member in memory.
+
+    Args:
+    - members: iterable of (name in the archive, iterable of bytes), both evaluated lazily.
+
+    Returns:
+    - generator of the bytes of the archive.
+    """
+    stream = ZipStream()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(stream, 'w') as archive:
+        for name, chunks in members:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            if name.lower().endswith(COMPRESSED_EXTENSIONS):
+                info.compress_type = zipfile.ZIP_DEFLATED
+            # the size is not known in advance, zip64 allows members over 4 GB
+            with archive.open(info, 'w', force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    yield stream.pop()
+            yield stream.pop()
+    yield stream.pop()
+
+
+def iter_stored_file(name):
+    with default_storage.open(name, 'rb') as file:
+        yield from file.chunks(CHUNK_SIZE)
+
+
+def iter_encoded(chunks):
+    for chunk in chunks:
+        yield chunk.encode()
+
+
+def get_bundle_members(samples, chunk_size):
+    experiments = Experiment.objects.filter(sample__in=samples.values('pk')).order_by('pk')
+
+    # metadata first, then the files of the samples and their experiments
+    for queryset, filename in ((samples, 'samples.csv'), (experiments, 'experiments.csv')):
+        fields = get_export_fields(queryset.model)
+        rows = queryset.values(*fields).iterator(chunk_size=chunk_size)
+        yield filename, iter_encoded(iter_csv(rows, fields, chunk_size))
+
+    names = (samples.values_list('sample_info', 'supplementary_file').iterator(chunk_size=chunk_size),
+             experiments.values_list('experiment_file').iterator(chunk_size=chunk_size))
+    for rows in names:
+        for row in rows:
+            for name in row:
+                if not name:
+                    continue
+                if not default_storage.exists(name):
+                    logger.warning(f"{name} is missing and was left out of a bundle.")
+                    continue
+                # stored under their media path, e.g. sample_info/<sample_id>.json
+                yield name, iter_stored_file(name)
+
+
+def stream_bundle(samples, filename, chunk_size=None):
+    """
+    Streams one zip archive with the metadata (samples.csv, experiments.csv) and the files
+    (sample info, supplementary and experiment files) of a set of samples. Neither the
+    archive nor a file is held in memory or written to a temporary file, and the database
+    rows are read in chunks, so bundles of any size use constant memory.
+
+    Args:
+    - samples: QuerySet of the samples to bundle, together with all their experiments.
+    - filename: String, base name of the downloaded archive (without extension).
+    - chunk_size: Integer, number of rows fetched from the database per round trip.
+
+    Returns:
+    - StreamingHttpResponse with the zip archive.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    response = StreamingHttpResponse(iter_zip(get_bundle_members(samples.order_by('pk'), chunk_size)),
+                                     content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
+    return response
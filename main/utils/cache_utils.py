@@ -0,0 +1,97 @@
+import time
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+# VersionedCache instances of this process by name, reset when their value is invalidated here
+_versioned_caches = {}
+
+
+def get_version(name):
+    CacheVersion = apps.get_model('main', 'CacheVersion')
+    return CacheVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+
+def increment_version(name):
+    CacheVersion = apps.get_model('main', 'CacheVersion')
+    if not CacheVersion.objects.filter(name=name).update(version=F('version') + 1):
+        try:
+            with transaction.atomic():
+                CacheVersion.objects.create(name=name, version=1)
+        except IntegrityError:
+            # created by a concurrent invalidation
+            increment_version(name)
+
+
+def invalidate_cached(name):
+    """
+    Invalidates a VersionedCache in all processes by incrementing its version in the database.
+    The version changes when the current transaction commits, so no process can reload the
+    value before the change that invalidated it is visible.
+    """
+    def invalidate():
+        increment_version(name)
+        if name in _versioned_caches:
+            _versioned_caches[name].reset()
+
+    transaction.on_commit(invalidate)
+
+
+def reset_versioned_caches():
+    # drops the values of this process, e.g. between tests that roll back the database
+    for versioned_cache in _versioned_caches.values():
+        versioned_cache.reset()
+
+
+class VersionedCache:
+    """
+    Process-local cache for small values derived from the database that rarely change.
+
+    The value is kept in process memory together with its version, a counter in the
+    CacheVersion table shared by all processes. For timeout seconds after a version check
+    lookups cost nothing; then the version is read again (one primary key lookup) and the
+    value reloaded if it changed. invalidate_cached() (usually called from a
+    post_save/post_delete receiver) increments the version, so every worker reloads the
+    value within timeout seconds, or at once when a lookup asks to refresh.
+
+    Args:
+    - name: String, unique name of the cached value.
+    - loader: Callable without arguments that computes the value from the database.
+    - timeout: Integer, seconds between version checks (default: VERSIONED_CACHE_TIMEOUT).
+    """
+
+    def __init__(self, name, loader, timeout=None):
+        self.name = name
+        self.loader = loader
+        self.timeout = timeout
+        self._local = (None, None, 0.0)  # (version, value, time of the check), replaced as a whole
+        _versioned_caches[name] = self
+
+    def get(self, refresh=False):
+        """
+        Returns the value.
+
+        Args:
+        - refresh: Boolean, check the version now, e.g. after a lookup missed a row that
+          another process may have added.
+        """
+        version, value, checked = self._local
+        timeout = settings.VERSIONED_CACHE_TIMEOUT if self.timeout is None else self.timeout
+        now = time.monotonic()
+        if version is not None and not refresh and now - checked < timeout:
+            return value
+
+        # the version is read before the value, so a concurrent invalidation at worst
+        # causes another reload
+        current_version = get_version(self.name)
+        if current_version != version:
+            value = self.loader()
+        self._local = (current_version, value, now)
+        return value
+
+    def reset(self):
+        self._local = (None, None, 0.0)
+
+    def invalidate(self):
+        invalidate_cached(self.name)
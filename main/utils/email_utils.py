@@ -1,19 +1,112 @@
-from django.core.mail import send_mail
+import logging
+from datetime import timedelta
+from urllib.parse import urljoin
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.conf import settings
+from ..models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+# placeholder in the body of queued emails for the password reset link of their user
+PASSWORD_RESET_LINK = "{password_reset_link}"
+
+
+def queue_email(subject, message, from_email, recipient_list, reply_to=None, template='', user=None,
+                site_url=''):
+    """
+    Adds an email to the outbox instead of sending it within the request. The row is part of
+    the request's transaction, so the email is dropped if the transaction is rolled back.
+    The sendemails management command delivers it.
+
+    Args:
+    - template: String, OutgoingEmail.PASSWORD_RESET renders the password reset link of user
+      into the placeholder PASSWORD_RESET_LINK of the message when the email is sent.
+    - user: User the link is rendered for.
+    - site_url: String, root URL of the link, e.g. https://dmlf.de/.
+
+    Returns:
+    - OutgoingEmail
+    """
+    return OutgoingEmail.objects.create(subject=subject, body=message, from_email=from_email,
+                                        to=list(recipient_list), reply_to=list(reply_to or []),
+                                        template=template, user=user, site_url=site_url)
+
+
+def render_body(email):
+    # the token is made at send time, so it is never stored in the outbox
+    if email.template != OutgoingEmail.PASSWORD_RESET:
+        return email.body
+    token = PasswordResetTokenGenerator().make_token(email.user)
+    uid = urlsafe_base64_encode(force_bytes(email.user.pk))
+    link = urljoin(email.site_url, reverse('password_reset_confirm', kwargs={'uidb64': uid, 'token': token}))
+    return email.body.replace(PASSWORD_RESET_LINK, link)
+
+
+def get_retry_delay(attempts):
+    # exponential backoff: EMAIL_RETRY_DELAY seconds after the first failure, doubled after each further one
+    return timedelta(seconds=min(settings.EMAIL_RETRY_DELAY * 2 ** (attempts - 1), settings.EMAIL_MAX_RETRY_DELAY))
+
+
+def send_queued_emails(batch_size=None):
+    """
+    Sends a batch of due emails of the outbox over one backend connection. Failed emails are
+    retried with exponential backoff until EMAIL_MAX_ATTEMPTS is reached.
+
+    The batch is claimed in a short transaction with SKIP LOCKED (where the database supports
+    it) and sent after the commit: the claim moves the next attempt EMAIL_SEND_TIMEOUT seconds
+    ahead, so other workers skip the batch while it is sent and no lock is held during the
+    delivery. Emails of a worker that stopped while sending are sent again after that.
+
+    Returns:
+    - tuple (number of sent emails, number of failed attempts)
+    """
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    sent = failed = 0
+    with transaction.atomic():
+        emails = list(OutgoingEmail.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            status=OutgoingEmail.PENDING, next_attempt__lte=timezone.now()
+        ).select_related('user').order_by('next_attempt', 'pk')[:batch_size])
+        if not emails:
+            return sent, failed
+        claimed_until = timezone.now() + timedelta(seconds=settings.EMAIL_SEND_TIMEOUT)
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            attempts=F('attempts') + 1, next_attempt=claimed_until)
+
+    with get_connection(fail_silently=False) as connection:
+        for email in emails:
+            email.attempts += 1
+            try:
+                message = EmailMessage(email.subject, render_body(email), email.from_email, email.to,
+                                       reply_to=email.reply_to, connection=connection)
+                message.send()
+            except Exception as e:
+                failed += 1
+                email.last_error = f"{type(e).__name__}: {e}"
+                if email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                    email.status = OutgoingEmail.FAILED
+                    logger.error(f"Giving up on email {email.pk} after {email.attempts} attempts: {email.last_error}")
+                else:
+                    email.next_attempt = timezone.now() + get_retry_delay(email.attempts)
+                    logger.warning(f"Sending email {email.pk} failed, retrying at {email.next_attempt}: {email.last_error}")
+            else:
+                sent += 1
+                email.status = OutgoingEmail.SENT
+                email.date_sent = timezone.now()
+                email.last_error = ''
+
+    OutgoingEmail.objects.bulk_update(emails, ['status', 'next_attempt', 'last_error', 'date_sent'])
+    return sent, failed
+
 
 # this function is used in admin.py and forms.py when a new user is created
 def send_initial_reset_email(request, user):
-    token_generator = PasswordResetTokenGenerator()
-    token = token_generator.make_token(user)
-    uid = urlsafe_base64_encode(force_bytes(user.pk))
-    password_reset_link = request.build_absolute_uri(
-        reverse('password_reset_confirm', kwargs={'uidb64': uid, 'token': token})
-    )
-
     group_names = ", ".join([group.name for group in user.groups.all()])
     institute_names = ", ".join([institute.name for institute in user.institute.all()])
 
@@ -24,9 +117,12 @@ def send_initial_reset_email(request, user):
         f'Your user name is: {user.username}\n\n'
         f'You belong to the following user categories: {group_names}\n\n'
         f'You belong to the following institutes: {institute_names}\n\n'
-        f'Please set up your account password by visiting the following link:\n{password_reset_link}\n\n'
+        f'Please set up your account password by visiting the following link:\n{PASSWORD_RESET_LINK}\n\n'
         f'Welcome to the Data Mining Lab Freiberg!'
     )
     email_from = settings.DEFAULT_FROM_EMAIL
     recipient_list = [user.email, "datamininglabfreiberg@gmail.com"]
-    send_mail(subject, message, email_from, recipient_list, fail_silently=False)
+    # delivered by the sendemails worker, so creating users does not wait for the mail API;
+    # the link is rendered by the worker and never stored in the outbox
+    queue_email(subject, message, email_from, recipient_list, template=OutgoingEmail.PASSWORD_RESET, user=user,
+                site_url=request.build_absolute_uri('/'))
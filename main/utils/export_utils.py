@@ -0,0 +1,83 @@
+import csv
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+class Echo:
+    """
+    Pseudo-buffer for csv.writer: instead of storing a row, return it so it can be streamed.
+    https://docs.djangoproject.com/en/4.2/howto/outputting-csv/#streaming-large-csv-files
+    """
+
+    def write(self, value):
+        return value
+
+
+def get_export_fields(model):
+    """
+    Returns the names of all concrete fields of a model; foreign keys are exported as their ID.
+    """
+    return [field.name for field in model._meta.concrete_fields]
+
+
+def iter_ndjson(rows, chunk_size):
+    batch = []
+    for index, row in enumerate(rows):
+        batch.append(json.dumps(row, cls=DjangoJSONEncoder))
+        # the first row is sent on its own, so the download starts before a batch is filled
+        if index == 0 or len(batch) >= chunk_size:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def csv_value(value):
+    # JSON columns (e.g. sample_info_data) are written as JSON text rather than Python reprs
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    return value
+
+
+def iter_csv(rows, fields, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    batch = []
+    for index, row in enumerate(rows):
+        batch.append(writer.writerow([csv_value(row[field]) for field in fields]))
+        if index == 0 or len(batch) >= chunk_size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def stream_export(queryset, export_format, filename, chunk_size=None):
+    """
+    Streams all rows of a queryset as NDJSON or CSV.
+
+    Args:
+    - queryset: QuerySet to export, it is evaluated lazily through a server-side cursor.
+    - export_format: String, either 'ndjson' or 'csv'.
+    - filename: String, base name of the downloaded file (without extension).
+    - chunk_size: Integer, number of rows fetched from the database per round trip.
+
+    Returns:
+    - StreamingHttpResponse whose memory use does not depend on the size of the queryset.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    fields = get_export_fields(queryset.model)
+    rows = queryset.values(*fields).iterator(chunk_size=chunk_size)
+
+    if export_format == 'csv':
+        content = iter_csv(rows, fields, chunk_size)
+        content_type = 'text/csv'
+    else:
+        content = iter_ndjson(rows, chunk_size)
+        content_type = 'application/x-ndjson'
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -1,29 +1,218 @@
+import mimetypes
 import os
-from django.http import Http404, FileResponse
-from django.core.exceptions import PermissionDenied
+import re
+import uuid
+from urllib.parse import quote
+from django.http import Http404, FileResponse, HttpResponse, StreamingHttpResponse
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
 from django.conf import settings
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from ..models import StoredFile
+from .auth_utils import has_group
+
+RANGE_SPEC_RE = re.compile(r'^(\d*)-(\d*)$')
+# more ranges than this are answered with the whole file
+MAX_RANGES = 20
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range_header(header, size):
+    """
+    Parses a Range header (RFC 9110, bytes only).
+
+    Returns:
+    - None if the header is missing, malformed or not worth honoring: the whole file is sent.
+    - list of inclusive (start, end) byte positions; empty if no range is satisfiable.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    specs = header[len('bytes='):].split(',')
+    if len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        match = RANGE_SPEC_RE.match(spec.strip())
+        if not match or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if first == '':  # suffix range: the last n bytes, none of an empty file
+            if int(last) == 0 or size == 0:
+                continue
+            ranges.append((max(size - int(last), 0), size - 1))
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+            if start < size:
+                ranges.append((start, end))
+    return ranges
+
+
+def if_range_matches(request, etag, last_modified):
+    """
+    Returns whether the Range header applies according to If-Range (true if there is none).
+    """
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    # only a date equal to Last-Modified validates (RFC 9110, section 13.1.5)
+    if_range_date = parse_http_date_safe(if_range)
+    return if_range_date is not None and if_range_date == last_modified
+
+
+def iter_file_range(file_path, start, end):
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def iter_multipart_ranges(file_path, parts, boundary):
+    for header, (start, end) in parts:
+        yield header
+        yield from iter_file_range(file_path, start, end)
+        yield b'\r\n'
+    yield f'--{boundary}--\r\n'.encode()
+
+
+def range_response(file_path, filename, ranges, size):
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(iter_file_range(file_path, start, end), status=206,
+                                         content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        boundary = uuid.uuid4().hex
+        parts = [
+            (f'--{boundary}\r\nContent-Type: {content_type}\r\n'
+             f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'.encode(), (start, end))
+            for start, end in ranges
+        ]
+        length = sum(len(header) + end - start + 1 + 2 for header, (start, end) in parts)
+        length += len(f'--{boundary}--\r\n')
+        response = StreamingHttpResponse(iter_multipart_ranges(file_path, parts, boundary), status=206,
+                                         content_type=f'multipart/byteranges; boundary={boundary}')
+        response['Content-Length'] = str(length)
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def python_file_response(file_path, name, filename, request=None, etag=None, last_modified=None):
+    # streams the file through the WSGI worker, honoring Range requests; meant for development
+    # and setups without a front proxy
+    if request is not None and request.method in ('GET', 'HEAD'):
+        size = os.path.getsize(file_path)
+        ranges = parse_range_header(request.META.get('HTTP_RANGE'), size)
+        if ranges is not None and if_range_matches(request, etag, last_modified):
+            if not ranges:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            return range_response(file_path, filename, ranges, size)
+    return FileResponse(open(file_path, 'rb'), as_attachment=True, filename=filename)
+
+
+def nginx_file_response(file_path, name, filename, **kwargs):
+    # nginx serves the file from an internal location that maps to MEDIA_ROOT, e.g.
+    # location /protected-media/ { internal; alias /path/to/media/; }
+    response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response['X-Accel-Redirect'] = settings.FILE_DOWNLOAD_INTERNAL_URL.rstrip('/') + '/' + quote(name)
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def apache_file_response(file_path, name, filename, **kwargs):
+    # requires mod_xsendfile with XSendFilePath pointing to MEDIA_ROOT
+    response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response['X-Sendfile'] = file_path
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+FILE_DOWNLOAD_BACKENDS = {
+    'python': python_file_response,
+    'nginx': nginx_file_response,
+    'apache': apache_file_response,
+}
+
+
+def file_response(file_path, name, filename, request=None):
+    """
+    Builds the response delivering a media file with the backend set in FILE_DOWNLOAD_BACKEND.
+
+    If a request is given, the response carries an ETag (the SHA-256 recorded in StoredFile,
+    if the record is current) and Last-Modified, conditional requests (If-None-Match, If-Modified-Since) are answered
+    with 304, and the python backend serves single and multiple byte ranges.
+
+    Args:
+    - file_path: String, absolute path of the file.
+    - name: String, path of the file relative to MEDIA_ROOT (its storage name).
+    - filename: String, file name offered to the client.
+    - request: HttpRequest object, optional.
+    """
+    try:
+        backend = FILE_DOWNLOAD_BACKENDS[settings.FILE_DOWNLOAD_BACKEND]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"FILE_DOWNLOAD_BACKEND must be one of {', '.join(FILE_DOWNLOAD_BACKENDS)}.")
+
+    if request is None:
+        return backend(file_path, name, filename)
+
+    # files that are not registered or changed since are served without ETag, hashing them
+    # here would read the whole file before the first byte is sent
+    stored_file = StoredFile.objects.get_current(name)
+    etag = f'"{stored_file.sha256}"' if stored_file is not None else None
+    last_modified = int(os.path.getmtime(file_path))
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = backend(file_path, name, filename, request=request, etag=etag, last_modified=last_modified)
+    if etag is not None:
+        response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
 
 def download_file(request, subfolder, filename):
     """
     Downloads a file from a specific subfolder within the MEDIA_ROOT, ensuring the user has the proper permissions.
 
+    After the permission check, the transfer itself is handed to the front proxy if
+    FILE_DOWNLOAD_BACKEND is 'nginx' (X-Accel-Redirect) or 'apache' (X-Sendfile), so it
+    does not occupy a worker; with 'python' the file is streamed by Django. Conditional
+    and Range requests let clients revalidate and resume downloads (see file_response).
+
     Args:
     - request: HttpRequest object, needed to check user permissions.
     - subfolder: String representing the subdirectory within MEDIA_ROOT where the file is located.
     - filename: String representing the name of the file to be downloaded.
 
     Returns:
-    - FileResponse to facilitate file download.
+    - HttpResponse to facilitate file download.
 
     Raises:
     - Http404 if the file does not exist.
     - PermissionDenied if the user does not have permission to download the file.
     """
-    file_path = os.path.join(settings.MEDIA_ROOT, subfolder, filename)
-    if not os.path.exists(file_path):
-        raise Http404("File does not exist")
-    
-    if not request.user.groups.filter(name='UseGroup').exists():
+    if not has_group(request.user, 'UseGroup'):
         raise PermissionDenied("You do not have permission to access this file")
 
-    return FileResponse(open(file_path, 'rb'), as_attachment=True, filename=filename)
\ No newline at end of file
+    file_path = safe_join(settings.MEDIA_ROOT, subfolder, filename)
+    if not os.path.isfile(file_path):
+        raise Http404("File does not exist")
+
+    return file_response(file_path, f"{subfolder}/{filename}", filename, request=request)
@@ -0,0 +1,110 @@
+import hashlib
+import zipfile
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models.fields.files import FieldFile
+
+# a zip archive starts with the header of its first member, or is empty
+ZIP_SIGNATURES = (b'PK\x03\x04', b'PK\x05\x06')
+# members smaller than this are not checked for their compression ratio
+RATIO_MIN_SIZE = 1024 ** 2
+
+
+class UploadInspection:
+    """
+    Facts about an uploaded file, gathered while its data passes by once (see
+    main/upload_handlers.py): the SHA-256, the size, and for zip archives the members listed
+    in the central directory. The inspection is attached to the uploaded file as .inspection,
+    so validation, deduplication and the manifest of the file (StoredFileManager.register)
+    use it instead of reading the file again.
+    """
+
+    def __init__(self):
+        self._sha256 = hashlib.sha256()
+        self._head = b''
+        self.size = 0
+        self.sha256 = None
+        # list of ZipInfo of the files in the archive, None if it is no readable zip archive
+        self.members = None
+        self.error = None
+
+    def update(self, data):
+        self._sha256.update(data)
+        if len(self._head) < len(ZIP_SIGNATURES[0]):
+            self._head += data[:len(ZIP_SIGNATURES[0]) - len(self._head)]
+        self.size += len(data)
+
+    def finish(self, file):
+        """
+        Completes the inspection once all data has passed. For a zip archive, zipfile locates
+        the end of central directory record and reads the central directory; the data of the
+        members is not read again.
+
+        Args:
+        - file: the complete file, seekable; its position is restored.
+
+        Returns:
+        - the inspection itself.
+        """
+        self.sha256 = self._sha256.hexdigest()
+        if self._head not in ZIP_SIGNATURES:
+            self.error = "Only zip files are allowed."
+            return self
+
+        position = file.tell()
+        try:
+            file.seek(0)
+            with zipfile.ZipFile(file) as archive:
+                infos = archive.infolist()
+        except (zipfile.BadZipFile, OSError, ValueError):
+            self.error = "The zip file is damaged, its central directory could not be read."
+            return self
+        finally:
+            file.seek(position)
+
+        self.members = [info for info in infos if not info.is_dir()]
+        self.error = check_zip_members(infos)
+        return self
+
+
+def check_zip_members(infos):
+    """
+    Checks the members of a zip archive for signs of a zip bomb: an excessive number of
+    members, or members that decompress to a multiple of their compressed size.
+
+    Returns:
+    - String describing the problem, or None.
+    """
+    if len(infos) > settings.UPLOAD_ZIP_MAX_MEMBERS:
+        return f"The zip file has more than {settings.UPLOAD_ZIP_MAX_MEMBERS} members."
+    for info in infos:
+        if info.file_size > RATIO_MIN_SIZE and info.file_size > info.compress_size * settings.UPLOAD_ZIP_MAX_RATIO:
+            return (f"{info.filename} is compressed by more than a factor of {settings.UPLOAD_ZIP_MAX_RATIO}, "
+                    f"the zip file is not accepted.")
+    return None
+
+
+def inspect_upload(file):
+    """
+    Returns the inspection of an uploaded file. Files that did not pass the inspecting upload
+    handlers (e.g. files created in code) are inspected now, once.
+    """
+    inspection = getattr(file, 'inspection', None)
+    if inspection is None:
+        inspection = UploadInspection()
+        for chunk in file.chunks():
+            inspection.update(chunk)
+        file.inspection = inspection.finish(file)
+    return inspection
+
+
+def validate_zip_upload(file):
+    """
+    Raises:
+    - DjangoValidationError if the uploaded file is no valid zip archive or looks like a zip bomb.
+    """
+    if isinstance(file, FieldFile):  # the stored file of a form without a new upload
+        return
+    error = inspect_upload(file).error
+    if error:
+        raise DjangoValidationError(error)
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db import connection
+from ..models import Sample
+
+
+def get_lineage(sample_id, direction='down', depth=None):
+    """
+    Walks the Sample.parent tree with a single recursive query.
+
+    Args:
+    - sample_id: String, ID of the sample the walk starts from (depth 0).
+    - direction: String, 'down' for derived samples (children, grandchildren, ...),
+      'up' for the chain of parents up to the origin sample.
+    - depth: Integer, number of generations to walk; capped by LINEAGE_MAX_DEPTH,
+      which also ends the walk should the parent links ever form a cycle.
+
+    Returns:
+    - dict mapping the ID of every sample in the lineage to its distance from the start;
+      empty if the sample does not exist.
+    """
+    max_depth = settings.LINEAGE_MAX_DEPTH if depth is None else min(depth, settings.LINEAGE_MAX_DEPTH)
+
+    quote = connection.ops.quote_name
+    table = quote(Sample._meta.db_table)
+    pk = quote(Sample._meta.pk.column)
+    parent = quote(Sample._meta.get_field('parent').column)
+    if direction == 'up':
+        join_condition = f"sample.{pk} = lineage.{parent}"
+    else:
+        join_condition = f"sample.{parent} = lineage.{pk}"
+
+    # recursive CTEs are supported by Postgres and SQLite alike
+    query = f"""
+        WITH RECURSIVE lineage ({pk}, {parent}, depth) AS (
+            SELECT {pk}, {parent}, 0 FROM {table} WHERE {pk} = %s
+            UNION ALL
+            SELECT sample.{pk}, sample.{parent}, lineage.depth + 1
+            FROM {table} sample JOIN lineage ON {join_condition}
+            WHERE lineage.depth < %s
+        )
+        SELECT {pk}, MIN(depth) FROM lineage GROUP BY {pk}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, [sample_id, max_depth])
+        return dict(cursor.fetchall())
@@ -0,0 +1,125 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+
+class QueueListenerHandler(logging.handlers.QueueHandler):
+    """
+    Logging handler that only puts records on a queue; a QueueListener thread passes them on
+    to the actual (file, console) handlers, so logging never blocks a request on I/O.
+
+    Python 3.11's dictConfig cannot wire a QueueHandler to other handlers (3.12 added the
+    queue_handler configuration), so the target handlers are configured here, from the same
+    kind of dicts as entries of LOGGING['handlers'] (formatters are referenced by name):
+
+        'queue': {
+            '()': 'main.utils.log_utils.QueueListenerHandler',
+            'handlers': [{'class': 'logging.StreamHandler'}, {'class': 'logging.FileHandler', ...}],
+        }
+
+    Filters of the queue handler (e.g. RateLimitFilter) run in the logging thread, before
+    the record is queued; the level and filters of the targets run in the listener thread.
+
+    Args:
+    - handlers: List of handler configuration dicts or handler instances.
+    - respect_handler_level: Boolean, whether the listener applies the targets' levels.
+    """
+
+    def __init__(self, handlers, respect_handler_level=True):
+        super().__init__(queue.SimpleQueue())
+        configurator = getattr(handlers, 'configurator', None)
+        self.targets = [
+            configurator.configure_handler(handler) if isinstance(handler, dict) and configurator else handler
+            for handler in handlers
+        ]
+        self.respect_handler_level = respect_handler_level
+        self.listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.start()
+        atexit.register(self.stop)
+
+    def start(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # also restarts the thread in a forked worker process, which inherits the
+                # handler but not the listener thread of its parent
+                self.listener = logging.handlers.QueueListener(
+                    self.queue, *self.targets, respect_handler_level=self.respect_handler_level)
+                self.listener.start()
+                self._pid = os.getpid()
+
+    def stop(self):
+        # flushes the queue; called at exit
+        with self._lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self._pid = None
+
+    def prepare(self, record):
+        # unlike QueueHandler.prepare, the message is not formatted here, so each target
+        # keeps its own formatter; only the parts that cannot be pickled or passed between
+        # threads safely (arguments, traceback) are rendered
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        for handler in self.targets:
+            handler.close()
+        super().close()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Collapses repeated log records: of the records with the same rate_limit_key attribute
+    (set with extra={'rate_limit_key': ...}, e.g. the IP of unauthorized requests), only the
+    first per period passes. The next one that passes mentions how many were suppressed.
+    Records without a rate_limit_key always pass.
+
+    Args:
+    - period: Number of seconds per key (0 disables the filter).
+    - max_keys: Integer, keys kept before expired ones are pruned, bounds the memory use.
+    """
+
+    def __init__(self, period=60, max_keys=10000):
+        super().__init__()
+        self.period = period
+        self.max_keys = max_keys
+        self._windows = {}  # key -> (start of the current period, number of suppressed records)
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'rate_limit_key', None)
+        if key is None or not self.period:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            start, suppressed = self._windows.get(key, (None, 0))
+            if start is not None and now - start < self.period:
+                self._windows[key] = (start, suppressed + 1)
+                return False
+
+            if len(self._windows) >= self.max_keys:
+                self._windows = {k: window for k, window in self._windows.items()
+                                 if now - window[0] < self.period}
+            self._windows[key] = (now, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
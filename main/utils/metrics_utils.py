@@ -0,0 +1,112 @@
+import bisect
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import DatabaseError
+from ..models import RequestMetric
+
+logger = logging.getLogger(__name__)
+
+# upper bounds (in milliseconds) of the histogram buckets of the request durations
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class ViewMetrics:
+    """
+    Aggregated measurements of the requests to one view.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.max_duration = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.sql_duration = 0.0
+        self.response_bytes = 0
+        self.histogram = [0] * (len(DURATION_BUCKETS) + 1)
+
+    def add(self, duration, queries, sql_duration, response_bytes):
+        self.count += 1
+        self.duration += duration
+        self.max_duration = max(self.max_duration, duration)
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.sql_duration += sql_duration
+        self.response_bytes += response_bytes or 0
+        self.histogram[bisect.bisect_left(DURATION_BUCKETS, duration)] += 1
+
+
+def summarize(metrics):
+    """
+    Returns the aggregates of a view (ViewMetrics or RequestMetric) as counts, means and
+    maxima for the metrics API and the requestmetrics command.
+    """
+    return {
+        'count': metrics.count,
+        'mean_ms': round(metrics.duration / metrics.count, 2),
+        'max_ms': round(metrics.max_duration, 2),
+        'mean_queries': round(metrics.queries / metrics.count, 2),
+        'max_queries': metrics.max_queries,
+        'mean_sql_ms': round(metrics.sql_duration / metrics.count, 2),
+        'mean_response_bytes': round(metrics.response_bytes / metrics.count),
+        # requests per duration bucket, keyed by the bucket's upper bound in ms
+        'histogram': {
+            **{f"le_{bound}": n for bound, n in zip(DURATION_BUCKETS, metrics.histogram)},
+            'inf': metrics.histogram[-1],
+        },
+    }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of the request measurements per view name, filled by
+    main.middleware.RequestMetricsMiddleware. Each worker process collects its measurements
+    in memory and adds them to the RequestMetric table at most every
+    REQUEST_METRICS_FLUSH_INTERVAL seconds, so the totals cover all workers; a request pays
+    the flush only when it is due.
+    """
+
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def record(self, view_name, duration, queries, sql_duration, response_bytes):
+        with self._lock:
+            metrics = self._views.get(view_name)
+            if metrics is None:
+                metrics = self._views[view_name] = ViewMetrics()
+            metrics.add(duration, queries, sql_duration, response_bytes)
+            due = time.monotonic() - self._flushed >= settings.REQUEST_METRICS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        # the measurements are taken out under the lock and written without it
+        with self._lock:
+            views, self._views = self._views, {}
+            self._flushed = time.monotonic()
+        try:
+            for view_name, metrics in views.items():
+                RequestMetric.objects.add(view_name, metrics)
+        except DatabaseError as e:
+            logger.warning(f"Request metrics of {len(views)} views could not be saved: {e}")
+
+    def snapshot(self):
+        """
+        Returns the totals of all worker processes per view, including the measurements of
+        this process that were not flushed yet.
+        """
+        self.flush()
+        return {metric.view_name: summarize(metric) for metric in RequestMetric.objects.order_by('view_name')}
+
+    def reset(self):
+        # measurements other workers have not flushed yet are added afterwards
+        with self._lock:
+            self._views = {}
+        RequestMetric.objects.all().delete()
+
+
+metrics_registry = MetricsRegistry()
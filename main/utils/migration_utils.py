@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class RunSQLOnPostgres(migrations.RunSQL):
+    """
+    RunSQL that is skipped on other database backends, e.g. for Postgres-only
+    index types when the test suite runs against SQLite.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,67 @@
+from ..models import FundingBody, Institute, Method, SampleType
+from .cache_utils import VersionedCache
+
+
+def get_reference_data_name(model):
+    # must match the name invalidated by invalidate_reference_data in models.py
+    return f"reference_data:{model._meta.label_lower}"
+
+
+class ReferenceData(VersionedCache):
+    """
+    Versioned cache of a small lookup table: all rows as model instances, keyed by primary
+    key. Lookups usually cost no query; the receivers in models.py invalidate the table in
+    all processes on every save and delete. A lookup that misses checks the version at once,
+    so rows just added by another process are found. The instances are shared between
+    requests, so they must be treated as read-only.
+
+    Args:
+    - model: Model class of the lookup table.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        super().__init__(get_reference_data_name(model),
+                         lambda: {obj.pk: obj for obj in model.objects.order_by('pk')})
+
+    def all(self):
+        return list(self.get().values())
+
+    def get_object(self, pk):
+        """
+        Returns the instance with the given primary key (an integer or a numeric string).
+
+        Raises:
+        - model.DoesNotExist if there is no such row.
+        """
+        if isinstance(pk, self.model):
+            pk = pk.pk
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise self.model.DoesNotExist(f"{self.model.__name__} with pk {pk!r} does not exist.")
+        for refresh in (False, True):
+            obj = self.get(refresh=refresh).get(pk)
+            if obj is not None:
+                return obj
+        raise self.model.DoesNotExist(f"{self.model.__name__} with pk {pk!r} does not exist.")
+
+    def get_by_name(self, name):
+        for refresh in (False, True):
+            for obj in self.get(refresh=refresh).values():
+                if obj.name == name:
+                    return obj
+        raise self.model.DoesNotExist(f"{self.model.__name__} with name {name!r} does not exist.")
+
+
+funding_bodies = ReferenceData(FundingBody)
+institutes = ReferenceData(Institute)
+methods = ReferenceData(Method)
+sample_types = ReferenceData(SampleType)
+
+reference_data = {
+    FundingBody: funding_bodies,
+    Institute: institutes,
+    Method: methods,
+    SampleType: sample_types,
+}
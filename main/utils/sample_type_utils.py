@@ -0,0 +1,99 @@
+import hashlib
+import json
+from django import forms
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from ..serializers.sample_type_serializers import SAMPLE_TYPE_SERIALIZERS
+
+
+def get_form_field_spec(serializer_field):
+    """
+    Returns the Django form field class and its keyword arguments that correspond to a
+    sample info serializer field.
+    """
+    attrs = {'class': 'form-group__input'}
+    if isinstance(serializer_field, serializers.CharField):
+        return forms.CharField, {'max_length': serializer_field.max_length,
+                                 'required': serializer_field.required,
+                                 'widget': forms.TextInput(attrs=attrs)}
+    if isinstance(serializer_field, serializers.FloatField):
+        return forms.FloatField, {'min_value': serializer_field.min_value,
+                                  'max_value': serializer_field.max_value,
+                                  'required': serializer_field.required,
+                                  'widget': forms.NumberInput(attrs={**attrs, 'step': 'any'})}
+    if isinstance(serializer_field, serializers.IntegerField):
+        return forms.IntegerField, {'min_value': serializer_field.min_value,
+                                    'max_value': serializer_field.max_value,
+                                    'required': serializer_field.required,
+                                    'widget': forms.NumberInput(attrs=attrs)}
+    if isinstance(serializer_field, serializers.DateField):
+        return forms.DateField, {'required': serializer_field.required,
+                                 'widget': forms.DateInput(attrs={**attrs, 'type': 'date'})}
+    # fall back to CharField
+    return forms.CharField, {'required': serializer_field.required,
+                             'widget': forms.TextInput(attrs=attrs)}
+
+
+class SampleTypeSchema:
+    """
+    Everything derived from the serializer of a sample type, computed once when the module is
+    imported: the serializer fields, the field metadata served by the sample type info API
+    (with its ETag), and the form field specs of SampleInfoForm.
+
+    Args:
+    - name: String, name of the sample type as in the SampleType table.
+    - serializer_class: Serializer class validating the sample info of this type.
+    """
+
+    def __init__(self, name, serializer_class):
+        self.name = name
+        self.serializer_class = serializer_class
+        self.fields = dict(serializer_class().get_fields())
+        self.field_info = {
+            field_name: {
+                'type': field.__class__.__name__,
+                'help_text': field.help_text if field.help_text else '',
+                'required': field.required,
+                'allow_null': field.allow_null,
+            }
+            for field_name, field in self.fields.items()
+        }
+        self.etag = '"%s"' % hashlib.sha256(
+            json.dumps([name, self.field_info], sort_keys=True).encode()).hexdigest()[:32]
+        self.form_field_specs = {field_name: get_form_field_spec(field)
+                                 for field_name, field in self.fields.items()}
+
+    def get_form_fields(self):
+        # form fields are mutable, so every form gets fresh instances (the fields copy their widgets)
+        return {field_name: field_class(**kwargs)
+                for field_name, (field_class, kwargs) in self.form_field_specs.items()}
+
+    def clean(self, json_data):
+        """
+        Validates sample info data against the serializer of this sample type.
+
+        Returns:
+        - dict of validated data.
+
+        Raises:
+        - DjangoValidationError if the data does not match the structure.
+        """
+        serializer = self.serializer_class(data=json_data)
+        if not serializer.is_valid():
+            raise DjangoValidationError(serializer.errors)
+        return serializer.validated_data
+
+
+# new sample types are registered in SAMPLE_TYPE_SERIALIZERS (sample_type_serializers.py);
+# names are looked up case-insensitively
+sample_type_schemas = {name.lower(): SampleTypeSchema(name, serializer_class)
+                       for name, serializer_class in SAMPLE_TYPE_SERIALIZERS.items()}
+
+
+def get_sample_type_schema(name):
+    """
+    Returns the SampleTypeSchema of a sample type name, or None for unknown names.
+    """
+    if not name:
+        return None
+    return sample_type_schemas.get(name.lower())
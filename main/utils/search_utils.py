@@ -0,0 +1,94 @@
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from ..models import Experiment, Project, Sample
+
+# names are searched as they are written, without language-specific stemming or stop words
+SEARCH_CONFIG = 'simple'
+# longer queries are cut off, each term adds an index scan
+MAX_SEARCH_TERMS = 5
+
+
+def get_search_terms(text):
+    """
+    Splits a search text into words; punctuation is dropped, so the terms are safe to
+    combine into a raw text search query.
+    """
+    return re.findall(r'\w+', text)[:MAX_SEARCH_TERMS]
+
+
+def get_name_vector(*fields):
+    # on a single field this is the expression of the GIN indexes on sample and
+    # experiment names (see migration 0007), so the planner can use them
+    return SearchVector(*(fields or ('name',)), config=SEARCH_CONFIG)
+
+
+def get_prefix_query(terms):
+    # every term is matched as a prefix: "bas gran" finds "Basalt from Granite Hill"
+    return SearchQuery(' & '.join(f"{term}:*" for term in terms), config=SEARCH_CONFIG, search_type='raw')
+
+
+def search_samples(queryset, text):
+    """
+    Filters a sample queryset by a search text and orders it by relevance. The text is
+    matched against the names of the samples, of their experiments and of their projects,
+    and against the sample IDs (as a fragment, or fuzzily for mistyped IDs). Ties keep the
+    ordering of the queryset, or newest first.
+
+    On Postgres the candidates are collected from indexed queries only (text search and
+    trigram indexes), and only the candidates are ranked. Other databases (SQLite for the
+    tests) fall back to case-insensitive substring matches.
+
+    Args:
+    - queryset: queryset of samples, may be filtered and ordered already.
+    - text: the search text as entered by the user.
+
+    Returns:
+    - the filtered queryset, annotated with a 'rank' (higher is more relevant).
+    """
+    text = text.strip()
+    terms = get_search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset = search_samples_postgres(queryset, text, terms)
+    else:
+        queryset = search_samples_fallback(queryset, text, terms)
+    return queryset.order_by('-rank', *(queryset.query.order_by or ('-date_registered', 'pk')))
+
+
+def search_samples_postgres(queryset, text, terms):
+    query = get_prefix_query(terms)
+    matching_projects = Project.objects.annotate(
+        document=get_name_vector('name', 'abbreviation')).filter(document=query)
+
+    # a union of index scans; a single query OR-ing conditions on joined tables would
+    # have to scan all samples
+    candidates = (
+        Sample.objects.annotate(document=get_name_vector()).filter(document=query).values('pk')
+        .union(Sample.objects.filter(Q(sample_id__contains=text) | Q(sample_id__trigram_similar=text)).values('pk'))
+        .union(Experiment.objects.annotate(document=get_name_vector()).filter(document=query).values('sample_id'))
+        .union(Sample.objects.filter(project__in=matching_projects.values('pk')).values('pk'))
+    )
+    return queryset.filter(pk__in=candidates).annotate(
+        rank=SearchRank(get_name_vector(), query) + TrigramSimilarity('sample_id', text)
+        + Case(When(sample_id__startswith=text, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+    )
+
+
+def search_samples_fallback(queryset, text, terms):
+    matches = Q()
+    for term in terms:
+        matches &= (Q(name__icontains=term) | Q(project__name__icontains=term)
+                    | Q(project__abbreviation__icontains=term)
+                    | Q(pk__in=Experiment.objects.filter(name__icontains=term).values('sample_id')))
+    return queryset.filter(matches | Q(sample_id__contains=text)).annotate(
+        rank=Case(
+            When(sample_id__startswith=text, then=Value(2.0)),
+            When(name__icontains=text, then=Value(1.0)),
+            default=Value(0.5),
+            output_field=FloatField(),
+        )
+    )
@@ -0,0 +1,240 @@
+import os
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
+from ..models import StoredFile, UploadSession
+from .file_utils import CHUNK_SIZE
+from .inspection_utils import ZIP_SIGNATURES, UploadInspection
+
+
+class UploadOffsetError(Exception):
+    """
+    Raised when a chunk does not continue an upload where it stands, or another request is
+    writing to the upload; the client resumes from offset.
+    """
+
+    def __init__(self, offset, message=None):
+        super().__init__(message or f"The upload continues at byte {offset}.")
+        self.offset = offset
+
+
+def start_upload(session):
+    # the part file lives in the media storage next to the final files, so finalizing it
+    # is a rename instead of a copy
+    path = default_storage.path(session.part_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+
+def get_conflict(session):
+    """
+    Returns the UploadOffsetError for a request whose claim failed, with the current offset
+    of the upload.
+    """
+    current = UploadSession.objects.filter(pk=session.pk).values('offset', 'date_claimed').first()
+    if current is None:
+        raise Http404("The upload was cancelled.")
+    session.offset = current['offset']
+    if current['date_claimed'] is not None:
+        return UploadOffsetError(session.offset, "Another request is writing to the upload, retry later.")
+    return UploadOffsetError(session.offset)
+
+
+def claim_upload(session, offset):
+    """
+    Claims an upload at an offset for the current request. The claim is a single conditional
+    UPDATE on the offset, committed at once, so requests for the same upload exclude each
+    other without a row lock or a transaction being held while the request body arrives. The
+    request renews its claim while it works (see refresh_claim); a claim that was not renewed
+    for UPLOAD_CLAIM_TIMEOUT seconds, left by a request that stopped, is taken over.
+
+    Args:
+    - session: UploadSession.
+    - offset: Integer, the offset the upload must stand at.
+
+    Returns:
+    - datetime, the claim, passed to release_upload.
+
+    Raises:
+    - UploadOffsetError if the upload does not stand at offset or another request holds it.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.UPLOAD_CLAIM_TIMEOUT)
+    claimed = UploadSession.objects.filter(
+        Q(date_claimed__isnull=True) | Q(date_claimed__lt=expired), pk=session.pk, offset=offset,
+    ).update(date_claimed=now, date_updated=now)
+    if not claimed:
+        raise get_conflict(session)
+    session.offset = offset
+    return now
+
+
+def refresh_claim(session, claim, refreshed):
+    """
+    Renews the claim of a request that is still receiving or reading the upload, once a
+    quarter of UPLOAD_CLAIM_TIMEOUT has passed since the last renewal, so only a request that
+    stopped (e.g. a killed worker) lets its claim expire.
+
+    Args:
+    - claim: datetime, the current claim.
+    - refreshed: float, time.monotonic() of the last renewal.
+
+    Returns:
+    - tuple (claim, time of its renewal)
+
+    Raises:
+    - UploadOffsetError if the claim expired and was taken over by another request.
+    """
+    if time.monotonic() - refreshed < settings.UPLOAD_CLAIM_TIMEOUT / 4:
+        return claim, refreshed
+    now = timezone.now()
+    if not UploadSession.objects.filter(pk=session.pk, date_claimed=claim).update(date_claimed=now):
+        raise get_conflict(session)
+    return now, time.monotonic()
+
+
+def release_upload(session, claim, offset):
+    """
+    Records the new offset of an upload and releases the claim, in one short UPDATE that
+    only applies while the claim still holds.
+
+    Raises:
+    - UploadOffsetError if the claim expired and was taken over by another request.
+    """
+    released = UploadSession.objects.filter(pk=session.pk, date_claimed=claim).update(
+        offset=offset, date_claimed=None, date_updated=timezone.now())
+    if not released:
+        raise get_conflict(session)
+    session.offset = offset
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Appends a chunk read from a stream (e.g. the request body) to the part file of an upload.
+    The upload is claimed at offset first (see claim_upload), so chunks of one upload are
+    written one at a time, and the new offset is recorded when the chunk is written; no
+    transaction is open while the chunk is received. Bytes behind the recorded offset, e.g.
+    from an interrupted request, are discarded first; bytes of an interrupted chunk that did
+    arrive are kept.
+
+    Args:
+    - session: UploadSession.
+    - offset: Integer, position of the chunk in the file as sent by the client.
+    - stream: file-like object the chunk is read from.
+    - length: Integer, size of the chunk.
+
+    Returns:
+    - Integer, the new offset.
+
+    Raises:
+    - UploadOffsetError if offset is not the current offset of the upload or another request
+      is writing to it.
+    - DjangoValidationError if the chunk exceeds the file size or the file is no zip archive.
+    """
+    if offset + length > session.size:
+        raise DjangoValidationError("The chunk exceeds the size of the file.")
+
+    claim = claim_upload(session, offset)
+    refreshed = time.monotonic()
+    received = offset
+    try:
+        with open(default_storage.path(session.part_name), 'r+b') as part:
+            part.truncate(offset)
+            part.seek(offset)
+            remaining = length
+            while remaining > 0:
+                try:
+                    chunk = stream.read(min(CHUNK_SIZE, remaining))
+                except OSError:  # the client went away, the upload resumes after the last byte received
+                    break
+                if not chunk:
+                    break
+                part.write(chunk)
+                remaining -= len(chunk)
+                claim, refreshed = refresh_claim(session, claim, refreshed)
+            received = part.tell()
+
+            # the zip signature is checked as soon as it has arrived, not after the whole upload
+            if offset < len(ZIP_SIGNATURES[0]) <= received:
+                part.seek(0)
+                if part.read(len(ZIP_SIGNATURES[0])) not in ZIP_SIGNATURES:
+                    part.truncate(0)
+                    received = 0
+                    raise DjangoValidationError("Only zip files are allowed.")
+    finally:
+        release_upload(session, claim, received)
+    return received
+
+
+def discard_upload(session):
+    if default_storage.exists(session.part_name):
+        default_storage.delete(session.part_name)
+    session.delete()
+
+
+def finalize_upload(session, sha256):
+    """
+    Checks a complete upload against the checksum of the client and moves it to the final
+    name of the file field it is bound to (e.g. experiment_files/<pk>.zip). A file stored
+    under that name before is replaced by a rename, which leaves other links to its content
+    (see StoredFileManager.deduplicate) intact. An upload that fails the checks is discarded.
+
+    Args:
+    - session: UploadSession.
+    - sha256: String, hex SHA-256 of the whole file computed by the client.
+
+    Returns:
+    - String, the storage name of the file.
+
+    Raises:
+    - UploadOffsetError if the upload is not complete or another request is writing to it.
+    - DjangoValidationError if the checksum does not match or the file fails the inspection
+      (no valid zip archive, zip bomb).
+    """
+    # the claim at the full size rejects incomplete uploads and chunks sent meanwhile
+    claim = claim_upload(session, session.size)
+    refreshed = time.monotonic()
+
+    part_path = default_storage.path(session.part_name)
+    # one pass over the assembled file, shared with register and the manifest
+    inspection = UploadInspection()
+    try:
+        with open(part_path, 'rb') as part:
+            while chunk := part.read(CHUNK_SIZE):
+                inspection.update(chunk)
+                claim, refreshed = refresh_claim(session, claim, refreshed)
+            inspection.finish(part)
+    except BaseException:
+        release_upload(session, claim, session.size)
+        raise
+    if inspection.sha256 != sha256.lower():
+        discard_upload(session)
+        raise DjangoValidationError("The checksum does not match, the upload was discarded.")
+    if inspection.error:
+        discard_upload(session)
+        raise DjangoValidationError(f"{inspection.error} The upload was discarded.")
+
+    instance, field_name = session.get_target()
+    previous_name = getattr(instance, field_name).name
+    name = getattr(instance, f"get_{field_name}_upload_path")(session.filename)
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with transaction.atomic():
+        # the file is moved last, so a failure leaves the upload as it was
+        if not UploadSession.objects.filter(pk=session.pk, date_claimed=claim).delete()[0]:
+            raise get_conflict(session)
+        type(instance)._default_manager.filter(pk=instance.pk).update(**{field_name: name})
+        os.replace(part_path, path)
+
+    if previous_name and previous_name != name:
+        if default_storage.exists(previous_name):
+            default_storage.delete(previous_name)
+        StoredFile.objects.release(previous_name)
+    StoredFile.objects.register(name, inspection)
+    return name
@@ -4,13 +4,20 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError as DjangoValidationError
 from ..models import Institute, Method
 from django.db.models import Max
-from ..serializers.sample_type_serializers import (
-    SampleTypeBatterySerializer, SampleTypeSolidsSerializer, 
-    SampleTypeLiquidSerializer, SampleTypeSuspensionSerializer,
-)
+from .cache_utils import VersionedCache
+from .sample_type_utils import get_sample_type_schema
 
 
-def validate_sample_id(value):
+def parse_sample_id(value):
+    """
+    Checks format, date and time of a sample ID without touching the database.
+
+    Returns:
+    - tuple (institution_code, method_code) encoded in the sample ID.
+
+    Raises:
+    - DjangoValidationError if the sample ID is malformed.
+    """
     # Check format yymmdd_hhmmss_iiaaaa
     if not re.match(r'^\d{6}_\d{6}_\d{6}$', value):
         raise DjangoValidationError("Sample ID must be in the format 'yymmdd_hhmmss_iiaaaa'.")
@@ -35,36 +42,97 @@ def validate_sample_id(value):
     except ValueError:
         raise DjangoValidationError("The time part of the Sample ID is not valid.")
 
+    return institution_code, method_code
+
+
+def load_sample_id_bounds():
+    max_institution_id = Institute.objects.aggregate(Max('id'))['id__max'] or 0
+    max_method_id = Method.objects.aggregate(Max('id'))['id__max'] or 0
+    return max_institution_id, max_method_id
+
+
+# invalidated by the receivers on Institute and Method in models.py
+sample_id_bounds = VersionedCache('sample_id_bounds', load_sample_id_bounds)
+
+
+def get_sample_id_bounds():
+    """
+    Returns the highest institute and method IDs, the upper bounds of the codes in a sample ID.
+    The bounds are cached; they only change when an institute or method is created or deleted.
+    Codes above the cached bounds are checked again against the database, see validate_sample_id.
+    """
+    return sample_id_bounds.get()
+
+
+def check_sample_id_bounds(institution_code, method_code, bounds):
+    max_institution_id, max_method_id = bounds
+
     # Check if institution code is valid
-    max_institution_id = Institute.objects.aggregate(Max('id'))['id__max']
     if institution_code > max_institution_id:
         raise DjangoValidationError(f"The institution code {institution_code} exceeds the highest institute id {max_institution_id}.")
 
     # Check if method code is valid
-    max_method_id = Method.objects.aggregate(Max('id'))['id__max']
     if method_code > max_method_id:
         raise DjangoValidationError(f"The method code {method_code} exceeds the highest method id {max_method_id}.")
-    
 
-def validate_json_structure(json_data, sample_type):
-    # Map sample types to their serializers
-    sample_type_serializers = {
-        'Battery': SampleTypeBatterySerializer,
-        'Solids': SampleTypeSolidsSerializer,
-        'Liquid': SampleTypeLiquidSerializer,
-        'Suspension': SampleTypeSuspensionSerializer,
-    }
 
-    # Get the serializer for the chosen sample type
-    serializer_class = sample_type_serializers.get(sample_type)
+def validate_sample_id(value):
+    institution_code, method_code = parse_sample_id(value)
+    try:
+        check_sample_id_bounds(institution_code, method_code, get_sample_id_bounds())
+    except DjangoValidationError:
+        # the institute or method may have been added by another process since the last check
+        check_sample_id_bounds(institution_code, method_code, sample_id_bounds.get(refresh=True))
+
+
+def validate_sample_ids(values):
+    """
+    Batch variant of validate_sample_id: all values are checked against the cached ID bounds,
+    so a batch of any size needs no database queries unless a code exceeds them.
+
+    Returns:
+    - dict mapping every invalid sample ID to its error messages.
+    """
+    bounds = get_sample_id_bounds()
+    refreshed = False
+    errors = {}
+    for value in values:
+        try:
+            institution_code, method_code = parse_sample_id(value)
+            try:
+                check_sample_id_bounds(institution_code, method_code, bounds)
+            except DjangoValidationError:
+                if refreshed:
+                    raise
+                # checked again against the current bounds, at most once per batch
+                bounds, refreshed = sample_id_bounds.get(refresh=True), True
+                check_sample_id_bounds(institution_code, method_code, bounds)
+        except DjangoValidationError as e:
+            errors[value] = e.messages
+    return errors
 
-    if not serializer_class:
-        return False, "Invalid sample type name."
 
-    # Validate the JSON data using the serializer
-    serializer = serializer_class(data=json_data)
+def clean_sample_info_data(json_data, sample_type):
+    """
+    Validates sample info data against the serializer of its sample type.
 
-    if not serializer.is_valid():
-        return False, serializer.errors
+    Returns:
+    - dict of validated data.
 
-    return True
\ No newline at end of file
+    Raises:
+    - DjangoValidationError if the sample type is unknown or the data does not match its structure.
+    """
+    schema = get_sample_type_schema(sample_type)
+
+    if not schema:
+        raise DjangoValidationError("Invalid sample type name.")
+
+    return schema.clean(json_data)
+
+
+def validate_json_structure(json_data, sample_type):
+    try:
+        clean_sample_info_data(json_data, sample_type)
+    except DjangoValidationError:
+        return False
+    return True
@@ -4,15 +4,18 @@ from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
 from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.functional import cached_property
 from django.urls import reverse_lazy
 from django.contrib.auth import get_user_model
 from django.views.generic import TemplateView, CreateView, ListView, DetailView, UpdateView, DeleteView, FormView, View
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from .models import Experiment, FundingBody, Institute, Method, Project, Staff, Sample, SampleType
-from .forms import ExperimentForm, FundingBodyForm, MethodForm, ProjectForm, SampleForm, SampleInfoForm, StaffForm, UserForm, UserUpdateForm
-from .serializers.sample_type_serializers import (
-    SampleTypeBatterySerializer, SampleTypeSolidsSerializer, SampleTypeLiquidSerializer, SampleTypeSuspensionSerializer
-)
+from .forms import ExperimentForm, FundingBodyForm, ListFilterForm, MethodForm, ProjectForm, SampleForm, SampleInfoForm, StaffForm, UserForm, UserUpdateForm
+from .pagination import EstimatedCountPaginator
+from .utils import reference_utils
+from .utils.auth_utils import get_group_names, get_institute_ids
+from .utils.sample_type_utils import get_sample_type_schema
+from .utils.search_utils import search_samples
 
 logger = logging.getLogger(__name__) # main.views
 
@@ -25,17 +28,63 @@ class LoggingPermissionRequiredMixin(LoginRequiredMixin, PermissionRequiredMixin
     
     def handle_no_permission(self):
         if not self.request.user.is_authenticated:
+            ip = self.request.META.get('REMOTE_ADDR')
+            # collapsed per IP by the rate_limit filter of the logging config
             logger.warning(
-                f"Unauthorized access attempt to {self.request.path} by an unauthenticated user (IP: {self.request.META.get('REMOTE_ADDR')})."
+                f"Unauthorized access attempt to {self.request.path} by an unauthenticated user (IP: {ip}).",
+                extra={'rate_limit_key': f"unauthorized:{ip}"},
             )
         else:
             logger.warning(
                 f"Unauthorized access attempt to {self.request.path} by user {self.request.user.username} "
-                f"(Required Permissions: {self.permission_required})."
+                f"(Required Permissions: {self.permission_required}, "
+                f"Groups: {', '.join(sorted(get_group_names(self.request.user))) or 'none'}).",
+                extra={'rate_limit_key': f"unauthorized:{self.request.META.get('REMOTE_ADDR')}"},
             )
         return super().handle_no_permission()
 
 
+class FilteredListMixin:
+    """
+    Mixin for the list views that paginates them and filters them by the GET parameters of
+    ListFilterForm. filter_lookups maps the form fields a view supports to queryset lookups.
+    A view with a search function (queryset, text) also gets a search box.
+    """
+    paginate_by = settings.LIST_PAGE_SIZE
+    paginator_class = EstimatedCountPaginator
+    filter_lookups = {}
+    search = None
+
+    @cached_property
+    def filter_form(self):
+        fields = [*self.filter_lookups, 'q'] if self.search else self.filter_lookups
+        return ListFilterForm(self.request.GET, fields=fields)
+
+    def filter_queryset(self, queryset):
+        # invalid values (e.g. an unknown institute) only drop their own filter
+        self.filter_form.is_valid()
+        for field_name, lookup in self.filter_lookups.items():
+            value = self.filter_form.cleaned_data.get(field_name)
+            if value is not None:
+                queryset = queryset.filter(**{lookup: value})
+        text = self.filter_form.cleaned_data.get('q')
+        if self.search and text:
+            # orders by relevance first, the sort order of the view only breaks ties
+            queryset = self.search(queryset, text)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        context['filter_form'] = self.filter_form
+        # for the page links, and without the sort order for the sort links
+        context['query_string'] = query.urlencode()
+        query.pop('sort_by', None)
+        context['filter_query_string'] = query.urlencode()
+        return context
+
+
 ''' ----------
     home views
     ---------- '''
@@ -62,8 +111,8 @@ class ChooseSampleInfoView(LoggingPermissionRequiredMixin, View):
     permission_required = "main.add_sample"
     
     def get(self, request):
-        # Retrieve all SampleType objects from the database
-        sample_types = SampleType.objects.all()
+        # sample types come from the reference-data cache
+        sample_types = reference_utils.sample_types.all()
         # Render the template with the list of sample types
         return render(request, 'main/crud/sample_info_choose.html', {'sample_types': sample_types})
 
@@ -76,18 +125,10 @@ class CreateSampleInfoView(LoggingPermissionRequiredMixin, FormView):
     def get_form_kwargs(self):
         kwargs = super(CreateSampleInfoView, self).get_form_kwargs()
         sample_type_id = self.request.GET.get('sample_type')
-        sample_type_name = SampleType.objects.get(pk=sample_type_id).name
-        
-        # Map sample type names to serializer classes as before
-        sample_type_serializers = {
-            'Battery': SampleTypeBatterySerializer,
-            'Solids': SampleTypeSolidsSerializer,
-            'Liquid': SampleTypeLiquidSerializer,
-            'Suspension': SampleTypeSuspensionSerializer,
-        }
-        
-        # Pass the serializer class for the chosen sample type to the form
-        kwargs['serializer_class'] = sample_type_serializers.get(sample_type_name.capitalize())
+        sample_type_name = reference_utils.sample_types.get_object(sample_type_id).name
+
+        # Pass the precomputed schema of the chosen sample type to the form
+        kwargs['sample_type'] = get_sample_type_schema(sample_type_name)
         return kwargs
 
     def form_valid(self, form):
@@ -114,12 +155,11 @@ class ExperimentCreateView(LoggingPermissionRequiredMixin, CreateView):
     def get_form(self, *args, **kwargs):
         form = super(ExperimentCreateView, self).get_form(*args, **kwargs)
         # Get the institutes that the current user belongs to
-        user_institutes = self.request.user.institute.all()
+        user_institutes = get_institute_ids(self.request.user)
         # Modify the queryset for the 'staff' field to only include staff that belongs to the user's institutes
         form.fields['staff'].queryset = Staff.objects.filter(
             institute__in=user_institutes)
-        form.fields['method'].queryset = Method.objects.filter(
-            institute__in=user_institutes)
+        form.fields['method'].restrict(lambda method: method.institute_id in user_institutes)
         return form
 
     def form_valid(self, form):
@@ -132,31 +172,34 @@ class ExperimentCreateView(LoggingPermissionRequiredMixin, CreateView):
         return reverse_lazy('experiment_detail', kwargs={'pk': self.object.pk})
 
 
-class ExperimentListView(LoggingPermissionRequiredMixin, ListView):
+class ExperimentListView(LoggingPermissionRequiredMixin, FilteredListMixin, ListView):
     model = Experiment
     template_name = "main/crud/experiment_list.html"
     permission_required = "main.view_experiment"
+    filter_lookups = {'institute_id': 'sample__institute', 'project': 'project',
+                      'sample_type': 'sample__sample_type',
+                      'date_from': 'date_registered__gte', 'date_to': 'date_registered__lt'}
     context_object_name = "experiments"
 
     def get_queryset(self):
-        queryset = Experiment.objects.select_related('sample').all()
+        queryset = Experiment.objects.select_related('sample').order_by('-date_registered', '-id')
 
         sort_by = self.request.GET.get('sort_by', '')
 
         if sort_by == 'name':
-            queryset = queryset.order_by('name')
+            queryset = queryset.order_by('name', 'pk')
         elif sort_by == 'name_desc':
-            queryset = queryset.order_by('-name')
+            queryset = queryset.order_by('-name', '-pk')
         elif sort_by == 'sample':
-            queryset = queryset.order_by('sample__sample_id')
+            queryset = queryset.order_by('sample__sample_id', 'pk')
         elif sort_by == 'sample_desc':
-            queryset = queryset.order_by('-sample__sample_id')
+            queryset = queryset.order_by('-sample__sample_id', '-pk')
         elif sort_by == 'date':
-            queryset = queryset.order_by('date_registered')
+            queryset = queryset.order_by('date_registered', 'pk')
         elif sort_by == 'date_desc':
-            queryset = queryset.order_by('-date_registered')
+            queryset = queryset.order_by('-date_registered', '-pk')
 
-        return queryset
+        return self.filter_queryset(queryset)
 
 
 class ExperimentDetailView(LoggingPermissionRequiredMixin, DetailView):
@@ -176,12 +219,11 @@ class ExperimentUpdateView(LoggingPermissionRequiredMixin, UpdateView):
     def get_form(self, *args, **kwargs):
         form = super(ExperimentUpdateView, self).get_form(*args, **kwargs)
         # Get the institutes that the current user belongs to
-        user_institutes = self.request.user.institute.all()
+        user_institutes = get_institute_ids(self.request.user)
         # Modify the queryset for the 'staff' field to only include staff that belongs to the user's institutes
         form.fields['staff'].queryset = Staff.objects.filter(
             institute__in=user_institutes)
-        form.fields['method'].queryset = Method.objects.filter(
-            institute__in=user_institutes)
+        form.fields['method'].restrict(lambda method: method.institute_id in user_institutes)
         return form
 
     def form_valid(self, form):
@@ -302,7 +344,8 @@ class MethodCreateView(LoggingPermissionRequiredMixin, CreateView):
 
     def get_form(self, *args, **kwargs):
         form = super(MethodCreateView, self).get_form(*args, **kwargs)
-        form.fields['institute'].queryset = self.request.user.institute.all()
+        user_institutes = get_institute_ids(self.request.user)
+        form.fields['institute'].restrict(lambda institute: institute.pk in user_institutes)
         # the AdminGroup is exluded in this list to prevent admins from creating new admins
         return form
 
@@ -310,15 +353,18 @@ class MethodCreateView(LoggingPermissionRequiredMixin, CreateView):
         return reverse_lazy('method_detail', kwargs={'pk': self.object.pk})
 
 
-class MethodListView(LoggingPermissionRequiredMixin, ListView):
+class MethodListView(LoggingPermissionRequiredMixin, FilteredListMixin, ListView):
     model = Method
     template_name = 'main/crud/method_list.html'
     permission_required = "main.view_method"
+    filter_lookups = {'institute_id': 'institute',
+                      'date_from': 'date_registered__gte', 'date_to': 'date_registered__lt'}
     context_object_name = 'methods'
 
     def get_queryset(self):
         queryset = Method.objects.filter(
-            institute__in=self.request.user.institute.all())
+            institute__in=self.request.user.institute.all()
+        ).select_related('institute').order_by('-date_registered', '-id')
 
         only_institute = self.request.GET.get('institute', '')
         if self.request.user.institute != None and only_institute == "true":
@@ -329,15 +375,15 @@ class MethodListView(LoggingPermissionRequiredMixin, ListView):
 
         sort_by = self.request.GET.get('sort_by', '')
         if sort_by == 'name':
-            queryset = queryset.order_by('name')
+            queryset = queryset.order_by('name', 'pk')
         elif sort_by == 'name_desc':
-            queryset = queryset.order_by('-name')
+            queryset = queryset.order_by('-name', '-pk')
         elif sort_by == 'date':
-            queryset = queryset.order_by('date_registered')
+            queryset = queryset.order_by('date_registered', 'pk')
         elif sort_by == 'date_desc':
-            queryset = queryset.order_by('-date_registered')
+            queryset = queryset.order_by('-date_registered', '-pk')
 
-        return queryset
+        return self.filter_queryset(queryset)
 
 
 class MethodDetailView(LoggingPermissionRequiredMixin, DetailView):
@@ -448,10 +494,9 @@ class SampleCreateView(LoggingPermissionRequiredMixin, CreateView):
     # https://stackoverflow.com/questions/48089590/limiting-choices-in-foreign-key-dropdown-in-django-using-generic-views-createv
     def get_form(self, *args, **kwargs):
         form = super(SampleCreateView, self).get_form(*args, **kwargs)
-        user_institutes = self.request.user.institute.all()
-        form.fields['institute'].queryset = user_institutes
-        form.fields['method'].queryset = Method.objects.filter(
-            institute__in=user_institutes)
+        user_institutes = get_institute_ids(self.request.user)
+        form.fields['institute'].restrict(lambda institute: institute.pk in user_institutes)
+        form.fields['method'].restrict(lambda method: method.institute_id in user_institutes)
         form.fields['parent'].queryset = Sample.objects.filter(
             institute__in=user_institutes)
         #form.fields['sample_type'].queryset = SampleType.objects.all()
@@ -478,14 +523,17 @@ class SampleCreateView(LoggingPermissionRequiredMixin, CreateView):
         return reverse_lazy('sample_detail', kwargs={'pk': self.object.pk})
 
 
-class SampleListView(LoggingPermissionRequiredMixin, ListView):
+class SampleListView(LoggingPermissionRequiredMixin, FilteredListMixin, ListView):
     model = Sample
     template_name = 'main/crud/sample_list.html'
     permission_required = "main.view_sample"
+    filter_lookups = {'institute_id': 'institute', 'project': 'project', 'sample_type': 'sample_type',
+                      'date_from': 'date_registered__gte', 'date_to': 'date_registered__lt'}
+    search = staticmethod(search_samples)
     context_object_name = 'samples'
 
     def get_queryset(self):
-        queryset = Sample.objects.all()
+        queryset = Sample.objects.select_related('sample_type', 'project').order_by('-date_registered', '-sample_id')
 
         only_institute = self.request.GET.get('institute', '')
         if self.request.user.institute != None and only_institute == "true":
@@ -496,19 +544,19 @@ class SampleListView(LoggingPermissionRequiredMixin, ListView):
 
         sort_by = self.request.GET.get('sort_by', '')
         if sort_by == 'name':
-            queryset = queryset.order_by('name')
+            queryset = queryset.order_by('name', 'pk')
         elif sort_by == 'name_desc':
-            queryset = queryset.order_by('-name')
+            queryset = queryset.order_by('-name', '-pk')
         elif sort_by == 'sample_id':
             queryset = queryset.order_by('sample_id')
         elif sort_by == 'sample_id_desc':
             queryset = queryset.order_by('-sample_id')
         elif sort_by == 'date':
-            queryset = queryset.order_by('date_registered')
+            queryset = queryset.order_by('date_registered', 'pk')
         elif sort_by == 'date_desc':
-            queryset = queryset.order_by('-date_registered')
+            queryset = queryset.order_by('-date_registered', '-pk')
 
-        return queryset
+        return self.filter_queryset(queryset)
 
 
 class SampleDetailView(LoggingPermissionRequiredMixin, DetailView):
@@ -527,10 +575,9 @@ class SampleUpdateView(LoggingPermissionRequiredMixin, UpdateView):
 
     def get_form(self, *args, **kwargs):
         form = super(SampleUpdateView, self).get_form(*args, **kwargs)
-        user_institutes = self.request.user.institute.all()
-        form.fields['institute'].queryset = user_institutes
-        form.fields['method'].queryset = Method.objects.filter(
-            institute__in=user_institutes)
+        user_institutes = get_institute_ids(self.request.user)
+        form.fields['institute'].restrict(lambda institute: institute.pk in user_institutes)
+        form.fields['method'].restrict(lambda method: method.institute_id in user_institutes)
         form.fields['parent'].queryset = Sample.objects.filter(
             institute__in=user_institutes)
         #form.fields['sample_type'].queryset = SampleType.objects.all()
@@ -577,7 +624,8 @@ class StaffCreateView(LoggingPermissionRequiredMixin, CreateView):
 
     def get_form(self, *args, **kwargs):
         form = super(StaffCreateView, self).get_form(*args, **kwargs)
-        form.fields['institute'].queryset = self.request.user.institute.all()
+        user_institutes = get_institute_ids(self.request.user)
+        form.fields['institute'].restrict(lambda institute: institute.pk in user_institutes)
         # the AdminGroup is exluded in this list to prevent admins from creating new admins
         return form
 
@@ -585,14 +633,16 @@ class StaffCreateView(LoggingPermissionRequiredMixin, CreateView):
         return reverse_lazy('staff_detail', kwargs={'pk': self.object.pk})
 
 
-class StaffListView(LoggingPermissionRequiredMixin, ListView):
+class StaffListView(LoggingPermissionRequiredMixin, FilteredListMixin, ListView):
     model = Staff
     template_name = 'main/crud/staff_list.html'
     permission_required = "main.view_staff"
+    filter_lookups = {'institute_id': 'institute',
+                      'date_from': 'date_registered__gte', 'date_to': 'date_registered__lt'}
     context_object_name = 'staff'
 
     def get_queryset(self):
-        queryset = Staff.objects.all()
+        queryset = Staff.objects.order_by('last_name', 'first_name', 'id')
 
         only_institute = self.request.GET.get('institute', '')
         if self.request.user.institute != None and only_institute == "true":
@@ -603,15 +653,15 @@ class StaffListView(LoggingPermissionRequiredMixin, ListView):
 
         sort_by = self.request.GET.get('sort_by', '')
         if sort_by == 'first_name':
-            queryset = queryset.order_by('first_name')
+            queryset = queryset.order_by('first_name', 'pk')
         elif sort_by == 'first_name_desc':
-            queryset = queryset.order_by('-first_name')
+            queryset = queryset.order_by('-first_name', '-pk')
         elif sort_by == 'last_name':
-            queryset = queryset.order_by('last_name')
+            queryset = queryset.order_by('last_name', 'pk')
         elif sort_by == 'last_name_desc':
-            queryset = queryset.order_by('-last_name')
+            queryset = queryset.order_by('-last_name', '-pk')
 
-        return queryset
+        return self.filter_queryset(queryset)
 
 
 class StaffDetailView(LoggingPermissionRequiredMixin, DetailView):
@@ -665,14 +715,15 @@ class UserCreateView(LoggingPermissionRequiredMixin, CreateView):
         return reverse_lazy('user_detail', kwargs={'pk': self.object.pk})
 
 
-class UserListView(LoggingPermissionRequiredMixin, ListView):
+class UserListView(LoggingPermissionRequiredMixin, FilteredListMixin, ListView):
     model = User
     template_name = 'main/crud/user_list.html'
     permission_required = "main.view_user"
+    filter_lookups = {'institute_id': 'institute', 'date_from': 'date_joined__gte', 'date_to': 'date_joined__lt'}
     context_object_name = 'users'
 
     def get_queryset(self):
-        queryset = User.objects.all()
+        queryset = User.objects.order_by('username')
 
         only_institute = self.request.GET.get('institute', '')
         if self.request.user.institute != None and only_institute == "true":
@@ -683,15 +734,15 @@ class UserListView(LoggingPermissionRequiredMixin, ListView):
 
         sort_by = self.request.GET.get('sort_by', '')
         if sort_by == 'username':
-            queryset = queryset.order_by('username')
+            queryset = queryset.order_by('username', 'pk')
         elif sort_by == 'username_desc':
-            queryset = queryset.order_by('-username')
+            queryset = queryset.order_by('-username', '-pk')
         elif sort_by == 'email':
-            queryset = queryset.order_by('email')
+            queryset = queryset.order_by('email', 'pk')
         elif sort_by == 'email_desc':
-            queryset = queryset.order_by('-email')
+            queryset = queryset.order_by('-email', '-pk')
 
-        return queryset
+        return self.filter_queryset(queryset)
 
 
 class UserDetailView(LoggingPermissionRequiredMixin, DetailView):
@@ -0,0 +1,64 @@
+import json
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from main.models import FundingBody, Institute, Project, Sample, SampleType
+from main.utils.cache_utils import reset_versioned_caches
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # cached lookups must not outlive the database rows of a test
+    cache.clear()
+    reset_versioned_caches()
+    yield
+    cache.clear()
+    reset_versioned_caches()
+
+
+@pytest.fixture
+def user():
+    return get_user_model().objects.create_user(username='harvester', email='harvester@dmlf.de')
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def institute():
+    return Institute.objects.create(name="Institute", street="Street 1", postcode="09599", city="Freiberg",
+                                    telephone="0", email="institute@dmlf.de")
+
+
+@pytest.fixture
+def project():
+    funding_body = FundingBody.objects.create(name="Funding Body")
+    return Project.objects.create(funding_body=funding_body, name="Project", abbreviation="PRJ",
+                                  funding_number="1", funding_period_start=date(2023, 1, 1),
+                                  funding_period_end=date(2025, 1, 1))
+
+
+@pytest.fixture
+def make_sample(user, institute, project):
+    def make_sample(sample_id, sample_type="Solids", parent=None, **sample_info):
+        sample_info = sample_info or {"name": "solid", "weight_in_g": 1.0}
+        return Sample.objects.create(
+            sample_id=sample_id, institute=institute, project=project, user=user, parent=parent,
+            sample_type=SampleType.objects.get(name=sample_type), name=f"sample {sample_id}",
+            date_created=date(2024, 1, 1),
+            sample_info=SimpleUploadedFile("sample_info.json", json.dumps(sample_info).encode()),
+        )
+    return make_sample
@@ -0,0 +1,98 @@
+import io
+import zipfile
+import zlib
+from django.contrib.auth.models import Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from main.models import ArchiveMember, StoredFile
+import pytest
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def sample(make_sample):
+    sample = make_sample("240101_120000_010000")
+    sample.supplementary_file = SimpleUploadedFile("data.zip", make_zip({
+        'data/results.csv': b'a,b\n' + b'1,2\n' * 1000,
+        'data/notes.txt': b'notes',
+        'readme.md': b'# readme',
+    }))
+    sample.save()
+    return sample
+
+
+def member_names(sample):
+    return sorted(ArchiveMember.objects.filter(stored_file__name=sample.supplementary_file.name)
+                  .values_list('name', flat=True))
+
+
+@pytest.mark.django_db
+class TestManifest:
+    def test_members_are_indexed_at_upload(self, sample):
+        member = ArchiveMember.objects.get(name='data/results.csv')
+
+        assert member_names(sample) == ['data/notes.txt', 'data/results.csv', 'readme.md']
+        assert member.size == 4 + 4 * 1000
+        assert member.compressed_size < member.size
+        assert member.crc == zlib.crc32(b'a,b\n' + b'1,2\n' * 1000)
+
+    def test_replaced_archive_is_reindexed(self, sample):
+        sample.supplementary_file = SimpleUploadedFile("other.zip", make_zip({'other.txt': b'other'}))
+        sample.save()
+
+        assert member_names(sample) == ['other.txt']
+
+    def test_other_files_have_no_members(self, sample):
+        assert not StoredFile.objects.get(name=sample.sample_info.name).members.exists()
+
+    def test_command_indexes_unindexed_archives(self, sample):
+        ArchiveMember.objects.all().delete()
+
+        call_command('indexarchives', stdout=io.StringIO())
+
+        assert len(member_names(sample)) == 3
+
+
+@pytest.mark.django_db
+class TestArchiveApi:
+    @pytest.fixture
+    def use_group(self, user):
+        user.groups.add(Group.objects.get_or_create(name='UseGroup')[0])
+
+    def test_lists_members(self, api_client, sample):
+        response = api_client.get(f'/samples/{sample.pk}/archive/', {'prefix': 'data/'})
+
+        assert response.status_code == 200
+        assert [member['name'] for member in response.data['results']] == ['data/results.csv', 'data/notes.txt']
+
+    def test_streams_single_member(self, api_client, sample, use_group):
+        response = api_client.get(f'/samples/{sample.pk}/archive/member/', {'path': 'data/notes.txt'})
+
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == b'notes'
+        assert response['Content-Length'] == '5'
+        assert 'notes.txt' in response['Content-Disposition']
+
+    def test_unknown_member_is_not_found(self, api_client, sample, use_group):
+        response = api_client.get(f'/samples/{sample.pk}/archive/member/', {'path': 'missing.txt'})
+
+        assert response.status_code == 404
+
+    def test_member_download_requires_use_group(self, api_client, sample):
+        response = api_client.get(f'/samples/{sample.pk}/archive/member/', {'path': 'data/notes.txt'})
+
+        assert response.status_code == 403
+
+    def test_entry_without_archive_is_not_found(self, api_client, make_sample):
+        sample = make_sample("240101_120000_010000")
+
+        response = api_client.get(f'/samples/{sample.pk}/archive/')
+
+        assert response.status_code == 404
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import AnonymousUser, Group
+from main.templatetags.template_extras import has_group
+import pytest
+
+
+@pytest.mark.django_db
+class TestHasGroup:
+    def test_group_names_are_loaded_once_per_user_object(self, user, django_assert_num_queries):
+        user.groups.add(Group.objects.create(name='UseGroup'))
+
+        with django_assert_num_queries(1):
+            checks = [has_group(user, name) for name in ['UseGroup', 'CreateGroup', 'AdminGroup'] * 10]
+
+        assert checks[:3] == [True, False, False]
+
+    def test_unknown_group_is_not_an_error(self, user):
+        assert not has_group(user, 'NoSuchGroup')
+
+    def test_anonymous_user_has_no_groups(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert not has_group(AnonymousUser(), 'UseGroup')
@@ -0,0 +1,141 @@
+import hashlib
+import io
+import json
+import zipfile
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from rest_framework import status
+from main.models import Sample, SampleType, StoredFile
+import pytest
+
+
+def make_archive(manifest, files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('manifest.json', json.dumps(manifest))
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return SimpleUploadedFile('batch.zip', buffer.getvalue(), content_type='application/zip')
+
+
+@pytest.fixture
+def manifest_row(institute, project):
+    def manifest_row(sample_id, **kwargs):
+        row = {
+            'sample_id': sample_id, 'name': f"sample {sample_id}", 'date_created': '2024-01-01',
+            'institute': institute.pk, 'project': project.pk,
+            'sample_type': SampleType.objects.get(name="Solids").pk,
+            'sample_info': f"{sample_id}.json",
+        }
+        row.update(kwargs)
+        return row
+    return manifest_row
+
+
+@pytest.mark.django_db
+class TestBulkSampleCreation:
+    def test_batch_is_created_with_files_under_final_names(self, api_client, manifest_row, media_root):
+        manifest = [manifest_row("240101_120000_010000"),
+                    manifest_row("240101_120001_010000", parent="240101_120000_010000")]
+        files = {f"{row['sample_id']}.json": json.dumps({'name': 'solid', 'weight_in_g': 1.0}) for row in manifest}
+
+        response = api_client.post('/samples/bulk/', {'archive': make_archive(manifest, files)}, format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['created'] == ["240101_120000_010000", "240101_120001_010000"]
+        child = Sample.objects.get(pk="240101_120001_010000")
+        assert child.parent_id == "240101_120000_010000"
+        assert child.sample_info.name == "sample_info/240101_120001_010000.json"
+        assert json.load(child.sample_info.open()) == {'name': 'solid', 'weight_in_g': 1.0}
+
+    def test_errors_are_reported_per_row_and_nothing_is_created(self, api_client, manifest_row, make_sample):
+        make_sample("240101_120000_010000")
+        manifest = [manifest_row("240101_120000_010000"),
+                    manifest_row("240101_120001_010000"),
+                    manifest_row("240101_120002_010000", project=9999)]
+        files = {f"{row['sample_id']}.json": json.dumps({'name': 'solid'}) for row in manifest}
+
+        response = api_client.post('/samples/bulk/', {'archive': make_archive(manifest, files)}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        errors = response.data['manifest']
+        assert 'sample_id' in errors[0]
+        assert errors[1] == {'sample_info': ["Invalid JSON structure for the selected sample type."]}
+        assert 'project' in errors[2]
+        assert Sample.objects.count() == 1
+
+    def test_archive_without_manifest_is_rejected(self, api_client):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('readme.txt', 'no manifest')
+        upload = SimpleUploadedFile('batch.zip', buffer.getvalue(), content_type='application/zip')
+
+        response = api_client.post('/samples/bulk/', {'archive': upload}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'archive' in response.data
+
+    def test_supplementary_files_are_inspected(self, api_client, manifest_row, settings):
+        settings.UPLOAD_ZIP_MAX_MEMBERS = 3
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as supplementary:
+            for index in range(4):
+                supplementary.writestr(f"{index}.csv", "a,b\n")
+        manifest = [manifest_row("240101_120000_010000", supplementary_file="data.zip")]
+        files = {"240101_120000_010000.json": json.dumps({'name': 'solid', 'weight_in_g': 1.0}), "data.zip": buffer.getvalue()}
+
+        response = api_client.post('/samples/bulk/', {'archive': make_archive(manifest, files)}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['manifest'][0] == {'supplementary_file': ["The zip file has more than 3 members."]}
+        assert not Sample.objects.exists()
+
+    def test_files_are_saved_next_to_orphans(self, api_client, manifest_row, media_root,
+                                             django_capture_on_commit_callbacks):
+        default_storage.save("sample_info/240101_120000_010000.json", ContentFile(b'orphan'))
+        default_storage.save("supplementary_files/240101_120000_010000.zip", ContentFile(b'orphan'))
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as supplementary:
+            supplementary.writestr("data.csv", "a,b\n")
+        manifest = [manifest_row("240101_120000_010000", supplementary_file="data.zip")]
+        files = {"240101_120000_010000.json": json.dumps({'name': 'solid', 'weight_in_g': 1.0}), "data.zip": buffer.getvalue()}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post('/samples/bulk/', {'archive': make_archive(manifest, files)},
+                                       format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        sample = Sample.objects.get()
+        assert sample.sample_info.name != "sample_info/240101_120000_010000.json"
+        assert json.load(sample.sample_info.open()) == {'name': 'solid', 'weight_in_g': 1.0}
+        assert sample.supplementary_file.read() == buffer.getvalue()
+        assert StoredFile.objects.get(name=sample.supplementary_file.name).sha256 == \
+            hashlib.sha256(buffer.getvalue()).hexdigest()
+
+    def test_blobs_are_only_linked_for_committed_samples(self, api_client, manifest_row, monkeypatch,
+                                                         django_capture_on_commit_callbacks):
+        register = StoredFile.objects.register
+        calls = []
+
+        def fail_second(name, inspection=None):
+            calls.append(name)
+            if len(calls) == 2:
+                raise DatabaseError("connection lost")
+            return register(name, inspection)
+
+        monkeypatch.setattr(StoredFile.objects, 'register', fail_second)
+        manifest = [manifest_row("240101_120000_010000"), manifest_row("240101_120001_010000")]
+        files = {f"{row['sample_id']}.json": json.dumps({'name': 'solid', 'weight_in_g': float(index)})
+                 for index, row in enumerate(manifest, 1)}
+
+        with pytest.raises(DatabaseError):
+            with django_capture_on_commit_callbacks(execute=True):
+                api_client.post('/samples/bulk/', {'archive': make_archive(manifest, files)}, format='multipart')
+
+        # every blob belongs to a file of a saved sample with its record
+        assert Sample.objects.count() == 2
+        blobs = [name for directory in default_storage.listdir('blobs')[0]
+                 for name in default_storage.listdir(f'blobs/{directory}')[1]]
+        assert blobs == list(StoredFile.objects.values_list('sha256', flat=True))
@@ -0,0 +1,75 @@
+import csv
+import io
+import os
+import zipfile
+from django.contrib.auth.models import Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from main.utils.bundle_utils import iter_zip
+from main.utils.file_utils import CHUNK_SIZE
+import pytest
+
+
+def read_bundle(response):
+    return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+
+def test_zip_is_written_in_small_pieces():
+    content = os.urandom(CHUNK_SIZE * 16)
+    chunks = [content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE)]
+
+    pieces = list(iter_zip([('data.bin', chunks), ('notes.txt', [b'notes'] * 3)]))
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(pieces)))
+
+    assert max(len(piece) for piece in pieces) < 2 * CHUNK_SIZE
+    assert archive.read('data.bin') == content
+    assert archive.read('notes.txt') == b'notesnotesnotes'
+    assert archive.getinfo('notes.txt').compress_type == zipfile.ZIP_DEFLATED
+    assert archive.getinfo('data.bin').compress_type == zipfile.ZIP_STORED
+    assert archive.testzip() is None
+
+
+@pytest.mark.django_db
+class TestBundle:
+    @pytest.fixture(autouse=True)
+    def use_group(self, user):
+        user.groups.add(Group.objects.get_or_create(name='UseGroup')[0])
+
+    @pytest.fixture
+    def samples(self, make_sample):
+        parent = make_sample("240101_120000_010000")
+        child = make_sample("240101_120001_010000", parent=parent)
+        child.supplementary_file = SimpleUploadedFile("data.zip", b'PK\x05\x06' + b'\0' * 18)
+        child.save()
+        make_sample("240101_120002_010000")
+        return parent, child
+
+    def test_bundles_files_and_metadata_of_a_project(self, api_client, samples, project):
+        response = api_client.get('/samples/bundle/', {'project': project.pk})
+        bundle = read_bundle(response)
+
+        assert response['Content-Type'] == 'application/zip'
+        assert sorted(bundle.namelist()) == [
+            'experiments.csv', 'sample_info/240101_120000_010000.json', 'sample_info/240101_120001_010000.json',
+            'sample_info/240101_120002_010000.json', 'samples.csv', 'supplementary_files/240101_120001_010000.zip',
+        ]
+        rows = list(csv.DictReader(io.StringIO(bundle.read('samples.csv').decode())))
+        assert [row['sample_id'] for row in rows] == ["240101_120000_010000", "240101_120001_010000",
+                                                     "240101_120002_010000"]
+        assert bundle.read('sample_info/240101_120000_010000.json') == samples[0].sample_info.open('rb').read()
+
+    def test_bundles_a_sample_subtree(self, api_client, samples):
+        response = api_client.get('/samples/bundle/', {'sample': "240101_120000_010000"})
+
+        assert sorted(name for name in read_bundle(response).namelist() if name.startswith('sample_info/')) == [
+            'sample_info/240101_120000_010000.json', 'sample_info/240101_120001_010000.json']
+
+    def test_requires_a_criterion(self, api_client, samples):
+        assert api_client.get('/samples/bundle/').status_code == 400
+
+    def test_invalid_criterion_is_rejected(self, api_client, samples):
+        assert api_client.get('/samples/bundle/', {'date_from': "yesterday"}).status_code == 400
+
+    def test_requires_use_group(self, api_client, samples, user, project):
+        user.groups.clear()
+
+        assert api_client.get('/samples/bundle/', {'project': project.pk}).status_code == 403
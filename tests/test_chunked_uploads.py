@@ -0,0 +1,210 @@
+import hashlib
+import io
+import zipfile
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from main.models import ArchiveMember, Sample, StoredFile, UploadSession
+from main.utils.upload_utils import UploadOffsetError, append_chunk, start_upload
+import pytest
+
+
+def make_zip(content):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('data.csv', content)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def sample(make_sample):
+    return make_sample("240101_120000_010000")
+
+
+@pytest.fixture
+def start(api_client, sample):
+    def start(data):
+        response = api_client.post('/uploads/', {'sample': sample.pk, 'filename': "data.zip", 'size': len(data)},
+                                   format='json')
+        assert response.status_code == 201
+        return response.data['id']
+    return start
+
+
+def put_chunk(api_client, upload_id, offset, chunk):
+    return api_client.put(f'/uploads/{upload_id}/chunk/', chunk, content_type='application/offset+octet-stream',
+                          HTTP_UPLOAD_OFFSET=str(offset))
+
+
+def finalize(api_client, upload_id, data):
+    return api_client.post(f'/uploads/{upload_id}/finalize/', {'sha256': hashlib.sha256(data).hexdigest()},
+                           format='json')
+
+
+@pytest.mark.django_db
+class TestChunkedUpload:
+    def test_chunks_are_assembled_and_bound_to_the_sample(self, api_client, sample, start):
+        data = make_zip(b'a,b\n' * 1000)
+        upload_id = start(data)
+
+        for offset in range(0, len(data), 1000):
+            response = put_chunk(api_client, upload_id, offset, data[offset:offset + 1000])
+            assert response.data['offset'] == min(offset + 1000, len(data))
+        response = finalize(api_client, upload_id, data)
+
+        assert response.status_code == 200
+        assert response.data['file'] == "supplementary_files/240101_120000_010000.zip"
+        assert Sample.objects.get().supplementary_file.name == response.data['file']
+        assert default_storage.open(response.data['file']).read() == data
+        assert StoredFile.objects.get(name=response.data['file']).sha256 == hashlib.sha256(data).hexdigest()
+        assert ArchiveMember.objects.filter(name='data.csv').exists()
+        assert not UploadSession.objects.exists()
+        assert not default_storage.listdir('uploads')[1]
+
+    def test_chunk_at_wrong_offset_is_rejected_with_current_offset(self, api_client, start):
+        data = make_zip(b'a,b\n')
+        upload_id = start(data)
+        put_chunk(api_client, upload_id, 0, data[:10])
+
+        response = put_chunk(api_client, upload_id, 20, data[20:])
+
+        assert response.status_code == 409
+        assert response.data['offset'] == 10
+        assert response['Upload-Offset'] == '10'
+
+    def test_interrupted_chunk_resumes_after_received_bytes(self, user, sample):
+        class BrokenStream(io.BytesIO):
+            def read(self, size=-1):
+                if self.tell() >= 10:
+                    raise OSError("connection reset")
+                return super().read(min(size, 10))
+
+        data = make_zip(b'a,b\n')
+        session = UploadSession.objects.create(user=user, sample=sample, filename="data.zip", size=len(data))
+        start_upload(session)
+
+        assert append_chunk(session, 0, BrokenStream(data), len(data)) == 10
+        assert append_chunk(session, 10, io.BytesIO(data[10:]), len(data) - 10) == len(data)
+        assert default_storage.open(session.part_name).read() == data
+
+    def test_chunk_is_received_without_holding_the_session(self, user, sample):
+        data = make_zip(b'a,b\n')
+        session = UploadSession.objects.create(user=user, sample=sample, filename="data.zip", size=len(data))
+        start_upload(session)
+        concurrent = []
+
+        class ObservedStream(io.BytesIO):
+            def read(self, size=-1):
+                # a second request for the same upload is turned away at once instead of waiting
+                other = UploadSession.objects.get()
+                with pytest.raises(UploadOffsetError) as error:
+                    append_chunk(other, 0, io.BytesIO(data), len(data))
+                concurrent.append(error.value.offset)
+                return super().read(size)
+
+        assert append_chunk(session, 0, ObservedStream(data), len(data)) == len(data)
+        assert concurrent and concurrent[0] == 0
+        session = UploadSession.objects.get()
+        assert session.offset == len(data) and session.date_claimed is None
+
+    def test_upload_resumes_minutes_after_an_abandoned_claim(self, api_client, start):
+        data = make_zip(b'a,b\n')
+        upload_id = start(data)
+        put_chunk(api_client, upload_id, 0, data[:10])
+        # a worker was killed while it received the next chunk
+        UploadSession.objects.update(date_claimed=timezone.now() - timedelta(minutes=2))
+
+        response = put_chunk(api_client, upload_id, 10, data[10:])
+
+        assert response.status_code == 200
+        assert finalize(api_client, upload_id, data).status_code == 200
+
+    def test_claim_is_renewed_while_the_chunk_arrives(self, user, sample, settings):
+        settings.UPLOAD_CLAIM_TIMEOUT = 0
+        data = make_zip(b'a,b\n')
+        session = UploadSession.objects.create(user=user, sample=sample, filename="data.zip", size=len(data))
+        start_upload(session)
+        claims = []
+
+        class SlowStream(io.BytesIO):
+            def read(self, size=-1):
+                claims.append(UploadSession.objects.get().date_claimed)
+                return super().read(min(size, 10))
+
+        append_chunk(session, 0, SlowStream(data), len(data))
+
+        assert len(set(claims)) > 1
+
+    def test_request_stops_when_its_claim_was_taken_over(self, user, sample):
+        data = make_zip(b'a,b\n')
+        session = UploadSession.objects.create(user=user, sample=sample, filename="data.zip", size=len(data))
+        start_upload(session)
+
+        class TakenOverStream(io.BytesIO):
+            def read(self, size=-1):
+                # another request took over the expired claim
+                UploadSession.objects.update(date_claimed=timezone.now() - timedelta(minutes=10))
+                return super().read(size)
+
+        with pytest.raises(UploadOffsetError):
+            append_chunk(session, 0, TakenOverStream(data), len(data))
+        assert UploadSession.objects.get().offset == 0
+
+    def test_claimed_upload_rejects_chunks(self, api_client, start):
+        data = make_zip(b'a,b\n')
+        upload_id = start(data)
+        UploadSession.objects.update(date_claimed=timezone.now())
+
+        response = put_chunk(api_client, upload_id, 0, data)
+
+        assert response.status_code == 409
+        assert response.data['offset'] == 0
+        assert UploadSession.objects.get().offset == 0
+
+    def test_non_zip_is_rejected_with_first_chunk(self, api_client, start):
+        upload_id = start(b'not a zip file')
+
+        response = put_chunk(api_client, upload_id, 0, b'not a')
+
+        assert response.status_code == 400
+        assert UploadSession.objects.get().offset == 0
+
+    def test_incomplete_upload_cannot_be_finalized(self, api_client, start):
+        data = make_zip(b'a,b\n')
+        upload_id = start(data)
+        put_chunk(api_client, upload_id, 0, data[:10])
+
+        response = finalize(api_client, upload_id, data)
+
+        assert response.status_code == 409
+        assert response.data['offset'] == 10
+
+    def test_checksum_mismatch_discards_upload(self, api_client, start):
+        data = make_zip(b'a,b\n')
+        upload_id = start(data)
+        put_chunk(api_client, upload_id, 0, data)
+
+        response = finalize(api_client, upload_id, data + b'x')
+
+        assert response.status_code == 400
+        assert not UploadSession.objects.exists()
+
+    def test_replacing_a_deduplicated_file_keeps_the_other_copy(self, api_client, make_sample, sample, start):
+        old = make_zip(b'old')
+        for each in (sample, make_sample("240101_120001_010000")):
+            each.supplementary_file = SimpleUploadedFile("old.zip", old)
+            each.save()
+        data = make_zip(b'new')
+        upload_id = start(data)
+        put_chunk(api_client, upload_id, 0, data)
+
+        finalize(api_client, upload_id, data)
+
+        assert default_storage.open("supplementary_files/240101_120000_010000.zip").read() == data
+        assert default_storage.open("supplementary_files/240101_120001_010000.zip").read() == old
+
+    def test_upload_needs_a_single_target(self, api_client, sample):
+        response = api_client.post('/uploads/', {'filename': "data.zip", 'size': 10}, format='json')
+
+        assert response.status_code == 400
@@ -0,0 +1,148 @@
+import hashlib
+import os
+from django.contrib.auth.models import Group
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import Client
+from django.utils.http import http_date
+from main.models import StoredFile
+import pytest
+
+
+@pytest.fixture
+def web_client(user):
+    user.groups.add(Group.objects.get_or_create(name='UseGroup')[0])
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+@pytest.fixture
+def stored_file(db):
+    name = default_storage.save('experiment_files/1.zip', ContentFile(b'0123456789' * 10))
+    StoredFile.objects.register(name)
+    return name
+
+
+@pytest.mark.django_db
+class TestDownloadFile:
+    def test_python_backend_streams_the_file(self, web_client, stored_file):
+        response = web_client.get('/media/experiment_files/1.zip/')
+
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content) == b'0123456789' * 10
+
+    def test_nginx_backend_hands_off_to_the_proxy(self, web_client, stored_file, settings):
+        settings.FILE_DOWNLOAD_BACKEND = 'nginx'
+
+        response = web_client.get('/media/experiment_files/1.zip/')
+
+        assert response.status_code == 200
+        assert response['X-Accel-Redirect'] == '/protected-media/experiment_files/1.zip'
+        assert response['Content-Disposition'] == 'attachment; filename="1.zip"'
+        assert response.content == b''
+
+    def test_apache_backend_hands_off_to_the_proxy(self, web_client, stored_file, settings):
+        settings.FILE_DOWNLOAD_BACKEND = 'apache'
+
+        response = web_client.get('/media/experiment_files/1.zip/')
+
+        assert response['X-Sendfile'] == default_storage.path('experiment_files/1.zip')
+
+    def test_users_outside_use_group_are_rejected(self, user, stored_file):
+        client = Client()
+        client.force_login(user)
+
+        response = client.get('/media/experiment_files/1.zip/')
+
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestConditionalAndRangeDownloads:
+    url = '/media/experiment_files/1.zip/'
+
+    def test_etag_is_the_content_hash(self, web_client, stored_file):
+        response = web_client.get(self.url)
+
+        assert response['ETag'] == f'"{hashlib.sha256(b"0123456789" * 10).hexdigest()}"'
+        assert response['Accept-Ranges'] == 'bytes'
+        assert 'Last-Modified' in response
+
+    def test_unregistered_file_is_not_hashed_while_downloading(self, web_client):
+        default_storage.save('experiment_files/2.zip', ContentFile(b'0123456789'))
+
+        response = web_client.get('/media/experiment_files/2.zip/')
+
+        assert response.status_code == 200
+        assert 'ETag' not in response and 'Last-Modified' in response
+        assert not StoredFile.objects.exists()
+
+    def test_rewritten_file_of_the_same_size_has_no_stale_etag(self, web_client, stored_file):
+        path = default_storage.path(stored_file)
+        etag = web_client.get(self.url)['ETag']
+        with open(path, 'wb') as file:
+            file.write(b'9876543210' * 10)
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+        response = web_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert 'ETag' not in response
+
+    def test_matching_etag_returns_304(self, web_client, stored_file):
+        etag = web_client.get(self.url)['ETag']
+
+        response = web_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+
+    def test_single_range(self, web_client, stored_file):
+        response = web_client.get(self.url, HTTP_RANGE='bytes=5-14')
+
+        assert response.status_code == 206
+        assert response['Content-Range'] == 'bytes 5-14/100'
+        assert b"".join(response.streaming_content) == b'5678901234'
+
+    def test_suffix_and_open_ranges(self, web_client, stored_file):
+        assert b"".join(web_client.get(self.url, HTTP_RANGE='bytes=-3').streaming_content) == b'789'
+        assert b"".join(web_client.get(self.url, HTTP_RANGE='bytes=97-').streaming_content) == b'789'
+
+    def test_multiple_ranges(self, web_client, stored_file):
+        response = web_client.get(self.url, HTTP_RANGE='bytes=0-1,10-11')
+
+        body = b"".join(response.streaming_content)
+        assert response.status_code == 206
+        assert response['Content-Type'].startswith('multipart/byteranges; boundary=')
+        assert int(response['Content-Length']) == len(body)
+        assert b'Content-Range: bytes 0-1/100\r\n\r\n01\r\n' in body
+        assert b'Content-Range: bytes 10-11/100\r\n\r\n01\r\n' in body
+
+    def test_unsatisfiable_range_returns_416(self, web_client, stored_file):
+        response = web_client.get(self.url, HTTP_RANGE='bytes=200-300')
+
+        assert response.status_code == 416
+        assert response['Content-Range'] == 'bytes */100'
+
+    def test_stale_if_range_sends_the_whole_file(self, web_client, stored_file):
+        response = web_client.get(self.url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"outdated"')
+
+        assert response.status_code == 200
+
+    def test_suffix_range_of_an_empty_file_returns_416(self, web_client):
+        default_storage.save('experiment_files/1.zip', ContentFile(b''))
+
+        response = web_client.get(self.url, HTTP_RANGE='bytes=-10')
+
+        assert response.status_code == 416
+        assert response['Content-Range'] == 'bytes */0'
+
+    def test_if_range_date_must_match_last_modified(self, web_client, stored_file):
+        last_modified = int(os.path.getmtime(default_storage.path(stored_file)))
+
+        matching = web_client.get(self.url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=http_date(last_modified))
+        later = web_client.get(self.url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=http_date(last_modified + 60))
+
+        assert matching.status_code == 206
+        assert later.status_code == 200
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, RequestFactory
+from django.utils import timezone
+from main.models import OutgoingEmail
+from main.utils.email_utils import queue_email, send_initial_reset_email, send_queued_emails
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def email_backend(settings):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class BrokenBackend:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def send_messages(self, messages):
+        raise ConnectionError("mail API unreachable")
+
+
+class ObservingBackend(BrokenBackend):
+    # sends while checking that the batch was claimed and committed before
+    observed = []
+
+    def send_messages(self, messages):
+        email = OutgoingEmail.objects.get()
+        self.observed.append((email.attempts, email.next_attempt, send_queued_emails()))
+        return len(messages)
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+    def test_contact_form_only_queues_the_email(self):
+        response = Client().post('/contact/', {'name': 'Ada', 'email': 'ada@dmlf.de', 'message': 'Hello'})
+
+        assert response.status_code == 302
+        assert mail.outbox == []
+        email = OutgoingEmail.objects.get()
+        assert email.reply_to == ['ada@dmlf.de']
+        assert 'Hello' in email.body
+
+    def test_worker_sends_due_emails(self):
+        queue_email("Subject", "Body", "info@dmlf.de", ["ada@dmlf.de"], reply_to=["bob@dmlf.de"])
+
+        call_command('sendemails', '--once')
+
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ["ada@dmlf.de"]
+        assert mail.outbox[0].reply_to == ["bob@dmlf.de"]
+        assert OutgoingEmail.objects.get().status == OutgoingEmail.SENT
+
+    def test_emails_are_sent_in_batches(self):
+        for i in range(3):
+            queue_email(f"Subject {i}", "Body", "info@dmlf.de", ["ada@dmlf.de"])
+
+        assert send_queued_emails(batch_size=2) == (2, 0)
+        assert send_queued_emails(batch_size=2) == (1, 0)
+        assert send_queued_emails(batch_size=2) == (0, 0)
+
+    def test_failed_emails_are_retried_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_email_outbox.BrokenBackend'
+        settings.EMAIL_RETRY_DELAY = 60
+        queue_email("Subject", "Body", "info@dmlf.de", ["ada@dmlf.de"])
+
+        assert send_queued_emails() == (0, 1)
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.PENDING
+        assert email.next_attempt > timezone.now() + timedelta(seconds=50)
+        assert 'mail API unreachable' in email.last_error
+        # not due yet
+        assert send_queued_emails() == (0, 0)
+
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        send_queued_emails()
+        assert OutgoingEmail.objects.get().next_attempt > timezone.now() + timedelta(seconds=110)
+
+    def test_emails_fail_after_max_attempts(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_email_outbox.BrokenBackend'
+        settings.EMAIL_MAX_ATTEMPTS = 1
+        queue_email("Subject", "Body", "info@dmlf.de", ["ada@dmlf.de"])
+
+        send_queued_emails()
+
+        assert OutgoingEmail.objects.get().status == OutgoingEmail.FAILED
+
+    def test_batch_is_claimed_before_it_is_sent(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_email_outbox.ObservingBackend'
+        ObservingBackend.observed.clear()
+        queue_email("Subject", "Body", "info@dmlf.de", ["ada@dmlf.de"])
+
+        assert send_queued_emails() == (1, 0)
+
+        attempts, next_attempt, concurrent = ObservingBackend.observed[0]
+        assert attempts == 1
+        assert next_attempt > timezone.now() + timedelta(seconds=settings.EMAIL_SEND_TIMEOUT - 10)
+        # another worker finds nothing to send
+        assert concurrent == (0, 0)
+        assert OutgoingEmail.objects.get().status == OutgoingEmail.SENT
+
+    def test_password_reset_link_is_not_stored(self, user):
+        request = RequestFactory().get('/', HTTP_HOST='dmlf.de')
+        send_initial_reset_email(request, user)
+
+        email = OutgoingEmail.objects.get()
+        token = PasswordResetTokenGenerator().make_token(user)
+        assert token not in email.body
+        assert '{password_reset_link}' in email.body
+
+        send_queued_emails()
+
+        body = mail.outbox[0].body
+        link = body[body.index('http://dmlf.de/reset/'):].split()[0]
+        uid, token = link.rstrip('/').split('/')[-2:]
+        assert PasswordResetTokenGenerator().check_token(user, token)
+        assert '{password_reset_link}' not in body
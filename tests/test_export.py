@@ -0,0 +1,68 @@
+import csv
+import io
+import itertools
+import json
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework import status
+from main.models import Sample
+from main.utils.export_utils import iter_csv, iter_ndjson
+import pytest
+
+
+def streamed(response):
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestSampleExport:
+    def test_ndjson_export_streams_one_line_per_sample(self, api_client, make_sample):
+        make_sample("240101_120000_010000")
+        make_sample("240101_120001_010000")
+
+        response = api_client.get('/samples/export/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in streamed(response).splitlines()]
+        assert [row['sample_id'] for row in rows] == ["240101_120000_010000", "240101_120001_010000"]
+
+    def test_csv_export_has_header_row(self, api_client, make_sample):
+        make_sample("240101_120000_010000")
+
+        response = api_client.get('/samples/export/', {'format': 'csv'})
+
+        rows = list(csv.DictReader(io.StringIO(streamed(response))))
+        assert response['Content-Type'] == 'text/csv'
+        assert rows[0]['sample_id'] == "240101_120000_010000"
+        assert rows[0]['sample_info'] == "sample_info/240101_120000_010000.json"
+
+    def test_since_only_exports_newer_samples(self, api_client, make_sample):
+        make_sample("240101_120000_010000")
+        Sample.objects.update(date_registered=timezone.now() - timedelta(days=2))
+        make_sample("240101_120001_010000")
+
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = api_client.get('/samples/export/', {'since': since})
+
+        rows = [json.loads(line) for line in streamed(response).splitlines()]
+        assert [row['sample_id'] for row in rows] == ["240101_120001_010000"]
+
+    @pytest.mark.parametrize('since', ['yesterday', '2024-13-45', '2024-01-01T25:00:00'])
+    def test_invalid_since_is_rejected(self, api_client, since):
+        response = api_client.get('/samples/export/', {'since': since})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize('iterate, pieces', [
+    (lambda rows: iter_ndjson(rows, chunk_size=1000), 1),
+    # header and first row
+    (lambda rows: iter_csv(rows, ['sample_id'], chunk_size=1000), 2),
+])
+def test_first_row_is_sent_before_the_batch_is_filled(iterate, pieces):
+    def rows():
+        yield {'sample_id': "240101_120000_010000"}
+        raise AssertionError("the second row was read before the first was sent")
+
+    assert "240101_120000_010000" in "".join(itertools.islice(iterate(rows()), pieces))
@@ -0,0 +1,49 @@
+from rest_framework import status
+from main.api import SampleViewSet
+import pytest
+
+
+@pytest.fixture
+def sample_tree(make_sample):
+    # origin -> (child_a -> grandchild, child_b)
+    origin = make_sample("240101_120000_010000")
+    child_a = make_sample("240101_120001_010000", parent=origin)
+    make_sample("240101_120002_010000", parent=origin)
+    make_sample("240101_120003_010000", parent=child_a)
+    return origin
+
+
+@pytest.mark.django_db
+class TestSampleLineage:
+    def test_descendants_are_returned_with_depth(self, api_client, sample_tree):
+        response = api_client.get(f'/samples/{sample_tree.pk}/lineage/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [(node['sample_id'], node['depth']) for node in response.data] == [
+            ("240101_120000_010000", 0), ("240101_120001_010000", 1),
+            ("240101_120002_010000", 1), ("240101_120003_010000", 2),
+        ]
+        assert response.data[0]['experiments'] == []
+
+    def test_depth_limits_the_walk(self, api_client, sample_tree):
+        response = api_client.get(f'/samples/{sample_tree.pk}/lineage/', {'depth': 1})
+
+        assert len(response.data) == 3
+
+    def test_ancestors(self, api_client, sample_tree):
+        response = api_client.get('/samples/240101_120003_010000/lineage/', {'direction': 'up'})
+
+        assert [node['sample_id'] for node in response.data] == [
+            "240101_120003_010000", "240101_120001_010000", "240101_120000_010000"]
+
+    def test_lineage_uses_a_constant_number_of_queries(self, api_client, sample_tree, django_assert_max_num_queries,
+                                                       monkeypatch):
+        # without the queries of the throttle counters
+        monkeypatch.setattr(SampleViewSet, 'throttle_classes', [])
+        with django_assert_max_num_queries(3):
+            api_client.get(f'/samples/{sample_tree.pk}/lineage/')
+
+    def test_unknown_sample_returns_404(self, api_client):
+        response = api_client.get('/samples/240101_120009_010000/lineage/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from django.contrib.auth.models import Permission
+from django.test import Client
+from django.utils import timezone
+from main.models import Sample, SampleType
+from main.views import SampleListView
+import pytest
+
+
+@pytest.fixture
+def web_client(user):
+    user.user_permissions.add(Permission.objects.get(codename='view_sample'))
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def listed(response):
+    return [sample.sample_id for sample in response.context['samples']]
+
+
+@pytest.mark.django_db
+class TestSampleListView:
+    def test_list_is_paginated(self, web_client, make_sample, monkeypatch):
+        monkeypatch.setattr(SampleListView, 'paginate_by', 2)
+        for i in range(3):
+            make_sample(f"240101_12000{i}_010000")
+
+        first = web_client.get('/sample/')
+        second = web_client.get('/sample/', {'page': 2})
+
+        assert listed(first) == ["240101_120002_010000", "240101_120001_010000"]
+        assert listed(second) == ["240101_120000_010000"]
+        assert first.context['paginator'].count == 3
+
+    def test_filters_by_sample_type_and_date(self, web_client, make_sample):
+        make_sample("240101_120000_010000", sample_type="Solids")
+        make_sample("240101_120001_010000", sample_type="Liquid", name="liquid", density_in_gccm=1.0)
+        make_sample("240101_120002_010000", sample_type="Liquid", name="liquid", density_in_gccm=1.0)
+        Sample.objects.filter(pk="240101_120002_010000").update(
+            date_registered=timezone.now() - timedelta(days=3))
+        liquid = SampleType.objects.get(name="Liquid")
+
+        response = web_client.get('/sample/', {'sample_type': liquid.pk,
+                                                    'date_from': timezone.localdate().isoformat()})
+
+        assert listed(response) == ["240101_120001_010000"]
+
+    def test_invalid_filter_value_is_ignored(self, web_client, make_sample):
+        make_sample("240101_120000_010000")
+
+        response = web_client.get('/sample/', {'project': 999})
+
+        assert listed(response) == ["240101_120000_010000"]
+
+    def test_query_count_does_not_grow_with_the_rows(self, web_client, make_sample, django_assert_max_num_queries):
+        for i in range(5):
+            make_sample(f"240101_12000{i}_010000")
+        web_client.get('/sample/')
+
+        with django_assert_max_num_queries(12):
+            web_client.get('/sample/')
+
+    def test_count_of_filtered_list_is_capped(self, web_client, make_sample, project, settings):
+        settings.LIST_EXACT_COUNT_LIMIT = 1
+        make_sample("240101_120000_010000")
+        make_sample("240101_120001_010000")
+
+        response = web_client.get('/sample/', {'project': project.pk})
+
+        assert response.context['paginator'].count == 1
+        assert response.context['paginator'].count_is_estimate
+        assert b"About 1 entries" in response.content
+
+    def test_pages_past_a_capped_count_are_reachable(self, web_client, make_sample, project, settings,
+                                                    monkeypatch):
+        settings.LIST_EXACT_COUNT_LIMIT = 1
+        monkeypatch.setattr(SampleListView, 'paginate_by', 1)
+        for i in range(3):
+            make_sample(f"240101_12000{i}_010000")
+
+        pages = [web_client.get('/sample/', {'project': project.pk, 'page': page}) for page in (1, 2, 3, 4)]
+
+        assert [response.status_code for response in pages] == [200, 200, 200, 404]
+        assert [response.context['page_obj'].has_next() for response in pages[:3]] == [True, True, False]
+        assert pages[2].context['page_obj'].end_index() == 3
+
+    def test_pages_past_a_low_estimate_are_reachable(self, web_client, make_sample, settings, monkeypatch):
+        settings.LIST_EXACT_COUNT_LIMIT = 0
+        monkeypatch.setattr(SampleListView, 'paginate_by', 1)
+        # statistics that were not updated since the table held a single row
+        monkeypatch.setattr('main.pagination.get_estimated_count', lambda model, using: 1)
+        for i in range(2):
+            make_sample(f"240101_12000{i}_010000")
+
+        response = web_client.get('/sample/', {'page': 2})
+
+        assert response.status_code == 200
+        assert response.context['paginator'].count == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/experiment/', '/method/', '/staff/', '/user/'])
+def test_list_views_render_filter_form_and_pages(url, user):
+    user.is_superuser = True
+    user.save()
+    client = Client()
+    client.force_login(user)
+
+    response = client.get(url, {'institute_id': 999, 'date_to': '2024-01-01'})
+
+    assert response.status_code == 200
+    assert 'institute_id' in response.context['filter_form'].fields
+    assert response.context['page_obj'].number == 1
@@ -0,0 +1,77 @@
+import logging
+import logging.config
+from main.utils.log_utils import QueueListenerHandler, RateLimitFilter
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(msg, **extra):
+    record = logging.LogRecord('main.views', logging.WARNING, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestQueueListenerHandler:
+    def test_records_are_handed_to_the_targets_by_the_listener(self):
+        target = ListHandler()
+        handler = QueueListenerHandler([target])
+        logger = logging.getLogger('tests.queue')
+        logger.addHandler(handler)
+        try:
+            logger.warning("access by %s", "harvester")
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+        assert [record.getMessage() for record in target.records] == ["access by harvester"]
+
+    def test_targets_are_configured_from_dicts(self, tmp_path):
+        logging.config.dictConfig({
+            'version': 1,
+            'disable_existing_loggers': False,
+            'formatters': {'short': {'format': '%(levelname)s %(message)s'}},
+            'handlers': {
+                'queue': {
+                    '()': 'main.utils.log_utils.QueueListenerHandler',
+                    'handlers': [{'class': 'logging.FileHandler', 'filename': str(tmp_path / 'test.log'),
+                                  'formatter': 'short'}],
+                },
+            },
+            'loggers': {'tests.configured': {'handlers': ['queue'], 'propagate': False}},
+        })
+        logger = logging.getLogger('tests.configured')
+        handler = logger.handlers[0]
+        logger.error("disk full")
+        logger.removeHandler(handler)
+        handler.close()
+
+        assert (tmp_path / 'test.log').read_text() == "ERROR disk full\n"
+
+
+class TestRateLimitFilter:
+    def test_repeated_records_per_key_are_collapsed(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr('main.utils.log_utils.time.monotonic', lambda: now[0])
+        rate_limit = RateLimitFilter(period=60)
+
+        passed = [rate_limit.filter(make_record("denied", rate_limit_key="unauthorized:1.2.3.4")) for _ in range(3)]
+        other_ip = rate_limit.filter(make_record("denied", rate_limit_key="unauthorized:5.6.7.8"))
+        now[0] += 61
+        later = make_record("denied", rate_limit_key="unauthorized:1.2.3.4")
+
+        assert passed == [True, False, False]
+        assert other_ip
+        assert rate_limit.filter(later)
+        assert later.getMessage() == "denied (2 similar messages suppressed)"
+
+    def test_records_without_key_always_pass(self):
+        rate_limit = RateLimitFilter(period=60)
+
+        assert all(rate_limit.filter(make_record("started")) for _ in range(3))
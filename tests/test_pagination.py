@@ -0,0 +1,46 @@
+from rest_framework import status
+from main.models import Experiment, FundingBody, Sample
+from main.pagination import DateRegisteredCursorPagination, IdCursorPagination
+import pytest
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    def test_list_is_paginated_with_cursor_links(self, api_client):
+        FundingBody.objects.bulk_create([FundingBody(name=f"Funding Body {i}") for i in range(5)])
+
+        response = api_client.get('/fundingbodies/', {'page_size': 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 2
+        assert response.data['previous'] is None
+        assert 'cursor=' in response.data['next']
+
+    def test_following_cursors_returns_every_entry_once(self, api_client):
+        FundingBody.objects.bulk_create([FundingBody(name=f"Funding Body {i}") for i in range(5)])
+
+        names = []
+        url = '/fundingbodies/?page_size=2'
+        while url:
+            response = api_client.get(url)
+            names += [entry['name'] for entry in response.data['results']]
+            url = response.data['next']
+
+        assert names == [f"Funding Body {i}" for i in range(5)]
+
+    def test_page_size_is_capped(self, api_client, monkeypatch):
+        monkeypatch.setattr(IdCursorPagination, 'max_page_size', 3)
+        FundingBody.objects.bulk_create([FundingBody(name=f"Funding Body {i}") for i in range(5)])
+
+        response = api_client.get('/fundingbodies/', {'page_size': 10000})
+
+        assert len(response.data['results']) == 3
+
+
+@pytest.mark.parametrize('model', [Sample, Experiment])
+def test_keyset_index_matches_the_cursor_ordering(model):
+    # the index serves the ORDER BY and the keyset predicate only in the direction of the ordering
+    ordering = [field.replace('pk', model._meta.pk.name) for field in DateRegisteredCursorPagination.ordering]
+    index_fields = [index.fields for index in model._meta.indexes if index.name.endswith('date_registered_idx')]
+
+    assert index_fields == [ordering]
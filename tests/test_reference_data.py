@@ -0,0 +1,65 @@
+from main.forms import SampleForm
+from main.models import Institute, SampleType
+from main.serializers.main_serializers import SampleSerializer
+from main.utils.cache_utils import increment_version
+from main.utils.reference_utils import get_reference_data_name, sample_types
+import pytest
+
+
+@pytest.mark.django_db
+class TestReferenceData:
+    def test_lookups_are_served_from_the_cache(self, django_assert_num_queries):
+        solids = SampleType.objects.get(name="Solids")
+        sample_types.get_object(solids.pk)
+
+        with django_assert_num_queries(0):
+            assert sample_types.get_object(str(solids.pk)) == solids
+            assert sample_types.get_by_name("Solids") == solids
+
+    def test_saves_and_deletes_invalidate_the_cache(self, django_capture_on_commit_callbacks):
+        assert sample_types.all()
+        with django_capture_on_commit_callbacks(execute=True):
+            sample_type = SampleType.objects.create(name="Powder")
+        assert sample_types.get_by_name("Powder") == sample_type
+
+        with django_capture_on_commit_callbacks(execute=True):
+            sample_type.delete()
+        with pytest.raises(SampleType.DoesNotExist):
+            sample_types.get_by_name("Powder")
+
+    def test_rows_added_by_other_processes_are_found(self):
+        assert sample_types.all()
+        # created and invalidated by another process: only the version in the database changes
+        sample_type = SampleType.objects.create(name="Powder")
+        increment_version(get_reference_data_name(SampleType))
+
+        assert sample_types.get_object(sample_type.pk) == sample_type
+        assert SampleSerializer().fields['sample_type'].to_internal_value(sample_type.pk) == sample_type
+
+    def test_unknown_pk_raises_does_not_exist(self):
+        with pytest.raises(SampleType.DoesNotExist):
+            sample_types.get_object("not a pk")
+
+
+@pytest.mark.django_db
+class TestReferenceFields:
+    def test_form_choices_can_be_restricted(self, institute):
+        other = Institute.objects.create(name="Other", street="Street 2", postcode="09599", city="Freiberg",
+                                         telephone="0", email="other@dmlf.de")
+        form = SampleForm(data={'institute': other.pk})
+        form.fields['institute'].restrict(lambda obj: obj.pk == institute.pk)
+
+        assert [choice for choice, _ in form.fields['institute'].choices][1:] == [institute.pk]
+        assert 'institute' in form.errors
+
+    def test_form_resolves_the_submitted_id(self, institute):
+        form = SampleForm(data={'institute': str(institute.pk)})
+        form.is_valid()
+
+        assert form.cleaned_data['institute'] == institute
+
+    def test_serializer_rejects_unknown_ids(self, institute):
+        serializer = SampleSerializer(data={'institute': institute.pk + 1})
+
+        assert not serializer.is_valid()
+        assert serializer.errors['institute'][0].code == 'does_not_exist'
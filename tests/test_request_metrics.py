@@ -0,0 +1,91 @@
+from io import StringIO
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import Client
+from rest_framework.test import APIClient
+from main.models import RequestMetric
+from main.utils.metrics_utils import MetricsRegistry, metrics_registry
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics(db):
+    metrics_registry.reset()
+    yield
+    metrics_registry.reset()
+
+
+@pytest.fixture
+def staff_client(django_user_model):
+    client = APIClient()
+    client.force_authenticate(user=django_user_model.objects.create_user(username='admin', is_staff=True))
+    return client
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    def test_api_requests_are_grouped_by_viewset_action(self, api_client, make_sample):
+        make_sample("240101_120000_010000")
+
+        api_client.get('/samples/')
+        api_client.get('/samples/')
+
+        metrics = metrics_registry.snapshot()['SampleViewSet.list']
+        assert metrics['count'] == 2
+        assert metrics['max_queries'] >= 1
+        assert metrics['mean_response_bytes'] > 0
+        assert sum(metrics['histogram'].values()) == 2
+
+    def test_html_views_are_grouped_by_url_name(self, user):
+        user.user_permissions.add(Permission.objects.get(codename='view_sample'))
+        client = Client()
+        client.force_login(user)
+
+        client.get('/sample/')
+
+        assert metrics_registry.snapshot()['sample_list']['count'] == 1
+
+    def test_slow_requests_are_logged(self, api_client, settings, caplog):
+        settings.SLOW_REQUEST_QUERIES = 0
+
+        api_client.get('/samples/')
+
+        assert "Slow request GET /samples/ (SampleViewSet.list)" in caplog.text
+
+    def test_metrics_endpoint_is_staff_only(self, api_client, staff_client):
+        assert api_client.get('/api/metrics/').status_code == 403
+
+        response = staff_client.get('/api/metrics/')
+
+        assert response.status_code == 200
+        assert 'SampleViewSet.list' not in response.json()['views']
+        assert staff_client.delete('/api/metrics/').status_code == 204
+
+    def test_metrics_of_all_workers_are_added_up(self):
+        other_worker = MetricsRegistry()
+        other_worker.record('SampleViewSet.list', 300.0, 4, 20.0, 1000)
+        other_worker.flush()
+        metrics_registry.record('SampleViewSet.list', 100.0, 2, 10.0, 3000)
+
+        metrics = metrics_registry.snapshot()['SampleViewSet.list']
+
+        assert metrics['count'] == 2
+        assert metrics['mean_ms'] == 200.0 and metrics['max_ms'] == 300.0
+        assert metrics['max_queries'] == 4
+        assert metrics['histogram']['le_100'] == 1 and metrics['histogram']['le_500'] == 1
+
+    def test_measurements_are_saved_when_the_flush_is_due(self, api_client, settings):
+        settings.REQUEST_METRICS_FLUSH_INTERVAL = 0
+
+        api_client.get('/samples/')
+
+        assert RequestMetric.objects.get(view_name='SampleViewSet.list').count == 1
+
+    def test_command_lists_the_views(self):
+        metrics_registry.record('SampleViewSet.list', 100.0, 2, 10.0, 3000)
+        out = StringIO()
+
+        call_command('requestmetrics', '--reset', stdout=out)
+
+        assert 'SampleViewSet.list' in out.getvalue()
+        assert not RequestMetric.objects.exists()
@@ -0,0 +1,71 @@
+import numpy as np
+from main.models import Sample
+from main.utils.analytics_utils import get_sample_info_statistics, summarize_column
+import pytest
+
+
+def test_statistics_match_numpy_per_group():
+    rng = np.random.default_rng(1)
+    values = rng.normal(2.5, 0.5, 1000)
+    values[::7] = np.nan
+    codes = rng.integers(0, 3, 1000)
+
+    stats = summarize_column(values, codes, 4, (5, 50, 95), 10)
+
+    for group in range(3):
+        group_values = values[(codes == group) & ~np.isnan(values)]
+        assert stats['count'][group] == len(group_values)
+        assert stats['min'][group] == group_values.min()
+        assert stats['max'][group] == group_values.max()
+        assert stats['mean'][group] == pytest.approx(group_values.mean())
+        for percentile in (5, 50, 95):
+            assert stats['percentiles'][percentile][group] == pytest.approx(np.percentile(group_values, percentile))
+        assert stats['histogram'][group].tolist() == np.histogram(group_values, stats['edges'])[0].tolist()
+    # a group without values
+    assert stats['count'][3] == 0
+    assert np.isnan(stats['min'][3]) and np.isnan(stats['mean'][3]) and np.isnan(stats['percentiles'][50][3])
+    assert stats['histogram'][3].sum() == 0
+
+
+@pytest.mark.django_db
+class TestSampleAnalytics:
+    @pytest.fixture
+    def samples(self, make_sample):
+        data = {
+            "240101_120000_010000": {'name': 'a', 'weight_in_g': 1.0, 'density_in_gccm': 2.0},
+            "240101_120001_010000": {'name': 'b', 'weight_in_g': 2.0, 'density_in_gccm': 3.0},
+            "240101_120002_010000": {'name': 'c', 'weight_in_g': 6.0},
+        }
+        for sample_id, sample_info in data.items():
+            make_sample(sample_id)
+            Sample.objects.filter(pk=sample_id).update(sample_info_data=sample_info)
+
+    def test_summarizes_all_samples(self, samples):
+        statistics = get_sample_info_statistics(Sample.objects.all(), percentiles=(50,), bins=5)
+
+        assert statistics['count'] == 3
+        assert statistics['bins']['weight_in_g'] == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+        assert statistics['bins']['volume_in_ccm'] == []
+        [group] = statistics['groups']
+        assert group['label'] == 'all' and group['count'] == 3
+        assert group['fields']['weight_in_g'] == {'count': 3, 'min': 1.0, 'max': 6.0, 'mean': 3.0,
+                                                  'percentiles': {'50': 2.0}, 'histogram': [1, 1, 0, 0, 1]}
+        assert group['fields']['density_in_gccm']['mean'] == 2.5
+        assert group['fields']['volume_in_ccm'] == {'count': 0, 'min': None, 'max': None, 'mean': None,
+                                                    'percentiles': {'50': None}, 'histogram': []}
+
+    def test_groups_by_project_through_the_api(self, api_client, samples, project):
+        response = api_client.get('/samples/analytics/', {'group_by': 'project', 'fields': 'weight_in_g',
+                                                          'info__weight_in_g__lt': 5})
+
+        assert response.status_code == 200
+        assert response.data['group_by'] == 'project'
+        [group] = response.data['groups']
+        assert (group['key'], group['label'], group['count']) == (project.pk, "Project", 2)
+        assert list(group['fields']) == ['weight_in_g']
+        assert group['fields']['weight_in_g']['max'] == 2.0
+
+    @pytest.mark.parametrize('params', [{'group_by': 'user'}, {'fields': 'name'}, {'bins': 0},
+                                        {'percentiles': '50,101'}, {'bins': 'many'}])
+    def test_rejects_invalid_parameters(self, api_client, params):
+        assert api_client.get('/samples/analytics/', params).status_code == 400
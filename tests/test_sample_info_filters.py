@@ -0,0 +1,67 @@
+import importlib
+import inspect
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from main.filters import SampleInfoFilterBackend
+from main.models import Sample, SampleType
+import pytest
+
+
+@pytest.mark.django_db
+class TestSampleInfoFilters:
+    def test_created_sample_stores_validated_sample_info(self, api_client, institute, project):
+        sample_info = SimpleUploadedFile("sample_info.json", b'{"name": "solid", "weight_in_g": "2.5"}')
+
+        response = api_client.post('/samples/', {
+            'sample_id': "240101_120000_010000", 'name': "sample", 'date_created': "2024-01-01",
+            'institute': institute.pk, 'project': project.pk,
+            'sample_type': SampleType.objects.get(name="Solids").pk, 'sample_info': sample_info,
+        }, format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Sample.objects.get().sample_info_data == {'name': 'solid', 'weight_in_g': 2.5}
+
+    def test_filter_by_numeric_range(self, api_client, make_sample):
+        for sample_id, density in [("240101_120000_010000", 1.5), ("240101_120001_010000", 2.5)]:
+            make_sample(sample_id)
+            Sample.objects.filter(pk=sample_id).update(
+                sample_info_data={'name': 'solid', 'weight_in_g': 1.0, 'density_in_gccm': density})
+
+        response = api_client.get('/samples/', {'sample_type': 'Solids', 'info__density_in_gccm__gt': '2'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [sample['sample_id'] for sample in response.data['results']] == ["240101_120001_010000"]
+
+    def test_filter_by_exact_text(self, api_client, make_sample):
+        for sample_id, name in [("240101_120000_010000", "quartz"), ("240101_120001_010000", "feldspar")]:
+            make_sample(sample_id)
+            Sample.objects.filter(pk=sample_id).update(sample_info_data={'name': name, 'weight_in_g': 1.0})
+
+        response = api_client.get('/samples/', {'info__name': 'quartz'})
+
+        assert [sample['sample_id'] for sample in response.data['results']] == ["240101_120000_010000"]
+
+    def test_sample_fields_are_not_shadowed(self, api_client, make_sample):
+        for sample_id, name in [("240101_120000_010000", "quartz"), ("240101_120001_010000", "feldspar")]:
+            make_sample(sample_id)
+            Sample.objects.filter(pk=sample_id).update(sample_info_data={'name': name, 'weight_in_g': 1.0})
+
+        # name is a field of the sample, not the name in the sample info
+        response = api_client.get('/samples/', {'name': 'quartz'})
+        params = [param['name'] for param in SampleInfoFilterBackend().get_schema_operation_parameters(None)]
+
+        assert len(response.data['results']) == 2
+        assert 'info__name' in params and 'name' not in params
+
+    def test_backfill_uses_its_own_copy_of_the_structures(self):
+        migration = importlib.import_module('main.migrations.0004_sample_info_data')
+
+        assert migration.clean_sample_info_data({'name': 'solid', 'weight_in_g': '2.5'}, 'Solids') == {
+            'name': 'solid', 'weight_in_g': 2.5}
+        assert 'validation_utils' not in inspect.getsource(migration)
+
+    def test_invalid_filter_value_is_rejected(self, api_client):
+        response = api_client.get('/samples/', {'info__density_in_gccm__gt': 'dense'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'info__density_in_gccm__gt' in response.data
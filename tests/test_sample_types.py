@@ -0,0 +1,42 @@
+from main.forms import SampleInfoForm
+from main.utils.sample_type_utils import get_sample_type_schema
+import pytest
+
+
+@pytest.mark.django_db
+class TestSampleTypeInfo:
+    url = '/api/sample-type-info/'
+
+    def test_field_metadata_with_etag(self, api_client):
+        response = api_client.get(self.url, {'sample_type_name': 'solids'})
+
+        assert response.status_code == 200
+        assert response.json()['weight_in_g'] == {
+            'type': 'FloatField', 'help_text': '', 'required': True, 'allow_null': False}
+        assert response['ETag'] == get_sample_type_schema('Solids').etag
+        assert 'max-age=' in response['Cache-Control']
+
+    def test_matching_etag_returns_304(self, api_client):
+        etag = api_client.get(self.url, {'sample_type_name': 'Solids'})['ETag']
+
+        response = api_client.get(self.url, {'sample_type_name': 'Solids'}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+
+    @pytest.mark.parametrize('params', [{'sample_type_name': 'Plasma'}, {}])
+    def test_unknown_sample_type_returns_404(self, api_client, params):
+        assert api_client.get(self.url, params).status_code == 404
+
+
+class TestSampleInfoForm:
+    def test_fields_are_built_from_the_schema(self):
+        form = SampleInfoForm(data={'name': 'cell', 'manufacturer': 'ACME', 'produced': '2024-01-01'},
+                              sample_type=get_sample_type_schema('Battery'))
+
+        assert list(form.fields) == ['name', 'composition', 'manufacturer', 'produced', 'comment']
+        assert form.is_valid()
+
+    def test_forms_do_not_share_field_instances(self):
+        schema = get_sample_type_schema('Solids')
+
+        assert SampleInfoForm(sample_type=schema).fields['name'] is not SampleInfoForm(sample_type=schema).fields['name']
@@ -0,0 +1,83 @@
+from datetime import date
+from django.contrib.auth.models import Permission
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from main.models import Experiment, Method, Sample, Staff
+from main.utils.search_utils import get_search_terms, search_samples
+import pytest
+
+
+@pytest.fixture
+def samples(make_sample):
+    make_sample("240101_120000_010000")
+    make_sample("240102_120000_010000")
+    make_sample("240103_120000_010000")
+    Sample.objects.filter(pk="240101_120000_010000").update(name="Basalt from Granite Hill")
+    Sample.objects.filter(pk="240102_120000_010000").update(name="Sandstone")
+    Sample.objects.filter(pk="240103_120000_010000").update(name="Limestone")
+
+
+def found(queryset):
+    return [sample.sample_id for sample in queryset]
+
+
+def test_search_terms_drop_punctuation():
+    assert get_search_terms("  basalt & (granite):* ") == ["basalt", "granite"]
+
+
+@pytest.mark.django_db
+class TestSearchSamples:
+    def test_finds_words_in_any_order(self, samples):
+        assert found(search_samples(Sample.objects.all(), "granite basalt")) == ["240101_120000_010000"]
+
+    def test_finds_sample_id_fragment(self, samples):
+        assert found(search_samples(Sample.objects.all(), "240102")) == ["240102_120000_010000"]
+
+    def test_finds_samples_by_project(self, samples):
+        assert len(search_samples(Sample.objects.all(), "PRJ")) == 3
+
+    def test_finds_samples_by_experiment(self, samples, institute, project, user):
+        method = Method.objects.create(institute=institute, name="Method")
+        staff = Staff.objects.create(institute=institute, first_name="A", last_name="B",
+                                     email="staff@dmlf.de", telephone="0")
+        Experiment.objects.create(sample_id="240103_120000_010000", method=method, staff=staff, project=project,
+                                  user=user, name="XRD scan", date_created=date(2024, 1, 1),
+                                  experiment_file=SimpleUploadedFile("scan.zip", b'zip'))
+
+        assert found(search_samples(Sample.objects.all(), "xrd")) == ["240103_120000_010000"]
+
+    def test_sample_id_prefix_ranks_first(self, samples):
+        Sample.objects.filter(pk="240102_120000_010000").update(name="Sample 240103")
+
+        result = search_samples(Sample.objects.all(), "240103")
+
+        assert found(result) == ["240103_120000_010000", "240102_120000_010000"]
+
+    def test_empty_search_finds_nothing(self, samples):
+        assert not search_samples(Sample.objects.all(), " ? ").exists()
+
+
+@pytest.mark.django_db
+class TestSearchViews:
+    def test_api_search_is_paginated(self, api_client, samples):
+        response = api_client.get('/samples/search/', {'q': "stone", 'page_size': 1})
+
+        assert response.status_code == 200
+        assert response.data['count'] == 2
+        assert len(response.data['results']) == 1
+        assert response.data['next'] is not None
+
+    def test_api_search_requires_text(self, api_client):
+        response = api_client.get('/samples/search/')
+
+        assert response.status_code == 400
+
+    def test_search_box_of_sample_list(self, user, samples):
+        user.user_permissions.add(Permission.objects.get(codename='view_sample'))
+        client = Client()
+        client.force_login(user)
+
+        response = client.get('/sample/', {'q': "sand"})
+
+        assert [sample.sample_id for sample in response.context['samples']] == ["240102_120000_010000"]
+        assert 'name="q"' in response.content.decode()
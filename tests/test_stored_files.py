@@ -0,0 +1,45 @@
+import os
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from main.models import StoredFile
+import pytest
+
+
+def save(name, content):
+    name = default_storage.save(name, ContentFile(content))
+    StoredFile.objects.register(name)
+    return name
+
+
+@pytest.mark.django_db
+class TestContentAddressedStorage:
+    def test_identical_uploads_share_one_blob(self):
+        first = save('experiment_files/1.zip', b'datasheet')
+        second = save('supplementary_files/240101_120000_010000.zip', b'datasheet')
+
+        blob = StoredFile.objects.get_blob_name(StoredFile.objects.get(name=first).sha256)
+        assert os.path.samefile(default_storage.path(first), default_storage.path(blob))
+        assert os.path.samefile(default_storage.path(second), default_storage.path(blob))
+
+    def test_blob_is_deleted_with_the_last_reference(self):
+        first = save('experiment_files/1.zip', b'datasheet')
+        second = save('experiment_files/2.zip', b'datasheet')
+        blob = StoredFile.objects.get_blob_name(StoredFile.objects.get(name=first).sha256)
+
+        default_storage.delete(first)
+        StoredFile.objects.release(first)
+        assert default_storage.exists(blob)
+
+        default_storage.delete(second)
+        StoredFile.objects.release(second)
+        assert not default_storage.exists(blob)
+
+    def test_changed_content_releases_the_old_blob(self):
+        name = save('experiment_files/1.zip', b'old')
+        old_blob = StoredFile.objects.get_blob_name(StoredFile.objects.get(name=name).sha256)
+
+        default_storage.delete(name)
+        save(name, b'new')
+
+        assert not default_storage.exists(old_blob)
+        assert default_storage.open(name).read() == b'new'
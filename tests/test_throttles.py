@@ -0,0 +1,91 @@
+from django.core.management import call_command
+from rest_framework.test import APIRequestFactory
+from main.models import ThrottleCounter
+from main.throttles import FixedWindowRateThrottle
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+class ScopedThrottle(FixedWindowRateThrottle):
+    scope = 'tests'
+    rate = '3/min'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [600.0]
+    monkeypatch.setattr(ScopedThrottle, 'timer', lambda self: now[0])
+    return now
+
+
+def get_request(ip='10.0.0.1'):
+    return APIRequestFactory().get('/api/', REMOTE_ADDR=ip)
+
+
+def test_requests_over_the_rate_are_throttled(clock):
+    results = [ScopedThrottle().allow_request(get_request(), None) for _ in range(4)]
+    assert results == [True, True, True, False]
+
+
+def test_state_is_one_counter_per_client(clock):
+    for _ in range(3):
+        ScopedThrottle().allow_request(get_request(), None)
+    ScopedThrottle().allow_request(get_request('10.0.0.2'), None)
+
+    assert set(ThrottleCounter.objects.values_list('key', 'window_end', 'count')) == {
+        ('throttle_tests_10.0.0.1', 660, 3), ('throttle_tests_10.0.0.2', 660, 1)}
+
+
+def test_counter_restarts_in_next_window(clock):
+    throttle = ScopedThrottle()
+    for _ in range(3):
+        assert throttle.allow_request(get_request(), None)
+    clock[0] = 645.0
+    assert not throttle.allow_request(get_request(), None)
+    assert throttle.wait() == 15
+
+    clock[0] = 660.0
+    assert ScopedThrottle().allow_request(get_request(), None)
+    assert ThrottleCounter.objects.get().count == 1
+
+
+def test_window_outlasts_idle_periods(monkeypatch):
+    # a daily counter keeps counting after hours without requests
+    now = [86400.0]
+    monkeypatch.setattr(ScopedThrottle, 'timer', lambda self: now[0])
+    monkeypatch.setattr(ScopedThrottle, 'rate', '2/day')
+    assert ScopedThrottle().allow_request(get_request(), None)
+    now[0] += 6 * 3600
+    assert ScopedThrottle().allow_request(get_request(), None)
+    now[0] += 6 * 3600
+    assert not ScopedThrottle().allow_request(get_request(), None)
+
+
+def test_concurrently_created_counter_is_incremented(clock, monkeypatch):
+    ThrottleCounter.objects.create(key='throttle_tests_10.0.0.1', window_end=660, count=1)
+    # the request did not see the counter of the concurrent request before inserting its own
+    queryset_class = type(ThrottleCounter.objects.none())
+    update = queryset_class.update
+    calls = []
+
+    def update_after_insert(self, **kwargs):
+        calls.append(kwargs)
+        return 0 if len(calls) <= 2 else update(self, **kwargs)
+
+    monkeypatch.setattr(queryset_class, 'update', update_after_insert)
+
+    assert ScopedThrottle().allow_request(get_request(), None)
+    assert ThrottleCounter.objects.get().count == 2
+
+
+def test_clearthrottles_removes_ended_windows():
+    ThrottleCounter.objects.create(key='ended', window_end=60, count=1)
+    ThrottleCounter.objects.create(key='current', window_end=2 ** 40, count=1)
+
+    call_command('clearthrottles')
+
+    assert list(ThrottleCounter.objects.values_list('key', flat=True)) == ['current']
@@ -0,0 +1,90 @@
+import hashlib
+import io
+import zipfile
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory
+from main.models import ArchiveMember, StoredFile
+from main.utils.inspection_utils import inspect_upload, validate_zip_upload
+import pytest
+
+
+def make_zip(members, compression=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=compression) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def upload(data, name="data.zip"):
+    # parses a multipart request with the upload handlers of the settings
+    request = RequestFactory().post('/', {'file': SimpleUploadedFile(name, data)})
+    return request.FILES['file']
+
+
+@pytest.mark.parametrize('max_memory_size', [1024 ** 2, 10])
+def test_uploads_are_inspected_while_received(settings, max_memory_size):
+    settings.FILE_UPLOAD_MAX_MEMORY_SIZE = max_memory_size
+    data = make_zip({'a.csv': b'a,b\n' * 100, 'folder/b.txt': b'b'})
+
+    inspection = upload(data).inspection
+
+    assert inspection.sha256 == hashlib.sha256(data).hexdigest()
+    assert inspection.size == len(data)
+    assert [info.filename for info in inspection.members] == ['a.csv', 'folder/b.txt']
+    assert inspection.error is None
+
+
+def test_non_zip_upload_is_rejected():
+    file = upload(b'{"name": "solid"}', name="data.json")
+
+    assert file.inspection.sha256 == hashlib.sha256(b'{"name": "solid"}').hexdigest()
+    with pytest.raises(ValidationError, match="Only zip files"):
+        validate_zip_upload(file)
+
+
+def test_damaged_zip_is_rejected():
+    data = make_zip({'a.csv': b'a,b\n'})
+
+    with pytest.raises(ValidationError, match="damaged"):
+        validate_zip_upload(upload(data[:-10]))
+
+
+def test_zip_bomb_is_rejected():
+    with pytest.raises(ValidationError, match="compressed by more than"):
+        validate_zip_upload(upload(make_zip({'zeros.bin': bytes(10 * 1024 ** 2)})))
+
+
+def test_zip_with_too_many_members_is_rejected(settings):
+    settings.UPLOAD_ZIP_MAX_MEMBERS = 2
+
+    with pytest.raises(ValidationError, match="more than 2 members"):
+        validate_zip_upload(upload(make_zip({'a': b'a', 'b': b'b', 'c': b'c'})))
+
+
+def test_files_without_handler_are_inspected_once():
+    data = make_zip({'a.csv': b'a'})
+    file = SimpleUploadedFile("data.zip", data)
+
+    assert inspect_upload(file) is inspect_upload(file)
+    assert file.inspection.sha256 == hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.django_db
+def test_register_uses_the_inspection_instead_of_reading_the_file(make_sample, monkeypatch):
+    sample = make_sample("240101_120000_010000")
+    data = make_zip({'a.csv': b'a,b\n'})
+    sample.supplementary_file = upload(data)
+    opened = []
+    original_open = FileSystemStorage._open
+    monkeypatch.setattr(FileSystemStorage, '_open', lambda self, name, mode='rb': opened.append(name)
+                        or original_open(self, name, mode))
+
+    sample.save()
+
+    assert opened == []
+    stored_file = StoredFile.objects.get(name="supplementary_files/240101_120000_010000.zip")
+    assert stored_file.sha256 == hashlib.sha256(data).hexdigest()
+    assert list(ArchiveMember.objects.filter(stored_file=stored_file).values_list('name', flat=True)) == ['a.csv']
@@ -0,0 +1,104 @@
+import json
+import os
+from datetime import date
+from django.core.files.storage import InMemoryStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection, models
+from django.test.utils import CaptureQueriesContext
+from main.models import Method, Project, Sample, SampleType, StoredFile
+import pytest
+
+
+class RemoteStorage(InMemoryStorage):
+    # a storage without local paths, like an object storage
+    def path(self, name):
+        raise NotImplementedError
+
+    def _relative_path(self, name):
+        return os.path.relpath(super().path(name), self.location)
+
+
+@pytest.mark.django_db
+class TestUploads:
+    def test_sample_files_are_written_once_to_their_final_names(self, make_sample):
+        with CaptureQueriesContext(connection) as context:
+            sample = make_sample("240101_120000_010000")
+
+        assert sample.sample_info.name == "sample_info/240101_120000_010000.json"
+        assert os.listdir(default_storage.path('sample_info')) == ["240101_120000_010000.json"]
+        sample_queries = [q['sql'] for q in context.captured_queries if '"main_sample"' in q['sql']]
+        assert len(sample_queries) == 1 and sample_queries[0].startswith('INSERT')
+
+    def test_new_sample_saved_by_a_form_is_inserted_once(self, user, institute, project):
+        # forms and views call save() on a new instance, not objects.create()
+        sample = Sample(sample_id="240101_120000_010000", institute=institute, project=project, user=user,
+                        sample_type=SampleType.objects.get(name="Solids"), name="sample",
+                        date_created=date(2024, 1, 1),
+                        sample_info=SimpleUploadedFile("info.json", json.dumps({"name": "solid"}).encode()))
+
+        with CaptureQueriesContext(connection) as context:
+            sample.save()
+
+        sample_queries = [q['sql'] for q in context.captured_queries if '"main_sample"' in q['sql']]
+        assert len(sample_queries) == 1 and sample_queries[0].startswith('INSERT')
+
+    def test_storage_without_local_paths(self, settings, make_sample):
+        settings.STORAGES = {**settings.STORAGES,
+                             'default': {'BACKEND': 'tests.test_uploads.RemoteStorage'}}
+        sample = make_sample("240101_120000_010000")
+        sample.sample_info = SimpleUploadedFile("other.json", b'{"name": "solid", "weight_in_g": 2.0}')
+
+        sample.save()
+
+        assert Sample.objects.get().sample_info.name == "sample_info/240101_120000_010000.json"
+        assert b'2.0' in default_storage.open(sample.sample_info.name).read()
+        assert default_storage.listdir('sample_info') == ([], ["240101_120000_010000.json"])
+        assert StoredFile.objects.filter(name=sample.sample_info.name).exists()
+
+    def test_updates_without_new_files_skip_the_storage(self, make_sample, django_assert_num_queries):
+        sample = make_sample("240101_120000_010000")
+        sample.name = "renamed"
+
+        with django_assert_num_queries(1):
+            sample.save()
+
+        assert Sample.objects.get().sample_info.name == "sample_info/240101_120000_010000.json"
+
+    def test_new_file_replaces_the_stored_one(self, make_sample):
+        sample = make_sample("240101_120000_010000")
+        sample.sample_info = SimpleUploadedFile("other.json", b'{"name": "solid", "weight_in_g": 2.0}')
+
+        sample.save()
+
+        assert sample.sample_info.name == "sample_info/240101_120000_010000.json"
+        assert b'2.0' in default_storage.open(sample.sample_info.name).read()
+
+    def test_failed_update_keeps_the_stored_file(self, make_sample, monkeypatch):
+        sample = make_sample("240101_120000_010000")
+        stored = default_storage.open(sample.sample_info.name).read()
+        sample.sample_info = SimpleUploadedFile("other.json", b'{"name": "solid", "weight_in_g": 2.0}')
+
+        def fail(*args, **kwargs):
+            raise DatabaseError("connection lost")
+
+        monkeypatch.setattr(models.Model, 'save', fail)
+        with pytest.raises(DatabaseError):
+            sample.save()
+
+        assert default_storage.open("sample_info/240101_120000_010000.json").read() == stored
+        assert os.listdir(default_storage.path('sample_info')) == ["240101_120000_010000.json"]
+
+    def test_primary_key_named_file_is_written_after_the_insert(self, institute):
+        method = Method.objects.create(institute=institute, name="Method",
+                                       method_file=SimpleUploadedFile("method.zip", b'zip'))
+
+        assert method.method_file.name == f"method_files/{method.pk}.zip"
+        assert Method.objects.get().method_file.name == method.method_file.name
+        assert os.listdir(default_storage.path('method_files')) == [f"{method.pk}.zip"]
+
+    def test_primary_key_named_file_of_existing_instance(self, project):
+        project.project_file = SimpleUploadedFile("project.zip", b'zip')
+
+        project.save()
+
+        assert Project.objects.get().project_file.name == f"project_files/{project.pk}.zip"
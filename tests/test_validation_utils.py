@@ -0,0 +1,57 @@
+from django.core.exceptions import ValidationError
+from main.models import CacheVersion, Institute
+from main.utils.cache_utils import increment_version
+from main.utils.validation_utils import validate_sample_id, validate_sample_ids
+import pytest
+
+
+@pytest.mark.django_db
+class TestSampleIdBounds:
+    def test_bounds_are_cached(self, institute, django_assert_num_queries):
+        validate_sample_id("240101_120000_010000")
+
+        with django_assert_num_queries(0):
+            validate_sample_id("240101_120000_010000")
+            validate_sample_ids(["240101_120001_010000", "240101_120002_010000"])
+
+    def test_new_institute_invalidates_bounds(self, institute, django_capture_on_commit_callbacks):
+        code = f"{institute.pk + 1:02d}"
+        with pytest.raises(ValidationError):
+            validate_sample_id(f"240101_120000_{code}0000")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Institute.objects.create(name="Second Institute", street="Street 2", postcode="09599", city="Freiberg",
+                                     telephone="0", email="second@dmlf.de")
+
+        validate_sample_id(f"240101_120000_{code}0000")
+
+    def test_invalidation_waits_for_the_commit(self, institute, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            Institute.objects.create(name="Second Institute", street="Street 2", postcode="09599", city="Freiberg",
+                                     telephone="0", email="second@dmlf.de")
+
+        assert callbacks
+        assert not CacheVersion.objects.filter(name='sample_id_bounds').exists()
+
+    def test_other_processes_notice_new_institutes(self, institute):
+        code = f"{institute.pk + 1:02d}"
+        validate_sample_id("240101_120000_010000")
+        # created and invalidated by another process: only the version in the database changes
+        Institute.objects.create(name="Second Institute", street="Street 2", postcode="09599", city="Freiberg",
+                                 telephone="0", email="second@dmlf.de")
+        increment_version('sample_id_bounds')
+
+        validate_sample_id(f"240101_120000_{code}0000")
+        assert not validate_sample_ids([f"240101_120001_{code}0000"])
+
+    def test_bounds_are_checked_again_after_the_timeout(self, institute, settings, django_assert_num_queries):
+        settings.VERSIONED_CACHE_TIMEOUT = 0
+        validate_sample_id("240101_120000_010000")
+
+        with django_assert_num_queries(1):
+            validate_sample_id("240101_120000_010000")
+
+    def test_batch_reports_every_invalid_id(self, institute):
+        errors = validate_sample_ids(["240101_120000_010000", "not_a_sample_id", "240101_120000_010001"])
+
+        assert set(errors) == {"not_a_sample_id", "240101_120000_010001"}